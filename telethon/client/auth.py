@@ -340,7 +340,7 @@ class AuthMethods:
         elif password:
             pwd = await self(functions.account.GetPasswordRequest())
             request = functions.auth.CheckPasswordRequest(
-                pwd_mod.compute_check(pwd, password)
+                await self._run_crypto_job(pwd_mod.compute_check, pwd, password)
             )
         elif bot_token:
             request = functions.auth.ImportBotAuthorizationRequest(
@@ -394,6 +394,13 @@ class AuthMethods:
 
         return user
 
+    async def _run_crypto_job(self: 'TelegramClient', func, *args):
+        """
+        Runs ``func(*args)`` (such as hashing a password) in the crypto executor.
+        """
+        return await helpers.get_running_loop().run_in_executor(
+            self._crypto_executor, func, *args)
+
     async def send_code_request(
             self: 'TelegramClient',
             phone: str,
@@ -618,13 +625,13 @@ class AuthMethods:
             current_password = None
 
         if current_password:
-            password = pwd_mod.compute_check(pwd, current_password)
+            password = await self._run_crypto_job(pwd_mod.compute_check, pwd, current_password)
         else:
             password = types.InputCheckPasswordEmpty()
 
         if new_password:
-            new_password_hash = pwd_mod.compute_digest(
-                pwd.new_algo, new_password)
+            new_password_hash = await self._run_crypto_job(
+                pwd_mod.compute_digest, pwd.new_algo, new_password)
         else:
             new_password_hash = b''
 
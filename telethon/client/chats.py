@@ -401,7 +401,8 @@ class ChatMethods:
             *,
             search: str = '',
             filter: 'types.TypeChannelParticipantsFilter' = None,
-            aggressive: bool = False) -> _ParticipantsIter:
+            aggressive: bool = False,
+            prefetch: int = 0) -> _ParticipantsIter:
         """
         Iterator over the participants belonging to the specified chat.
 
@@ -435,6 +436,13 @@ class ChatMethods:
                 the amount of members that can be retrieved, and this was a
                 hack that no longer works.
 
+            prefetch (`int`, optional):
+                How many chunks of participants to load in the background while
+                the previous ones are being processed. By default, the
+                next chunk is only loaded once the previous one has been
+                consumed. If you stop iterating early, call ``aclose()``
+                on the iterator to cancel the loading.
+
         Yields
             The :tl:`User` objects returned by :tl:`GetParticipantsRequest`
             with an additional ``.participant`` attribute which is the
@@ -460,6 +468,7 @@ class ChatMethods:
         return _ParticipantsIter(
             self,
             limit,
+            prefetch=prefetch,
             entity=entity,
             filter=filter,
             search=search
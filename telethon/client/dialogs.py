@@ -154,7 +154,8 @@ class DialogMethods:
             ignore_pinned: bool = False,
             ignore_migrated: bool = False,
             folder: int = None,
-            archived: bool = None
+            archived: bool = None,
+            prefetch: int = 0
     ) -> _DialogsIter:
         """
         Iterator over the dialogs (open conversations/subscribed channels).
@@ -209,6 +210,13 @@ class DialogMethods:
             archived (`bool`, optional):
                 Alias for `folder`. If unspecified, all will be returned,
                 `False` implies ``folder=0`` and `True` implies ``folder=1``.
+
+            prefetch (`int`, optional):
+                How many chunks of dialogs to load in the background while
+                the previous ones are being processed. By default, the
+                next chunk is only loaded once the previous one has been
+                consumed. If you stop iterating early, call ``aclose()``
+                on the iterator to cancel the loading.
         Yields
             Instances of `Dialog <telethon.tl.custom.dialog.Dialog>`.
 
@@ -225,6 +233,7 @@ class DialogMethods:
         return _DialogsIter(
             self,
             limit,
+            prefetch=prefetch,
             offset_date=offset_date,
             offset_id=offset_id,
             offset_peer=offset_peer,
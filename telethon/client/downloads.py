@@ -1,12 +1,15 @@
 import datetime
+import hashlib
 import io
+import json
 import os
 import pathlib
 import typing
 import inspect
 import asyncio
+import collections
 
-from ..crypto import AES
+from ..crypto import AES, AESModeCTR, CdnDecrypter
 
 from .. import utils, helpers, errors, hints
 from ..requestiter import RequestIter
@@ -27,23 +30,279 @@ MAX_CHUNK_SIZE = 512 * 1024
 # 2021-01-15, users reported that `errors.TimeoutError` can occur while downloading files.
 TIMED_OUT_SLEEP = 1
 
+# How many parts of a file may be downloaded from a CDN at the same time
+_MAX_CDN_CONCURRENCY = 4
+
+# Size of the parts of a file covered by each hash, if there are none to tell
+_CDN_HASH_SIZE = 128 * 1024
+
+# How many times a file may be reuploaded to the CDN while downloading it
+_MAX_CDN_REUPLOADS = 2
+
+
+class _PartialDownload:
+    """
+    Keeps track of how much of a file has been downloaded into
+    ``<file>.part``, in a ``<file>.part.json`` manifest next to it,
+    so that an interrupted download can continue from there.
+    """
+    def __init__(self, file, location, part_size, file_size):
+        self.file = file
+        self.part = file + '.part'
+        self.manifest = self.part + '.json'
+        self.part_size = part_size
+        self.file_size = file_size
+        self.offset = 0
+
+        # The file reference changes over time, but the file does not
+        location = location.to_dict()
+        location.pop('file_reference', None)
+        self.key = hashlib.sha256(repr(location).encode('utf-8')).hexdigest()
+
+    def load(self):
+        """
+        Loads the manifest, returning the offset from which to continue.
+        If it doesn't match the file being downloaded, or the data written
+        so far doesn't match the manifest, the download starts over.
+        """
+        try:
+            with open(self.manifest, encoding='utf-8') as f:
+                data = json.load(f)
+            size = os.path.getsize(self.part)
+        except (OSError, ValueError):
+            return 0
+
+        offset = data.get('offset', 0)
+        if data.get('key') != self.key \
+                or data.get('part_size') != self.part_size \
+                or data.get('file_size') != self.file_size \
+                or offset % self.part_size != 0 \
+                or size < offset:
+            return 0
+
+        # Make sure the last part saved is the one that was actually written
+        # (its size depends on where it came from, for instance from a CDN)
+        if offset:
+            last_size = data.get('last_part_size')
+            if not isinstance(last_size, int) or not 0 < last_size <= offset:
+                return 0
+
+            with open(self.part, 'rb') as f:
+                f.seek(offset - last_size)
+                if hashlib.sha256(f.read(last_size)).hexdigest() != data.get('last_part'):
+                    return 0
+
+        self.offset = offset
+        return offset
+
+    def open(self):
+        f = open(self.part, 'r+b' if self.offset else 'wb')
+        f.truncate(self.offset)
+        f.seek(self.offset)
+        return f
+
+    def advance(self, f, chunk):
+        """
+        Records that `chunk` was written to `f`. The data is flushed
+        first, so the manifest never claims more than what was written.
+        """
+        f.flush()
+        self.offset += len(chunk)
+
+        # Write to a different file first so a crash can't leave it half-written
+        tmp = self.manifest + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as m:
+            json.dump({
+                'key': self.key,
+                'part_size': self.part_size,
+                'file_size': self.file_size,
+                'offset': self.offset,
+                'last_part': hashlib.sha256(chunk).hexdigest(),
+                'last_part_size': len(chunk),
+            }, m)
+        os.replace(tmp, self.manifest)
+
+    def finish(self):
+        os.replace(self.part, self.file)
+        try:
+            os.remove(self.manifest)
+        except OSError:
+            pass
+
+
+def _decrypt_cdn_part(key, iv, data, hashes):
+    """
+    Decrypts a part downloaded from a CDN, and checks it against the
+    `hashes` covering it. Raises `CdnFileTamperedError` if they don't match.
+    """
+    data = AESModeCTR(key=key, iv=iv).decrypt(data)
+    i = 0
+    for cdn_hash in hashes:
+        CdnDecrypter.check(data[i:i + cdn_hash.limit], cdn_hash)
+        i += cdn_hash.limit
+    return data
+
 
 class _CdnRedirect(Exception):
     def __init__(self, cdn_redirect=None):
         self.cdn_redirect = cdn_redirect
-      
-  
+
+
+class _CdnDownloadIter(RequestIter):
+    """
+    Downloads a file from a CDN (see https://core.telegram.org/cdn).
+
+    The AES-256-CTR counter of each part can be computed from its offset,
+    so several parts are downloaded and decrypted at the same time. Every
+    part is checked against the file hashes before being returned (in
+    order), and if the CDN needs the file reuploaded only the parts that
+    were missing are requested again (up to `_MAX_CDN_REUPLOADS` times).
+    """
+    async def _init(self, cdn_redirect, dc_id, offset, request_size, file_size):
+        self._tasks = collections.deque()
+        self._cdn = self._sender = None
+        self._redirect = cdn_redirect
+        self._hashes = {h.offset: h for h in cdn_redirect.file_hashes}
+        hash_size = cdn_redirect.file_hashes[0].limit if cdn_redirect.file_hashes else _CDN_HASH_SIZE
+
+        # Parts must cover whole hashes to be checked, and start at a valid
+        # offset (multiple of their size), so the first one may be trimmed
+        self._part_size = max(request_size, hash_size)
+        self._skip = offset % self._part_size
+        self._offset = offset - self._skip
+        self._hashes_lock = asyncio.Lock()
+        self._reupload_lock = asyncio.Lock()
+        self._reuploads = 0
+        self.total = file_size
+
+        # The hashes and reuploads are requested from the DC of the file
+        self._exported = dc_id and self.client.session.dc_id != dc_id
+        if self._exported:
+            self._sender = await self.client._borrow_exported_sender(dc_id)
+        else:
+            self._sender = self.client._sender
+
+        try:
+            self._cdn = await self.client._get_cdn_client(cdn_redirect)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def _load_next_chunk(self):
+        try:
+            # Keep the next few parts downloading, but none past the end
+            while len(self._tasks) < _MAX_CDN_CONCURRENCY \
+                    and (self.total is None or self._offset < self.total or not self._tasks):
+                self._tasks.append(helpers.get_running_loop().create_task(
+                    self._download_part(self._offset)))
+                self._offset += self._part_size
+
+            data = await self._tasks.popleft()
+        except BaseException:
+            await self.close()
+            raise
+
+        done = len(data) < self._part_size
+        if self._skip:
+            data = data[self._skip:]
+            self._skip = 0
+
+        if data:
+            self.buffer.append(data)
+        if done:
+            self.left = len(self.buffer)
+            await self.close()
+
+    async def _download_part(self, offset):
+        while True:
+            reuploads = self._reuploads
+            result = await self._cdn(functions.upload.GetCdnFileRequest(
+                self._redirect.file_token, offset=offset, limit=self._part_size))
+
+            if not isinstance(result, types.upload.CdnFileReuploadNeeded):
+                break
+
+            # Other parts may need the same reupload, which is only done once
+            async with self._reupload_lock:
+                if reuploads == self._reuploads:
+                    if self._reuploads >= _MAX_CDN_REUPLOADS:
+                        raise RuntimeError('The CDN still needs the file reuploaded after {} reuploads'
+                                           .format(self._reuploads))
+
+                    self.client._log[__name__].info('Reuploading file to the CDN at %d', offset)
+                    hashes = await self.client._call(self._sender, functions.upload.ReuploadCdnFileRequest(
+                        self._redirect.file_token, result.request_token))
+                    self._hashes.update((h.offset, h) for h in hashes)
+                    self._reuploads += 1
+
+        # Decrypting and hashing a whole part is slow in pure Python, so it's
+        # done in the crypto executor (only the hashes are requested here)
+        hashes = await self._get_hashes(offset, len(result.bytes))
+        return await self.client._run_crypto_job(
+            _decrypt_cdn_part,
+            self._redirect.encryption_key,
+            # 12 first bytes of the IV..4 bytes of the offset (in blocks, big endian)
+            self._redirect.encryption_iv[:12] + (offset // 16).to_bytes(4, 'big'),
+            result.bytes,
+            hashes
+        )
+
+    async def _get_hashes(self, offset, size):
+        """
+        Returns the hashes covering `size` bytes from `offset`, requesting
+        those that are not known yet. Raises `CdnFileTamperedError` if
+        there's no hash for some part.
+        """
+        hashes = []
+        end = offset + size
+        while offset < end:
+            cdn_hash = self._hashes.get(offset)
+            if not cdn_hash:
+                async with self._hashes_lock:
+                    if offset not in self._hashes:
+                        result = await self.client._call(self._sender, functions.upload.GetCdnFileHashesRequest(
+                            self._redirect.file_token, offset))
+                        self._hashes.update((h.offset, h) for h in result)
+
+                cdn_hash = self._hashes.get(offset)
+                if not cdn_hash:
+                    raise errors.CdnFileTamperedError()
+
+            hashes.append(cdn_hash)
+            offset += cdn_hash.limit
+
+        return hashes
+
+    async def close(self):
+        while self._tasks:
+            task = self._tasks.pop()
+            task.cancel()
+            try:
+                await task
+            except BaseException:
+                pass
+
+        if self._cdn:
+            cdn, self._cdn = self._cdn, None
+            await cdn.disconnect()
+
+        if self._sender:
+            sender, self._sender = self._sender, None
+            if self._exported:
+                await self.client._return_exported_sender(sender)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
 class _DirectDownloadIter(RequestIter):
     async def _init(
-            self, file, dc_id, offset, stride, chunk_size, request_size, file_size, msg_data, cdn_redirect=None):
+            self, file, dc_id, offset, stride, chunk_size, request_size, file_size, msg_data):
         self.request = functions.upload.GetFileRequest(
-            file, offset=offset, limit=request_size) 
-        self._client = self.client
-        self._cdn_redirect = cdn_redirect
-        if cdn_redirect is not None:
-          self.request = functions.upload.GetCdnFileRequest(cdn_redirect.file_token, offset=offset, limit=request_size)
-          self._client = await self.client._get_cdn_client(cdn_redirect)
-        
+            file, offset=offset, limit=request_size)
         self.total = file_size
         self._stride = stride
         self._chunk_size = chunk_size
@@ -51,7 +310,7 @@ class _DirectDownloadIter(RequestIter):
         self._msg_data = msg_data
         self._timed_out = False
         
-        self._exported = dc_id and self._client.session.dc_id != dc_id
+        self._exported = dc_id and self.client.session.dc_id != dc_id
         if not self._exported:
             # The used sender will also change if ``FileMigrateError`` occurs
             self._sender = self.client._sender
@@ -83,18 +342,13 @@ class _DirectDownloadIter(RequestIter):
 
     async def _request(self):
         try:
-            result = await self._client._call(self._sender, self.request)
+            result = await self.client._call(self._sender, self.request)
             self._timed_out = False
             if isinstance(result, types.upload.FileCdnRedirect):
                 if self.client._mb_entity_cache.self_bot:
                     raise ValueError('FileCdnRedirect but the GetCdnFileRequest API access for bot users is restricted. Try to change api_id to avoid FileCdnRedirect')
                 raise _CdnRedirect(result)
-            if isinstance(result, types.upload.CdnFileReuploadNeeded):
-                await self.client._call(self.client._sender, functions.upload.ReuploadCdnFileRequest(file_token=self._cdn_redirect.file_token, request_token=result.request_token))
-                result = await self._client._call(self._sender, self.request)
-                return result.bytes
-            else:
-                return result.bytes
+            return result.bytes
 
         except errors.TimedOutError as e:
             if self._timed_out:
@@ -332,7 +586,8 @@ class DownloadMethods:
             file: 'hints.FileLike' = None,
             *,
             thumb: 'typing.Union[int, types.TypePhotoSize]' = None,
-            progress_callback: 'hints.ProgressCallback' = None) -> typing.Optional[typing.Union[str, bytes]]:
+            progress_callback: 'hints.ProgressCallback' = None,
+            resume: bool = False) -> typing.Optional[typing.Union[str, bytes]]:
         """
         Downloads the given media from a message object.
 
@@ -381,6 +636,12 @@ class DownloadMethods:
                     as they are available since layer 116 and are bigger than
                     any of the photos.
 
+            resume (`bool`, optional):
+                Whether an interrupted download of a document should continue
+                where it left off. See `download_file` for details. The file
+                name must be the same as before, which is the case if `file`
+                is a directory (or not given) and the same message is used.
+
         Returns
             `None` if no media was provided, or if it was Empty. On success
             the file path is returned since it may differ from the one given.
@@ -436,7 +697,7 @@ class DownloadMethods:
             )
         elif isinstance(media, (types.MessageMediaDocument, types.Document)):
             return await self._download_document(
-                media, file, date, thumb, progress_callback, msg_data
+                media, file, date, thumb, progress_callback, msg_data, resume
             )
         elif isinstance(media, types.MessageMediaContact) and thumb is None:
             return self._download_contact(
@@ -457,7 +718,8 @@ class DownloadMethods:
             progress_callback: 'hints.ProgressCallback' = None,
             dc_id: int = None,
             key: bytes = None,
-            iv: bytes = None) -> typing.Optional[bytes]:
+            iv: bytes = None,
+            resume: bool = False) -> typing.Optional[bytes]:
         """
         Low-level method to download files from their input location.
 
@@ -502,6 +764,16 @@ class DownloadMethods:
             iv ('bytes', optional):
                 In case of an encrypted upload (secret chats) an iv is supplied
 
+            resume (`bool`, optional):
+                Whether an interrupted download should continue where it
+                left off. Only works if `file` is a path. The data is written
+                to ``<file>.part`` and the progress to ``<file>.part.json``,
+                and once done, the ``.part`` file is renamed to `file`.
+
+                Downloading the same file to the same path again will verify
+                the data saved so far and continue from the last part saved
+                (starting over if it doesn't match). Note that the part size
+                must not change between attempts.
 
         Example
             .. code-block:: python
@@ -519,6 +791,7 @@ class DownloadMethods:
             dc_id=dc_id,
             key=key,
             iv=iv,
+            resume=resume,
         )
 
     async def _download_file(
@@ -533,7 +806,8 @@ class DownloadMethods:
             key: bytes = None,
             iv: bytes = None,
             msg_data: tuple = None,
-            cdn_redirect: types.upload.FileCdnRedirect = None
+            cdn_redirect: types.upload.FileCdnRedirect = None,
+            resume: bool = False
     ) -> typing.Optional[bytes]:
         if not part_size_kb:
             if not file_size:
@@ -550,24 +824,43 @@ class DownloadMethods:
             file = str(file.absolute())
 
         in_memory = file is None or file is bytes
+        partial = None
         if in_memory:
             f = io.BytesIO()
         elif isinstance(file, str):
             # Ensure that we'll be able to download the media
             helpers.ensure_parent_dir_exists(file)
-            f = open(file, 'wb')
+            if resume:
+                partial = _PartialDownload(
+                    file, utils._get_file_info(input_location).location, part_size, file_size)
+                if partial.load():
+                    self._log[__name__].info('Resuming download of %s at %d', file, partial.offset)
+                f = partial.open()
+            else:
+                f = open(file, 'wb')
         else:
             f = file
 
+        offset = partial.offset if partial else 0
+        if cdn_redirect:
+            chunks = _CdnDownloadIter(
+                self, None, cdn_redirect=cdn_redirect, dc_id=dc_id, offset=offset,
+                request_size=part_size, file_size=file_size)
+        else:
+            chunks = self._iter_download(
+                input_location, offset=offset, request_size=part_size, dc_id=dc_id, msg_data=msg_data)
+
         try:
-            async for chunk in self._iter_download(
-                    input_location, request_size=part_size, dc_id=dc_id, msg_data=msg_data, cdn_redirect=cdn_redirect):
+            async for chunk in chunks:
                 if iv and key:
                     chunk = AES.decrypt_ige(chunk, key, iv)
                 r = f.write(chunk)
                 if inspect.isawaitable(r):
                     await r
 
+                if partial:
+                    partial.advance(f, chunk)
+
                 if progress_callback:
                     r = progress_callback(f.tell(), file_size)
                     if inspect.isawaitable(r):
@@ -579,20 +872,28 @@ class DownloadMethods:
 
             if in_memory:
                 return f.getvalue()
+            if partial:
+                f.close()
+                partial.finish()
         except _CdnRedirect as e:
-          self._log[__name__].info('FileCdnRedirect to CDN data center %s', e.cdn_redirect.dc_id)
-          return await self._download_file(
-              input_location=input_location,
-              file=file,
-              part_size_kb=part_size_kb,
-              file_size=file_size,
-              progress_callback=progress_callback,
-              dc_id=e.cdn_redirect.dc_id,
-              key=e.cdn_redirect.encryption_key,
-              iv=e.cdn_redirect.encryption_iv,
-              msg_data=msg_data,
-              cdn_redirect=e.cdn_redirect
-          )
+            self._log[__name__].info('FileCdnRedirect to CDN data center %s', e.cdn_redirect.dc_id)
+            if isinstance(file, str) or in_memory:
+                f.close()
+
+            # Still from the DC of the file, since it's the one to request the hashes to
+            return await self._download_file(
+                input_location=input_location,
+                file=file,
+                part_size_kb=part_size_kb,
+                file_size=file_size,
+                progress_callback=progress_callback,
+                dc_id=utils._get_file_info(input_location).dc_id or dc_id,
+                key=key,
+                iv=iv,
+                msg_data=msg_data,
+                cdn_redirect=e.cdn_redirect,
+                resume=resume
+            )
         finally:
             if isinstance(file, str) or in_memory:
                 f.close()
@@ -714,8 +1015,7 @@ class DownloadMethods:
             request_size: int = MAX_CHUNK_SIZE,
             file_size: int = None,
             dc_id: int = None,
-            msg_data: tuple = None,
-            cdn_redirect: types.upload.FileCdnRedirect = None
+            msg_data: tuple = None
     ):
         info = utils._get_file_info(file)
         if info.dc_id is not None:
@@ -765,8 +1065,7 @@ class DownloadMethods:
             chunk_size=chunk_size,
             request_size=request_size,
             file_size=file_size,
-            msg_data=msg_data,
-            cdn_redirect=cdn_redirect
+            msg_data=msg_data
         )
 
     # endregion
@@ -903,7 +1202,7 @@ class DownloadMethods:
         return kind, possible_names
 
     async def _download_document(
-            self, document, file, date, thumb, progress_callback, msg_data):
+            self, document, file, date, thumb, progress_callback, msg_data, resume=False):
         """Specialized version of .download_media() for documents."""
         if isinstance(document, types.MessageMediaDocument):
             document = document.document
@@ -937,6 +1236,7 @@ class DownloadMethods:
             file_size=size.size if size else document.size,
             progress_callback=progress_callback,
             msg_data=msg_data,
+            resume=resume,
         )
 
         return result if file is bytes else file
@@ -1,14 +1,27 @@
+import functools
 import itertools
 import re
 import typing
 
 from .. import helpers, utils
+from ..extensions import markdown, html
 from ..tl import types
 
 if typing.TYPE_CHECKING:
     from .telegramclient import TelegramClient
 
 
+# How many different (text, parse mode) are remembered, to avoid parsing the
+# same text again when it's sent many times (for example, to many chats).
+_PARSE_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+def _parse_cached(message, parse_mode):
+    message, entities = parse_mode.parse(message)
+    return message, tuple(entities)
+
+
 class MessageParseMethods:
 
     # region Public properties
@@ -84,7 +97,13 @@ class MessageParseMethods:
             return message, []
 
         original_message = message
-        message, msg_entities = parse_mode.parse(message)
+        if parse_mode in (markdown, html):
+            # Only the built-in parse modes are known to always give the same
+            # result. The entities themselves are not modified, only the list.
+            message, msg_entities = _parse_cached(message, parse_mode)
+            msg_entities = list(msg_entities)
+        else:
+            message, msg_entities = parse_mode.parse(message)
         if original_message and not message and not msg_entities:
             raise ValueError("Failed to parse message")
 
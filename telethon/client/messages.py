@@ -1,5 +1,9 @@
+import asyncio
 import inspect
 import itertools
+import json
+import os
+import time
 import typing
 import warnings
 
@@ -9,6 +13,9 @@ from ..tl import types, functions
 
 _MAX_CHUNK_SIZE = 100
 
+# How many chunks each range may have loaded ahead when scanning in order
+_MAX_BUFFERED_RANGE_CHUNKS = 10
+
 if typing.TYPE_CHECKING:
     from .telegramclient import TelegramClient
 
@@ -20,8 +27,10 @@ class _MessagesIter(RequestIter):
     async def _init(
             self, entity, offset_id, min_id, max_id,
             from_user, offset_date, add_offset, filter, search, reply_to,
-            scheduled
+            scheduled, hydrate
     ):
+        self._hydrate = hydrate
+
         # Note that entity being `None` will perform a global search.
         if entity:
             self.entity = await self.client.get_input_entity(entity)
@@ -185,7 +194,7 @@ class _MessagesIter(RequestIter):
         self.total = getattr(r, 'count', len(r.messages))
 
         entities = {utils.get_peer_id(x): x
-                    for x in itertools.chain(r.users, r.chats)}
+                    for x in itertools.chain(r.users, r.chats)} if self._hydrate else None
 
         messages = reversed(r.messages) if self.reverse else r.messages
         for message in messages:
@@ -282,7 +291,8 @@ class _MessagesIter(RequestIter):
 
 
 class _IDsIter(RequestIter):
-    async def _init(self, entity, ids):
+    async def _init(self, entity, ids, hydrate):
+        self._hydrate = hydrate
         self.total = len(ids)
         self._ids = list(reversed(ids)) if self.reverse else ids
         self._offset = 0
@@ -318,7 +328,7 @@ class _IDsIter(RequestIter):
             return
 
         entities = {utils.get_peer_id(x): x
-                    for x in itertools.chain(r.users, r.chats)}
+                    for x in itertools.chain(r.users, r.chats)} if self._hydrate else None
 
         # Telegram seems to return the messages in the order in which
         # we asked them for, so we don't need to check it ourselves,
@@ -337,6 +347,303 @@ class _IDsIter(RequestIter):
                 self.buffer.append(message)
 
 
+class _WorkerIter(RequestIter):
+    """
+    Base for the iterators whose requests are made by worker tasks, at
+    most ``concurrency`` at a time and ``rate_limit`` per second, which
+    are cancelled as soon as the iteration stops (because the limit was
+    reached, there's nothing left or it failed) or is closed.
+    """
+    async def __anext__(self):
+        try:
+            result = await super().__anext__()
+        except BaseException:
+            self._cancel_workers()
+            raise
+
+        if self.left <= 0:
+            # Nothing else will be emitted, so the workers can stop now
+            self._cancel_workers()
+        return result
+
+    def _init_workers(self, concurrency, rate_limit):
+        self._cancel_workers()
+        self._rate_limit = rate_limit
+        self._next_request = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _limited_call(self, request):
+        async with self._semaphore:
+            # Space out requests evenly to stay within the budget
+            if self._rate_limit:
+                now = time.monotonic()
+                at = max(now, self._next_request)
+                self._next_request = at + 1 / self._rate_limit
+                await asyncio.sleep(at - now)
+
+            return await self.client(request)
+
+    def _cancel_workers(self):
+        for task in getattr(self, '_workers', ()):
+            task.cancel()
+        self._workers = []
+
+    async def aclose(self):
+        self._cancel_workers()
+        await super().aclose()
+
+    def __del__(self):
+        self._cancel_workers()
+        super().__del__()
+
+
+class _HistoryRangesIter(_WorkerIter):
+    """
+    Scans the history of a chat by splitting the message IDs into ranges,
+    each of which is scanned (from newest to oldest) by its own task.
+    """
+    async def _init(
+            self, entity, min_id, max_id, partitions, concurrency,
+            rate_limit, ordered, checkpoint, hydrate
+    ):
+        self._init_workers(concurrency, rate_limit)
+        self._hydrate = hydrate
+        self.entity = await self.client.get_input_entity(entity)
+        self._peer_id = await self.client.get_peer_id(self.entity)
+        self._checkpoint = os.fspath(checkpoint) if checkpoint else None
+
+        # Each range is `[min_id, offset_id]`, both exclusive, and the
+        # offset is only moved once the messages were consumed.
+        self._ranges = self._load_checkpoint()
+        if self._ranges is None:
+            r = await self._get_history(0, 1)
+            self.total = getattr(r, 'count', len(r.messages))
+            if not max_id:
+                max_id = (r.messages[0].id + 1) if r.messages else 0
+
+            size = max_id - min_id - 1
+            if size <= 0:
+                raise StopAsyncIteration
+
+            step = -(-size // partitions)  # ceil
+            self._ranges = [
+                [max(top - step, min_id), top + 1]
+                for top in range(max_id - 1, min_id, -step)
+            ]
+            self._save_checkpoint()
+
+        pending = [i for i, (lo, offset) in enumerate(self._ranges) if offset - lo > 1]
+        if not pending:
+            raise StopAsyncIteration
+
+        if ordered:
+            self._queues = {i: asyncio.Queue(_MAX_BUFFERED_RANGE_CHUNKS) for i in pending}
+        else:
+            queue = asyncio.Queue(2 * concurrency)
+            self._queues = {i: queue for i in pending}
+
+        self._pending = pending
+        self._consumed = None
+        self._workers = [
+            helpers.get_running_loop().create_task(self._scan(i)) for i in pending
+        ]
+
+    async def _load_next_chunk(self):
+        # Everything previously loaded was consumed, so it can be saved
+        if self._consumed:
+            i, offset = self._consumed
+            self._ranges[i][1] = offset
+            self._save_checkpoint()
+            self._consumed = None
+
+        while self._pending:
+            # When unordered, all ranges share the same queue
+            item = await self._queues[self._pending[0]].get()
+
+            if isinstance(item, Exception):
+                self._cancel_workers()
+                raise item
+
+            i, messages, offset = item
+            if messages is None:
+                self._pending.remove(i)
+                continue
+
+            self.buffer.extend(messages)
+            self._consumed = (i, offset)
+            return
+
+        return True
+
+    async def _scan(self, i):
+        lo, offset = self._ranges[i]
+        queue = self._queues[i]
+        try:
+            while offset - lo > 1 and self.left > 0:
+                r = await self._get_history(offset, _MAX_CHUNK_SIZE)
+                entities = {utils.get_peer_id(x): x
+                            for x in itertools.chain(r.users, r.chats)} if self._hydrate else None
+
+                messages = []
+                for message in r.messages:
+                    if isinstance(message, types.MessageEmpty) or not lo < message.id < offset:
+                        continue
+
+                    message._finish_init(self.client, entities, self.entity)
+                    messages.append(message)
+
+                # Messages are returned in descending order (the last is the lowest),
+                # and if there are none, or none in range, the range is finished.
+                if not r.messages or r.messages[-1].id <= lo + 1:
+                    offset = lo
+                else:
+                    offset = r.messages[-1].id
+
+                await queue.put((i, messages, offset))
+
+            await queue.put((i, None, offset))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+
+    async def _get_history(self, offset_id, limit):
+        return await self._limited_call(functions.messages.GetHistoryRequest(
+            peer=self.entity,
+            offset_id=offset_id,
+            offset_date=None,
+            add_offset=0,
+            limit=limit,
+            max_id=0,
+            min_id=0,
+            hash=0
+        ))
+
+    def _load_checkpoint(self):
+        if not self._checkpoint or not os.path.isfile(self._checkpoint):
+            return None
+
+        with open(self._checkpoint, encoding='utf-8') as f:
+            data = json.load(f)
+
+        if data['peer_id'] != self._peer_id:
+            raise ValueError('The checkpoint {} belongs to a different chat ({})'
+                             .format(self._checkpoint, data['peer_id']))
+
+        self.total = data.get('total')
+        return data['ranges']
+
+    def _save_checkpoint(self):
+        if not self._checkpoint:
+            return
+
+        # Write to a different file first so a crash can't leave it half-written
+        tmp = self._checkpoint + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'peer_id': self._peer_id, 'total': self.total, 'ranges': self._ranges}, f)
+        os.replace(tmp, self._checkpoint)
+
+
+class _BulkIter(_WorkerIter):
+    """
+    Runs the same action over many chats, with the message IDs of each
+    chat split into chunks, and yields the result of each chunk as soon
+    as it's done.
+    """
+    async def _init(self, action, items, to, revoke, concurrency, rate_limit):
+        self._init_workers(concurrency, rate_limit)
+        self._action = action
+        self._revoke = revoke
+        self._queue = asyncio.Queue()
+        self._remaining = 0
+
+        items = [(chat, ids) for chat, ids in items]
+        if action != 'read' and any(ids is None for _, ids in items):
+            raise ValueError('The message IDs must be given to {} them'.format(action))
+        if action == 'forward':
+            self._to = await self.client.get_input_entity(to)
+
+        async def resolve(chat):
+            entity = await self.client.get_input_entity(chat)
+            # The peer ID tells apart the same chat given in different ways
+            # (for instance, 'me' and our own ID), unlike the input peer
+            return entity, await self.client.get_peer_id(entity)
+
+        # Resolve each distinct chat once (lookups are batched anyway)
+        chats = list({id(chat): chat for chat, _ in items}.values())
+        resolved = await asyncio.gather(*map(resolve, chats), return_exceptions=True)
+        resolved = dict(zip(map(id, chats), resolved))
+
+        # Group by chat so that IDs from several items can share a request
+        groups = {}
+        for chat, ids in items:
+            result = resolved[id(chat)]
+            if isinstance(result, Exception):
+                self._queue.put_nowait((chat, ids, result))
+                self._remaining += 1
+                continue
+
+            entity, key = result
+            if key not in groups:
+                groups[key] = (chat, entity, [])
+            if ids is not None:
+                if not utils.is_list_like(ids):
+                    ids = (ids,)
+                groups[key][2].extend(utils.get_message_id(m) for m in ids)
+
+        jobs = []
+        for chat, entity, ids in groups.values():
+            if action == 'read':
+                # Reading is done up to an ID, so one request is enough
+                jobs.append((chat, entity, ids))
+            else:
+                jobs.extend((chat, entity, list(c)) for c in utils.chunks(ids))
+
+        self._remaining += len(jobs)
+        if not self._remaining:
+            raise StopAsyncIteration
+
+        self._workers = [
+            helpers.get_running_loop().create_task(self._run(*job)) for job in jobs
+        ]
+
+    async def _load_next_chunk(self):
+        self.buffer.append(await self._queue.get())
+        self._remaining -= 1
+        return not self._remaining
+
+    async def _run(self, chat, entity, ids):
+        try:
+            result = await self._request(entity, ids)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = e
+
+        self._queue.put_nowait((chat, ids, result))
+
+    async def _request(self, entity, ids):
+        if self._action == 'delete':
+            if helpers._entity_type(entity) == helpers._EntityType.CHANNEL:
+                request = functions.channels.DeleteMessagesRequest(entity, ids)
+            else:
+                request = functions.messages.DeleteMessagesRequest(ids, self._revoke)
+        elif self._action == 'forward':
+            request = functions.messages.ForwardMessagesRequest(
+                from_peer=entity, id=ids, to_peer=self._to)
+        elif helpers._entity_type(entity) == helpers._EntityType.CHANNEL:
+            request = functions.channels.ReadHistoryRequest(
+                utils.get_input_channel(entity), max_id=max(ids, default=0))
+        else:
+            request = functions.messages.ReadHistoryRequest(
+                entity, max_id=max(ids, default=0))
+
+        result = await self._limited_call(request)
+        if self._action == 'forward':
+            return self.client._get_response_message(request, result, self._to)
+        return result
+
+
 class MessageMethods:
 
     # region Public methods
@@ -360,7 +667,9 @@ class MessageMethods:
             ids: 'typing.Union[int, typing.Sequence[int]]' = None,
             reverse: bool = False,
             reply_to: int = None,
-            scheduled: bool = False
+            scheduled: bool = False,
+            prefetch: int = 0,
+            hydrate: bool = True
     ) -> 'typing.Union[_MessagesIter, _IDsIter]':
         """
         Iterator over the messages for the given chat.
@@ -491,6 +800,21 @@ class MessageMethods:
                 If set to `True`, messages which are scheduled will be returned.
                 All other parameter will be ignored for this, except `entity`.
 
+            prefetch (`int`, optional):
+                How many chunks of messages to load in the background while
+                the previous ones are being processed. By default, the
+                next chunk is only loaded once the previous one has been
+                consumed. If you stop iterating early, call ``aclose()``
+                on the iterator to cancel the loading.
+
+            hydrate (`bool`, optional):
+                Whether the users and chats returned along with the messages
+                should be used to find their sender, chat, forward, etc.
+                (only done once any of these is first accessed). Disabling
+                it is cheaper when only the members of the messages (such
+                as ``id``, ``message`` or ``date``) are needed, and then
+                those will only be found if they are in the client's cache.
+
         Yields
             Instances of `Message <telethon.tl.custom.message.Message>`.
 
@@ -530,15 +854,18 @@ class MessageMethods:
                 client=self,
                 reverse=reverse,
                 wait_time=wait_time,
+                prefetch=prefetch,
                 limit=len(ids),
                 entity=entity,
-                ids=ids
+                ids=ids,
+                hydrate=hydrate
             )
 
         return _MessagesIter(
             client=self,
             reverse=reverse,
             wait_time=wait_time,
+            prefetch=prefetch,
             limit=limit,
             entity=entity,
             offset_id=offset_id,
@@ -550,7 +877,8 @@ class MessageMethods:
             filter=filter,
             search=search,
             reply_to=reply_to,
-            scheduled=scheduled
+            scheduled=scheduled,
+            hydrate=hydrate
         )
 
     async def get_messages(
@@ -606,6 +934,192 @@ class MessageMethods:
 
     get_messages.__signature__ = inspect.signature(iter_messages)
 
+    def iter_messages_parallel(
+            self: 'TelegramClient',
+            entity: 'hints.EntityLike',
+            limit: float = None,
+            *,
+            min_id: int = 0,
+            max_id: int = 0,
+            partitions: int = None,
+            concurrency: int = 4,
+            rate_limit: float = None,
+            ordered: bool = True,
+            checkpoint: 'typing.Union[str, os.PathLike]' = None,
+            hydrate: bool = True
+    ) -> _HistoryRangesIter:
+        """
+        Iterator over the history of a chat, scanning several ranges
+        of message IDs at the same time.
+
+        This is meant to export large chats faster than `iter_messages`,
+        which has to wait for each chunk of messages before requesting the
+        next one. Only the entire history (or the range given by `min_id`
+        and `max_id`) can be scanned, without any filters.
+
+        Arguments
+            entity (`entity`):
+                The entity from whom to retrieve the message history.
+
+            limit (`int` | `None`, optional):
+                Number of messages to be retrieved. By default, all.
+
+            min_id (`int`, optional):
+                If set, only messages with an ID greater than this
+                will be returned (exclusive).
+
+            max_id (`int`, optional):
+                If set, only messages with an ID lower than this
+                will be returned (exclusive). By default, it's
+                after the last message in the chat.
+
+            partitions (`int`, optional):
+                How many ranges of IDs to split the history into.
+                By default, four times the `concurrency`.
+
+            concurrency (`int`, optional):
+                How many requests may be in flight at the same time.
+
+            rate_limit (`float`, optional):
+                The maximum amount of requests to make per second, shared
+                by all ranges. By default there is no limit, and flood waits
+                are handled as usual (see ``flood_sleep_threshold``).
+
+            ordered (`bool`, optional):
+                Whether the messages should be returned in the same order as
+                `iter_messages` (from newest to oldest). If `False`, messages
+                are returned as soon as they are fetched, so the order will
+                only be descending within each range. Keeping the order means
+                ranges can only be fetched so far ahead of the one being
+                returned, which makes it slower.
+
+            checkpoint (`str` | `os.PathLike`, optional):
+                The path to a JSON file where the progress is saved after
+                every chunk of messages is consumed. If the file exists, the
+                scan resumes from it. The last chunk consumed before stopping
+                may be returned again when resuming. Delete the file to start
+                over.
+
+            hydrate (`bool`, optional):
+                Same as in `iter_messages`. Exports which only need the
+                members of the messages should disable this.
+
+        Yields
+            Instances of `Message <telethon.tl.custom.message.Message>`.
+
+        Example
+            .. code-block:: python
+
+                # Export an entire channel, in any order, resuming if it stopped
+                async for message in client.iter_messages_parallel(
+                        channel, ordered=False, checkpoint='export.json'):
+                    print(message.id, message.text)
+        """
+        return _HistoryRangesIter(
+            self,
+            limit,
+            entity=entity,
+            min_id=min_id,
+            max_id=max_id,
+            partitions=partitions or 4 * concurrency,
+            concurrency=concurrency,
+            rate_limit=rate_limit,
+            ordered=ordered,
+            checkpoint=checkpoint,
+            hydrate=hydrate
+        )
+
+    def iter_bulk(
+            self: 'TelegramClient',
+            action: str,
+            items: 'typing.Iterable[typing.Tuple[hints.EntityLike, typing.Any]]',
+            *,
+            to: 'hints.EntityLike' = None,
+            revoke: bool = True,
+            concurrency: int = 4,
+            rate_limit: float = None
+    ) -> _BulkIter:
+        """
+        Iterator over the results of deleting, forwarding or reading the
+        messages of many chats, with several requests in flight at once.
+
+        This is meant for jobs that would otherwise call `delete_messages`,
+        `forward_messages` or `send_read_acknowledge` once per chat, waiting
+        for each call before making the next one.
+
+        The message IDs given for the same chat are grouped together, split
+        in chunks of 100 (the most a single request can handle), and each
+        chunk is a separate request. A failed request does not stop the
+        others, and its error is returned in place of its result.
+
+        Arguments
+            action (`str`):
+                What to do with the messages. One of:
+
+                * ``'delete'``: delete them, like `delete_messages`.
+                * ``'forward'``: forward them to `to`, like `forward_messages`.
+                * ``'read'``: mark them as read, like `send_read_acknowledge`.
+                  All messages up to the highest ID are marked as read, and
+                  if no IDs are given, the entire chat is.
+
+            items (`iterable`):
+                The ``(chat, ids)`` pairs to act upon. The IDs may be a
+                single ID or message, or a list of them, and can only be
+                `None` when reading. The same chat may appear more than once.
+
+            to (`entity`, optional):
+                The chat where the messages will be forwarded to.
+                Required if the action is ``'forward'``.
+
+            revoke (`bool`, optional):
+                Whether the messages should be deleted for everyone or not.
+                See `delete_messages` for details.
+
+            concurrency (`int`, optional):
+                How many requests may be in flight at the same time.
+
+            rate_limit (`float`, optional):
+                The maximum amount of requests to make per second. By default
+                there is no limit, and flood waits are handled as usual (see
+                ``flood_sleep_threshold``).
+
+        Yields
+            A ``(chat, ids, result)`` tuple for every request made, in the
+            order they complete. The ``chat`` is the one given in `items`,
+            and ``ids`` are the message IDs in that request.
+
+            The ``result`` is what `delete_messages` (a single
+            :tl:`AffectedMessages`) or `forward_messages` (the list of
+            forwarded messages) would return. For ``'read'``, it's the
+            result of :tl:`ReadHistoryRequest` (:tl:`AffectedMessages`,
+            or a `bool` for channels). It's the exception raised
+            instead if the request failed.
+
+        Example
+            .. code-block:: python
+
+                # Clean up several chats at once
+                items = [(chat, ids) for chat, ids in to_delete.items()]
+                async for chat, ids, result in client.iter_bulk('delete', items):
+                    if isinstance(result, Exception):
+                        print('Could not delete', ids, 'in', chat, result)
+        """
+        if action not in ('delete', 'forward', 'read'):
+            raise ValueError('Unknown bulk action {!r}'.format(action))
+        if action == 'forward' and to is None:
+            raise ValueError('The chat to forward to must be given')
+
+        return _BulkIter(
+            self,
+            None,
+            action=action,
+            items=items,
+            to=to,
+            revoke=revoke,
+            concurrency=concurrency,
+            rate_limit=rate_limit
+        )
+
     # endregion
 
     # region Message sending/editing/deleting
@@ -2,6 +2,9 @@ import abc
 import re
 import asyncio
 import collections
+import concurrent.futures
+import copy
+import functools
 import logging
 import platform
 import time
@@ -9,14 +12,15 @@ import typing
 import datetime
 import pathlib
 
-from .. import version, helpers, __name__ as __base_name__
+from .. import version, helpers, errors, __name__ as __base_name__
 from ..crypto import rsa
 from ..extensions import markdown
-from ..network import MTProtoSender, Connection, ConnectionTcpFull, TcpMTProxy
+from ..network import MTProtoSender, Connection, ConnectionTcpFull, TcpMTProxy, GzipPolicy, SenderPool
 from ..sessions import Session, SQLiteSession, MemorySession
 from ..tl import functions, types
 from ..tl.alltlobjects import LAYER
 from .._updates import MessageBox, EntityCache as MbEntityCache, SessionState, ChannelState, Entity, EntityType
+from .users import _EntityLoader
 
 DEFAULT_DC_ID = 2
 DEFAULT_IPV4_IP = '149.154.167.51'
@@ -32,36 +36,13 @@ _base_log = logging.getLogger(__base_name__)
 # In seconds, how long to wait before disconnecting a exported sender.
 _DISCONNECT_EXPORTED_AFTER = 60
 
+# How many future salts to fetch, and for how many seconds the known
+# ones should still be valid not to fetch them again when connecting.
+_FUTURE_SALTS = 64
+_FUTURE_SALTS_MIN_LEFT = 24 * 60 * 60
 
-class _ExportState:
-    def __init__(self):
-        # ``n`` is the amount of borrows a given sender has;
-        # once ``n`` reaches ``0``, disconnect the sender after a while.
-        self._n = 0
-        self._zero_ts = 0
-        self._connected = False
-
-    def add_borrow(self):
-        self._n += 1
-        self._connected = True
-
-    def add_return(self):
-        self._n -= 1
-        assert self._n >= 0, 'returned sender more than it was borrowed'
-        if self._n == 0:
-            self._zero_ts = time.time()
-
-    def should_disconnect(self):
-        return (self._n == 0
-                and self._connected
-                and (time.time() - self._zero_ts) > _DISCONNECT_EXPORTED_AFTER)
-
-    def need_connect(self):
-        return not self._connected
-
-    def mark_disconnected(self):
-        assert self.should_disconnect(), 'marked as disconnected when it was borrowed'
-        self._connected = False
+# In seconds, how long to save the CDN config for (it has no expiration).
+_CDN_CONFIG_TTL = 24 * 60 * 60
 
 
 # TODO How hard would it be to support both `trio` and `asyncio`?
@@ -223,6 +204,62 @@ class TelegramBaseClient(abc.ABC):
             Setting this limit too low will cause the library to attempt to
             flush entities to the session file even if no entities can be
             removed from the in-memory cache, which will degrade performance.
+
+        gzip_policy (`telethon.network.gzippolicy.GzipPolicy`, optional):
+            The policy deciding which outgoing requests are worth gzipping,
+            shared by all the senders of this client. Keep a reference to
+            it to read its counters on bytes saved and CPU time spent.
+
+            By default, file parts being uploaded are never compressed,
+            and other requests only if a sample of them compresses well.
+
+        media_executor (`concurrent.futures.Executor`, optional):
+            The executor used to process media before sending it, which
+            includes resizing photos and reading the metadata of audio
+            and video files, so that the event loop isn't blocked.
+
+            A `concurrent.futures.ProcessPoolExecutor` can be used to avoid
+            holding the GIL, although streams can't be sent to other
+            processes, so those will be processed in the event loop's default
+            executor instead. By default, the event loop's default executor
+            (a thread pool) is used for everything.
+
+        username_cache_ttl (`float`, optional):
+            How many seconds a resolved username can be reused for before
+            `get_entity` resolves it again. The usernames are saved in the
+            session, so they are also reused after restarting the client.
+
+            Cached usernames are forgotten when their owner changes it, or
+            when resolving them fails. By default, every `get_entity` call
+            with a username will resolve it (which is flood-limited).
+
+        crypto_executor (`concurrent.futures.Executor`, optional):
+            The executor used for the CPU-bound steps of logging in with a
+            password (2FA) and of creating authorization keys (factorizing
+            and the Diffie-Hellman exponentiations), so that logging in many
+            accounts at the same time doesn't block the event loop.
+
+            Hashing the password releases the GIL but the rest doesn't, so a
+            `concurrent.futures.ProcessPoolExecutor` can be used to run them
+            in parallel. By default, the event loop's default executor (a
+            thread pool) is used.
+
+        warm_up_dcs (`list`, optional):
+            The IDs of the data centers (other than the one the account
+            is in) to connect to in the background right after connecting,
+            such as those where most of the files you download live in.
+            This way, the first download from them doesn't need to wait
+            for the authorization key to be created and imported.
+
+            The authorization keys are saved in the session, so they only
+            need to be created once, even if this option is not used.
+
+        exported_senders_per_dc (`int`, optional):
+            How many connections to make at most to each of the other
+            data centers, so that several files from the same one can be
+            downloaded in parallel. Connections are only made when all of
+            the existing ones are busy, and are closed after a minute of
+            not being used. See `exported_pools` for their statistics.
     """
 
     # Current TelegramClient version
@@ -261,7 +298,13 @@ class TelegramBaseClient(abc.ABC):
             base_logger: typing.Union[str, logging.Logger] = None,
             receive_updates: bool = True,
             catch_up: bool = False,
-            entity_cache_limit: int = 5000
+            entity_cache_limit: int = 5000,
+            gzip_policy: GzipPolicy = None,
+            media_executor: concurrent.futures.Executor = None,
+            username_cache_ttl: float = None,
+            crypto_executor: concurrent.futures.Executor = None,
+            warm_up_dcs: typing.Sequence[int] = (),
+            exported_senders_per_dc: int = 1
     ):
         if not api_id or not api_hash:
             raise ValueError(
@@ -398,15 +441,17 @@ class TelegramBaseClient(abc.ABC):
         # Remember flood-waited requests to avoid making them again
         self._flood_waited_requests = {}
 
-        # Cache ``{dc_id: (_ExportState, MTProtoSender)}`` for all borrowed senders
-        self._borrowed_senders = {}
-        self._borrow_sender_lock = asyncio.Lock()
+        # Cache ``{dc_id: SenderPool}`` for all borrowed senders
+        self._exported_pools = {}
+        self._exported_senders_per_dc = exported_senders_per_dc
         self._exported_sessions = {}
 
         self._loop = None  # only used as a sanity check
         self._updates_error = None
         self._updates_handle = None
         self._keepalive_handle = None
+        self._warm_up_handle = None
+        self._salts_handle = None
         self._last_request = time.time()
         self._no_updates = not receive_updates
 
@@ -443,12 +488,20 @@ class TelegramBaseClient(abc.ABC):
         # A place to store if channels are a megagroup or not (see `edit_admin`)
         self._megagroup_cache = {}
 
+        # Coalesces and batches the entities fetched by `get_entity` and co.
+        self._entity_loader = _EntityLoader(self)
+        self._username_cache_ttl = username_cache_ttl
+
         # This is backported from v2 in a very ad-hoc way just to get proper update handling
         self._catch_up = catch_up
         self._updates_queue = asyncio.Queue()
         self._message_box = MessageBox(self._log['messagebox'])
         self._mb_entity_cache = MbEntityCache()  # required for proper update handling (to know when to getDifference)
         self._entity_cache_limit = entity_cache_limit
+        self._gzip_policy = gzip_policy or GzipPolicy()
+        self._media_executor = media_executor
+        self._crypto_executor = crypto_executor
+        self._warm_up_dcs = warm_up_dcs
 
         self._sender = MTProtoSender(
             self.session.auth_key,
@@ -458,6 +511,8 @@ class TelegramBaseClient(abc.ABC):
             auto_reconnect=self._auto_reconnect,
             connect_timeout=self._timeout,
             auth_key_callback=self._auth_key_callback,
+            gzip_policy=self._gzip_policy,
+            crypto_executor=self._crypto_executor,
             updates_queue=self._updates_queue,
             auto_reconnect_callback=self._handle_auto_reconnect
         )
@@ -502,6 +557,21 @@ class TelegramBaseClient(abc.ABC):
         """
         return self._sender.disconnected
 
+    @property
+    def exported_pools(self: 'TelegramClient') -> 'typing.Dict[int, SenderPool]':
+        """
+        Property with the `telethon.network.senderpool.SenderPool` of
+        connections to each of the other data centers that has been used,
+        with counters on how often they were used, created and evicted.
+
+        Example
+            .. code-block:: python
+
+                for dc_id, pool in client.exported_pools.items():
+                    print(dc_id, pool.connected, pool.in_use, pool.borrows)
+        """
+        return dict(self._exported_pools)
+
     @property
     def flood_sleep_threshold(self):
         return self._flood_sleep_threshold
@@ -523,7 +593,10 @@ class TelegramBaseClient(abc.ABC):
 
             Connect means connect and nothing else, and only one low-level
             request is made to notify Telegram about which layer we will be
-            using.
+            using. The server configuration, time offset and salts are
+            saved in the session, so that connecting again after restarting
+            doesn't need to fetch the configuration or resend the first
+            request with the right salt.
 
             Before Telegram sends you updates, you need to make a high-level
             request, like `client.get_me() <telethon.client.users.UserMethods.get_me>`,
@@ -545,6 +618,12 @@ class TelegramBaseClient(abc.ABC):
         elif self._loop != helpers.get_running_loop():
             raise RuntimeError('The asyncio event loop must not change after connection (see the FAQ for details)')
 
+        if not self._sender.is_connected() and self._sender.auth_key:
+            # Known salts let the first request go through without being resent
+            state = self.session.get_server_state(self.session.dc_id)
+            if state:
+                self._sender.set_server_state(*state)
+
         if not await self._sender.connect(self._connection(
             self.session.server_address,
             self.session.port,
@@ -588,13 +667,27 @@ class TelegramBaseClient(abc.ABC):
                 else:
                     self._mb_entity_cache.put(Entity(EntityType.CHANNEL, entity.channel_id, entity.access_hash))
 
-        self._init_request.query = functions.help.GetConfigRequest()
+        cls = self.__class__
+        if not cls._config or cls._config.expires <= time.time():
+            cls._config = self.session.get_config('config')
+
+        if cls._config:
+            # The connection must still be initialized, but the config is known
+            self._init_request.query = functions.help.GetNearestDcRequest()
+        else:
+            self._init_request.query = functions.help.GetConfigRequest()
 
         req = self._init_request
         if self._no_updates:
             req = functions.InvokeWithoutUpdatesRequest(req)
 
-        await self._sender.send(functions.InvokeWithLayerRequest(LAYER, req))
+        result = await self._sender.send(functions.InvokeWithLayerRequest(LAYER, req))
+        if isinstance(result, types.Config):
+            cls._config = result
+            self.session.set_config('config', result, result.expires)
+
+        self._save_server_state()
+        self.session.save()
 
         if self._message_box.is_empty():
             me = await self.get_me()
@@ -603,6 +696,10 @@ class TelegramBaseClient(abc.ABC):
 
         self._updates_handle = self.loop.create_task(self._update_loop())
         self._keepalive_handle = self.loop.create_task(self._keepalive_loop())
+        if self._warm_up_dcs:
+            self._warm_up_handle = self.loop.create_task(self._warm_up_exported_senders())
+
+        self._salts_handle = self.loop.create_task(self._fetch_future_salts())
 
     def is_connected(self: 'TelegramClient') -> bool:
         """
@@ -709,20 +806,11 @@ class TelegramBaseClient(abc.ABC):
 
         await self._disconnect()
 
-        # Also clean-up all exported senders because we're done with them
-        async with self._borrow_sender_lock:
-            for state, sender in self._borrowed_senders.values():
-                # Note that we're not checking for `state.should_disconnect()`.
-                # If the user wants to disconnect the client, ALL connections
-                # to Telegram (including exported senders) should be closed.
-                #
-                # Disconnect should never raise, so there's no try/except.
-                await sender.disconnect()
-                # Can't use `mark_disconnected` because it may be borrowed.
-                state._connected = False
-
-            # If any was borrowed
-            self._borrowed_senders.clear()
+        # Also clean-up all exported senders because we're done with them.
+        # If the user wants to disconnect the client, ALL connections to
+        # Telegram (including borrowed exported senders) should be closed.
+        for pool in self._exported_pools.values():
+            await pool.close()
 
         # trio's nurseries would handle this for us, but this is asyncio.
         # All tasks spawned in the background should properly be terminated.
@@ -734,6 +822,7 @@ class TelegramBaseClient(abc.ABC):
             self._event_handler_tasks.clear()
 
         self._save_states_and_entities()
+        self._save_server_state()
 
         self.session.close()
 
@@ -747,7 +836,9 @@ class TelegramBaseClient(abc.ABC):
         await self._sender.disconnect()
         await helpers._cancel(self._log[__name__],
                               updates_handle=self._updates_handle,
-                              keepalive_handle=self._keepalive_handle)
+                              keepalive_handle=self._keepalive_handle,
+                              warm_up_handle=self._warm_up_handle,
+                              salts_handle=self._salts_handle)
 
     async def _switch_dc(self: 'TelegramClient', new_dc):
         """
@@ -773,6 +864,33 @@ class TelegramBaseClient(abc.ABC):
         self.session.auth_key = auth_key
         self.session.save()
 
+    def _save_server_state(self: 'TelegramClient'):
+        """
+        Saves the time offset and future salts of the current
+        data center, which are valid for its authorization key.
+        """
+        if self._sender.auth_key:
+            self.session.set_server_state(self.session.dc_id, *self._sender.get_server_state())
+
+    async def _fetch_future_salts(self: 'TelegramClient'):
+        """
+        Fetches (and saves) the salts the server will accept in the next
+        days, unless the known ones last long enough already, so that
+        connecting again can use the right salt from the first request.
+        """
+        time_offset, salts = self._sender.get_server_state()
+        until = time.time() + time_offset + _FUTURE_SALTS_MIN_LEFT
+        if any(salt.valid_until > until for salt in salts):
+            return
+
+        try:
+            await self._sender.send(functions.GetFutureSaltsRequest(_FUTURE_SALTS))
+        except Exception as e:
+            self._log[__name__].warning('Failed to fetch future salts: %s', e)
+        else:
+            self._save_server_state()
+            self.session.save()
+
     # endregion
 
     # region Working with different connections/Data Centers
@@ -782,12 +900,18 @@ class TelegramBaseClient(abc.ABC):
         cls = self.__class__
         if not cls._config:
             cls._config = await self(functions.help.GetConfigRequest())
+            self.session.set_config('config', cls._config, cls._config.expires)
 
         if cdn and not self._cdn_config:
-            cls._cdn_config = await self(functions.help.GetCdnConfigRequest())
+            cls._cdn_config = self.session.get_config('cdn_config')
+            if not cls._cdn_config:
+                cls._cdn_config = await self(functions.help.GetCdnConfigRequest())
+                self.session.set_config('cdn_config', cls._cdn_config,
+                                        int(time.time()) + _CDN_CONFIG_TTL)
+
+            # Every key is added since the config is only fetched once
             for pk in cls._cdn_config.public_keys:
-                if pk.dc_id == dc_id:
-                    rsa.add_key(pk.public_key, old=False)
+                rsa.add_key(pk.public_key, old=False)
 
         try:
             return next(
@@ -812,15 +936,54 @@ class TelegramBaseClient(abc.ABC):
         """
         Creates a new exported `MTProtoSender` for the given `dc_id` and
         returns it. This method should be used by `_borrow_exported_sender`.
+
+        The authorization key imported into the data center is saved in the
+        session, so that future senders (even after restarting) don't need
+        to generate a new one nor import the authorization again.
         """
         # Thanks badoualy/kotlogram on /telegram/api/DefaultTelegramClient.kt
         # for clearly showing how to export the authorization
         dc = await self._get_dc(dc_id)
+        auth_key = self.session.get_exported_auth_key(dc_id)
+        sender = await self._connect_exported_sender(dc, auth_key)
+        sender.dc_id = dc_id
+
+        # Senders to several data centers may be created at the same time,
+        # so each needs its own request to not overwrite the query of others.
+        init_request = copy.copy(self._init_request)
+        if auth_key:
+            # Telegram needs to know the layer and the connection
+            # details for every new connection, so send them anyway.
+            init_request.query = functions.updates.GetStateRequest()
+            try:
+                await sender.send(functions.InvokeWithLayerRequest(LAYER, init_request))
+                self._log[__name__].info('Reused saved auth for new borrowed sender in %s', dc)
+                return sender
+            except errors.AuthKeyNotFound:
+                self._log[__name__].info('Saved auth key for DC %d is gone, generating a new one', dc_id)
+                self.session.set_exported_auth_key(dc_id, None)
+                await sender.disconnect()
+                sender = await self._connect_exported_sender(dc, None)
+                sender.dc_id = dc_id
+            except errors.UnauthorizedError:
+                self._log[__name__].info('Saved auth key for DC %d is no longer authorized', dc_id)
+
+        self._log[__name__].info('Exporting auth for new borrowed sender in %s', dc)
+        auth = await self(functions.auth.ExportAuthorizationRequest(dc_id))
+        init_request.query = functions.auth.ImportAuthorizationRequest(id=auth.id, bytes=auth.bytes)
+        req = functions.InvokeWithLayerRequest(LAYER, init_request)
+        await sender.send(req)
+        self.session.set_exported_auth_key(dc_id, sender.auth_key)
+        self.session.save()
+        return sender
+
+    async def _connect_exported_sender(self: 'TelegramClient', dc, auth_key):
         # Can't reuse self._sender._connection as it has its own seqno.
         #
         # If one were to do that, Telegram would reset the connection
         # with no further clues.
-        sender = MTProtoSender(None, loggers=self._log)
+        sender = MTProtoSender(auth_key, loggers=self._log, gzip_policy=self._gzip_policy,
+                               crypto_executor=self._crypto_executor)
         await sender.connect(self._connection(
             dc.ip_address,
             dc.port,
@@ -829,68 +992,59 @@ class TelegramBaseClient(abc.ABC):
             proxy=self._proxy,
             local_addr=self._local_addr
         ))
-        self._log[__name__].info('Exporting auth for new borrowed sender in %s', dc)
-        auth = await self(functions.auth.ExportAuthorizationRequest(dc_id))
-        self._init_request.query = functions.auth.ImportAuthorizationRequest(id=auth.id, bytes=auth.bytes)
-        req = functions.InvokeWithLayerRequest(LAYER, self._init_request)
-        await sender.send(req)
         return sender
 
     async def _borrow_exported_sender(self: 'TelegramClient', dc_id):
         """
-        Borrows a connected `MTProtoSender` for the given `dc_id`.
-        If it's not cached, creates a new one if it doesn't exist yet,
-        and imports a freshly exported authorization key for it to be usable.
+        Borrows a connected `MTProtoSender` for the given `dc_id` from its
+        pool, which creates a new one if all of them are busy, and imports
+        the authorization into it to be usable.
 
         Once its job is over it should be `_return_exported_sender`.
         """
-        async with self._borrow_sender_lock:
-            self._log[__name__].debug('Borrowing sender for dc_id %d', dc_id)
-            state, sender = self._borrowed_senders.get(dc_id, (None, None))
+        pool = self._exported_pools.get(dc_id)
+        if pool is None:
+            pool = self._exported_pools[dc_id] = SenderPool(
+                dc_id,
+                functools.partial(self._create_exported_sender, dc_id),
+                loggers=self._log,
+                size=self._exported_senders_per_dc,
+                idle_timeout=_DISCONNECT_EXPORTED_AFTER
+            )
 
-            if state is None:
-                state = _ExportState()
-                sender = await self._create_exported_sender(dc_id)
-                sender.dc_id = dc_id
-                self._borrowed_senders[dc_id] = (state, sender)
-
-            elif state.need_connect():
-                dc = await self._get_dc(dc_id)
-                await sender.connect(self._connection(
-                    dc.ip_address,
-                    dc.port,
-                    dc.id,
-                    loggers=self._log,
-                    proxy=self._proxy,
-                    local_addr=self._local_addr
-                ))
-
-            state.add_borrow()
-            return sender
+        self._log[__name__].debug('Borrowing sender for dc_id %d', dc_id)
+        return await pool.borrow()
 
     async def _return_exported_sender(self: 'TelegramClient', sender):
         """
-        Returns a borrowed exported sender. If all borrows have
-        been returned, the sender is cleanly disconnected.
+        Returns a borrowed exported sender. If it's not borrowed
+        again for a while, the sender is cleanly disconnected.
         """
-        async with self._borrow_sender_lock:
-            self._log[__name__].debug('Returning borrowed sender for dc_id %d', sender.dc_id)
-            state, _ = self._borrowed_senders[sender.dc_id]
-            state.add_return()
+        self._log[__name__].debug('Returning borrowed sender for dc_id %d', sender.dc_id)
+        await self._exported_pools[sender.dc_id].release(sender)
 
     async def _clean_exported_senders(self: 'TelegramClient'):
         """
         Cleans-up all unused exported senders by disconnecting them.
+        The pools already do this on their own, so this is a fallback.
         """
-        async with self._borrow_sender_lock:
-            for dc_id, (state, sender) in self._borrowed_senders.items():
-                if state.should_disconnect():
-                    self._log[__name__].info(
-                        'Disconnecting borrowed sender for DC %d', dc_id)
+        for pool in list(self._exported_pools.values()):
+            await pool.evict_idle()
 
-                    # Disconnect should never raise
-                    await sender.disconnect()
-                    state.mark_disconnected()
+    async def _warm_up_exported_senders(self: 'TelegramClient'):
+        """
+        Borrows (and returns) an exported sender for every data center in
+        `warm_up_dcs`, so that they're ready to use when they're needed.
+        """
+        for dc_id in self._warm_up_dcs:
+            if dc_id == self.session.dc_id:
+                continue
+            try:
+                sender = await self._borrow_exported_sender(dc_id)
+            except Exception as e:
+                self._log[__name__].warning('Failed to warm up sender for DC %d: %s', dc_id, e)
+            else:
+                await self._return_exported_sender(sender)
 
     async def _get_cdn_client(self: 'TelegramClient', cdn_redirect):
         """Similar to ._borrow_exported_client, but for CDNs"""
@@ -906,7 +1060,9 @@ class TelegramBaseClient(abc.ABC):
             session, self.api_id, self.api_hash,
             proxy=self._proxy,
             timeout=self._timeout,
-            loop=self.loop
+            loop=self.loop,
+            gzip_policy=self._gzip_policy,
+            crypto_executor=self._crypto_executor
         )
 
         session.auth_key = self._sender.auth_key
@@ -476,6 +476,9 @@ class UpdateMethods:
                     for x in itertools.chain(users, chats)}
         for u in updates:
             u._entities = entities
+            if isinstance(u, types.UpdateUserName):
+                # The saved username would now resolve to someone else
+                self.session.forget_username(utils.get_peer_id(types.PeerUser(u.user_id)))
         return updates
 
     async def _keepalive_loop(self: 'TelegramClient'):
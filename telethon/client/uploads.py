@@ -1,4 +1,8 @@
+import asyncio
+import concurrent.futures
+import functools
 import hashlib
+import inspect
 import io
 import itertools
 import os
@@ -9,7 +13,7 @@ from io import BytesIO
 
 from ..crypto import AES
 
-from .. import utils, helpers, hints
+from .. import utils, helpers, hints, errors
 from ..tl import types, functions, custom
 
 try:
@@ -21,6 +25,9 @@ except ImportError:
 if typing.TYPE_CHECKING:
     from .telegramclient import TelegramClient
 
+# How many files of an album may be uploaded at the same time
+_MAX_ALBUM_CONCURRENCY = 4
+
 
 class _CacheType:
     """Like functools.partial but pretends to be the wrapped class."""
@@ -28,12 +35,60 @@ class _CacheType:
         self._cls = cls
 
     def __call__(self, *args, **kwargs):
-        return self._cls(*args, file_reference=b'', **kwargs)
+        kwargs.setdefault('file_reference', b'')
+        return self._cls(*args, **kwargs)
 
     def __eq__(self, other):
         return self._cls == other
 
 
+def _hash_stream(stream, chunk_size):
+    """
+    Returns the MD5 of the rest of the stream, reading it in chunks,
+    and rewinds it. Returns `None` if the stream cannot be rewound.
+
+    This blocks while reading, so it's meant to be run in an executor.
+    """
+    try:
+        if not stream.seekable():
+            return None
+        pos = stream.tell()
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+
+    hash_md5 = hashlib.md5()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        hash_md5.update(chunk)
+
+    stream.seek(pos)
+    return hash_md5
+
+
+async def _hash_async_stream(stream, chunk_size):
+    """
+    Like `_hash_stream`, but for streams with asynchronous methods.
+    """
+    try:
+        if not await helpers._maybe_await(stream.seekable()):
+            return None
+        pos = await helpers._maybe_await(stream.tell())
+    except (AttributeError, io.UnsupportedOperation):
+        return None
+
+    hash_md5 = hashlib.md5()
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        hash_md5.update(chunk)
+
+    await helpers._maybe_await(stream.seek(pos))
+    return hash_md5
+
+
 def _resize_photo_if_needed(
         file, is_image, width=2560, height=2560, background=(255, 255, 255)):
 
@@ -99,6 +154,15 @@ def _resize_photo_if_needed(
             file.seek(old_pos)
 
 
+def _resize_photo(file, is_image):
+    """
+    Like `_resize_photo_if_needed`, but returns `None` if the file did not
+    need to be resized, so that it's not sent back from another process.
+    """
+    result = _resize_photo_if_needed(file, is_image)
+    return None if result is file else result
+
+
 class UploadMethods:
 
     # region Public methods
@@ -235,9 +299,12 @@ class UploadMethods:
 
 
             allow_cache (`bool`, optional):
-                This parameter currently does nothing, but is kept for
-                backward-compatibility (and it may get its use back in
-                the future).
+                Whether to allow reusing a previously sent photo or document
+                with the same contents (as stored in the session) instead of
+                uploading the file again. Defaults to `True`.
+
+                Must be `False` if you wish to use different attributes or
+                thumb than those that were used when the file was cached.
 
             parse_mode (`object`, optional):
                 See the `TelegramClient.parse_mode
@@ -364,8 +431,6 @@ class UploadMethods:
                     vcard=''
                 ))
         """
-        # TODO Properly implement allow_cache to reuse the sha256 of the file
-        # i.e. `None` was used
         if not file:
             raise TypeError('Cannot use {!r} as file'.format(file))
 
@@ -450,7 +515,28 @@ class UploadMethods:
             schedule_date=schedule, clear_draft=clear_draft,
             background=background
         )
-        return self._get_response_message(request, await self(request), entity)
+        try:
+            result = await self(request)
+        except (errors.FileReferenceExpiredError, errors.MediaEmptyError):
+            if not isinstance(file_handle, (types.InputPhoto, types.InputDocument)):
+                raise
+
+            # The cached file can't be used anymore, so upload it again
+            self.session.forget_file(file_handle)
+            file_handle, request.media, image = await self._file_to_media(
+                file, force_document=force_document,
+                file_size=file_size,
+                progress_callback=progress_callback,
+                attributes=attributes, allow_cache=allow_cache, thumb=thumb,
+                voice_note=voice_note, video_note=video_note,
+                supports_streaming=supports_streaming, ttl=ttl,
+                nosound_video=nosound_video,
+            )
+            result = await self(request)
+
+        msg = self._get_response_message(request, result, entity)
+        self._cache_media(file_handle, msg, image)
+        return msg
 
     async def _send_album(self: 'TelegramClient', entity, files, caption='',
                           formatting_entities=None,
@@ -487,36 +573,42 @@ class UploadMethods:
 
         reply_to = utils.get_message_id(reply_to)
 
-        used_callback = None if not progress_callback else (
-            # use an integer when sent matches total, to easily determine a file has been fully sent
-            lambda s, t: progress_callback(sent_count + 1 if s == t else sent_count + s / t, len(files))
-        )
+        # Files are uploaded concurrently, so the progress of each is kept
+        # separately and the callback is given the sum of all of them.
+        progress = [0] * len(files)
+
+        def make_callback(i):
+            def callback(s, t):
+                # use an integer when sent matches total, to easily determine a file has been fully sent
+                progress[i] = 1 if s == t else s / t
+                return progress_callback(sum(progress), len(files))
+
+            return callback if progress_callback else None
 
         # Need to upload the media first, but only if they're not cached yet
-        media = []
-        for sent_count, file in enumerate(files):
-            # Albums want :tl:`InputMedia` which, in theory, includes
-            # :tl:`InputMediaUploadedPhoto`. However, using that will
-            # make it `raise MediaInvalidError`, so we need to upload
-            # it as media and then convert that to :tl:`InputMediaPhoto`.
-            fh, fm, _ = await self._file_to_media(
-                file, supports_streaming=supports_streaming,
-                force_document=force_document, ttl=ttl,
-                progress_callback=used_callback, nosound_video=True)
-            if isinstance(fm, (types.InputMediaUploadedPhoto, types.InputMediaPhotoExternal)):
-                r = await self(functions.messages.UploadMediaRequest(
-                    entity, media=fm
-                ))
+        semaphore = asyncio.Semaphore(_MAX_ALBUM_CONCURRENCY)
 
-                fm = utils.get_input_media(r.photo)
-            elif isinstance(fm, types.InputMediaUploadedDocument):
-                r = await self(functions.messages.UploadMediaRequest(
-                    entity, media=fm
-                ))
+        async def prepare(i):
+            async with semaphore:
+                return await self._file_to_album_media(
+                    entity, files[i], supports_streaming=supports_streaming,
+                    force_document=force_document, ttl=ttl,
+                    progress_callback=make_callback(i))
 
-                fm = utils.get_input_media(
-                    r.document, supports_streaming=supports_streaming)
+        tasks = [asyncio.ensure_future(prepare(i)) for i in range(len(files))]
+        try:
+            prepared = await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave the rest uploading (or their files open) in the background
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
 
+        media = []
+        handles = []
+        for fh, fm in prepared:
+            handles.append(fh)
             if captions:
                 caption, msg_entities = captions.pop()
             else:
@@ -534,11 +626,59 @@ class UploadMethods:
             silent=silent, schedule_date=schedule, clear_draft=clear_draft,
             background=background
         )
-        result = await self(request)
+        try:
+            result = await self(request)
+        except (errors.FileReferenceExpiredError, errors.MediaEmptyError):
+            cached = [i for i, fh in enumerate(handles)
+                      if isinstance(fh, (types.InputPhoto, types.InputDocument))]
+            if not cached:
+                raise
+
+            # Some cached file can't be used anymore, so upload those again
+            for i in cached:
+                self.session.forget_file(handles[i])
+                _, media[i].media = await self._file_to_album_media(
+                    entity, files[i], supports_streaming=supports_streaming,
+                    force_document=force_document, ttl=ttl)
+
+            result = await self(request)
 
         random_ids = [m.random_id for m in media]
         return self._get_response_message(random_ids, result, entity)
 
+    async def _file_to_album_media(
+            self: 'TelegramClient', entity, file, supports_streaming=None,
+            force_document=False, ttl=None, progress_callback=None):
+        """
+        Returns the file handle and the :tl:`InputMedia` to use
+        for the given file as part of an album sent to ``entity``.
+        """
+        # Albums want :tl:`InputMedia` which, in theory, includes
+        # :tl:`InputMediaUploadedPhoto`. However, using that will
+        # make it `raise MediaInvalidError`, so we need to upload
+        # it as media and then convert that to :tl:`InputMediaPhoto`.
+        fh, fm, image = await self._file_to_media(
+            file, supports_streaming=supports_streaming,
+            force_document=force_document, ttl=ttl,
+            progress_callback=progress_callback, nosound_video=True)
+        if isinstance(fm, (types.InputMediaUploadedPhoto, types.InputMediaPhotoExternal)):
+            r = await self(functions.messages.UploadMediaRequest(
+                entity, media=fm
+            ))
+
+            self._cache_media(fh, r, image)
+            fm = utils.get_input_media(r.photo)
+        elif isinstance(fm, types.InputMediaUploadedDocument):
+            r = await self(functions.messages.UploadMediaRequest(
+                entity, media=fm
+            ))
+
+            self._cache_media(fh, r, image)
+            fm = utils.get_input_media(
+                r.document, supports_streaming=supports_streaming)
+
+        return fh, fm
+
     async def upload_file(
             self: 'TelegramClient',
             file: 'hints.FileLike',
@@ -589,9 +729,12 @@ class UploadMethods:
                 and if this is not a `str`, it will be ``"unnamed"``.
 
             use_cache (`type`, optional):
-                This parameter currently does nothing, but is kept for
-                backward-compatibility (and it may get its use back in
-                the future).
+                The type of cached media to look for (either :tl:`InputPhoto`
+                or :tl:`InputDocument`). If a file with the same contents
+                was sent before as this type and is still in the session's
+                cache, it will be returned instead of uploading the file.
+                The contents are hashed beforehand, so this only works if
+                the file can be rewound.
 
             key ('bytes', optional):
                 In case of an encrypted upload (secret chats) a key is supplied
@@ -613,7 +756,8 @@ class UploadMethods:
         Returns
             :tl:`InputFileBig` if the file size is larger than 10MB,
             `InputSizedFile <telethon.tl.custom.inputsizedfile.InputSizedFile>`
-            (subclass of :tl:`InputFile`) otherwise.
+            (subclass of :tl:`InputFile`) otherwise. If ``use_cache`` was
+            given and the file was found in the cache, an instance of it.
 
         Example
             .. code-block:: python
@@ -666,6 +810,24 @@ class UploadMethods:
             is_big = file_size > 10 * 1024 * 1024
             hash_md5 = hashlib.md5()
 
+            # The contents need to be known before uploading them to find
+            # out if they were sent before. Encrypted uploads are never sent
+            # as photos or documents, so there's no point in checking those.
+            content_md5 = None
+            if use_cache and not (key and iv):
+                # `_FileStream` wraps the stream, so check what it wraps
+                if inspect.iscoroutinefunction(stream._stream.read):
+                    content_md5 = await _hash_async_stream(stream, part_size)
+                else:
+                    # Hashing (possibly gigabytes) must not block the event loop
+                    content_md5 = await self._run_media_job(_hash_stream, stream, part_size)
+                if content_md5:
+                    cached = self.session.get_file(
+                        content_md5.digest(), file_size, cls=_CacheType(use_cache))
+                    if cached:
+                        self._log[__name__].info('File of %d bytes found in cache', file_size)
+                        return cached
+
             part_count = (file_size + part_size - 1) // part_size
             self._log[__name__].info('Uploading file of %d bytes in %d chunks of %d',
                                      file_size, part_count, part_size)
@@ -719,6 +881,10 @@ class UploadMethods:
                         'Failed to upload file part {}.'.format(part_index))
 
         if is_big:
+            if content_md5:
+                return custom.InputSizedFileBig(
+                    file_id, part_count, file_name, md5=content_md5, size=file_size
+                )
             return types.InputFileBig(file_id, part_count, file_name)
         else:
             return custom.InputSizedFile(
@@ -774,9 +940,15 @@ class UploadMethods:
         if isinstance(file, (types.InputFile, types.InputFileBig)):
             file_handle = file
         elif not isinstance(file, str) or os.path.isfile(file):
+            to_upload = file
+            if as_image and PIL is not None:
+                to_upload = await self._run_media_job(_resize_photo, file, as_image) or file
+
             file_handle = await self.upload_file(
-                _resize_photo_if_needed(file, as_image),
+                to_upload,
                 file_size=file_size,
+                use_cache=(types.InputPhoto if as_image else types.InputDocument)
+                if allow_cache else None,
                 progress_callback=progress_callback
             )
         elif re.match('https?://', file):
@@ -796,10 +968,15 @@ class UploadMethods:
                 'Failed to convert {} to media. Not an existing file, '
                 'an HTTP URL or a valid bot-API-like file ID'.format(file)
             )
+        elif isinstance(file_handle, types.InputPhoto):
+            media = types.InputMediaPhoto(file_handle, ttl_seconds=ttl)
+        elif isinstance(file_handle, types.InputDocument):
+            media = types.InputMediaDocument(file_handle, ttl_seconds=ttl)
         elif as_image:
             media = types.InputMediaUploadedPhoto(file_handle, ttl_seconds=ttl)
         else:
-            attributes, mime_type = utils.get_attributes(
+            attributes, mime_type = await self._run_media_job(
+                utils.get_attributes,
                 file,
                 mime_type=mime_type,
                 attributes=attributes,
@@ -832,4 +1009,36 @@ class UploadMethods:
             )
         return file_handle, media, as_image
 
+    async def _run_media_job(self: 'TelegramClient', func, *args, **kwargs):
+        """
+        Runs ``func(*args, **kwargs)`` in the media executor.
+        """
+        executor = self._media_executor
+        if isinstance(executor, concurrent.futures.ProcessPoolExecutor) and any(
+                hasattr(x, 'read') for x in itertools.chain(args, kwargs.values())):
+            # Streams can't be sent to other processes, but threads can use them
+            executor = None
+
+        return await helpers.get_running_loop().run_in_executor(
+            executor, functools.partial(func, *args, **kwargs))
+
+    def _cache_media(self: 'TelegramClient', file_handle, media, image):
+        """
+        Caches the photo or document (from a message or message media)
+        that was sent by uploading ``file_handle``, if it can be cached.
+        """
+        if not isinstance(file_handle, (custom.InputSizedFile, custom.InputSizedFileBig)):
+            return
+
+        try:
+            if image:
+                to_cache = utils.get_input_photo(media)
+            else:
+                to_cache = utils.get_input_document(media)
+        except TypeError:
+            return
+
+        if isinstance(to_cache, (types.InputPhoto, types.InputDocument)):
+            self.session.cache_file(file_handle.md5, file_handle.size, to_cache)
+
     # endregion
@@ -25,6 +25,207 @@ def _fmt_flood(delay, request, *, early=False, td=datetime.timedelta):
     )
 
 
+# In seconds, how long to wait for more lookups before sending a batch.
+_BATCH_WINDOW = 0.005
+
+# In seconds, how long a username that resolved to nobody is remembered.
+_UNOCCUPIED_USERNAME_TTL = 60
+
+# How many peers to fetch in a single users.getUsers,
+# messages.getChats or channels.getChannels at most.
+_BATCH_LIMITS = {
+    helpers._EntityType.USER: 200,
+    helpers._EntityType.CHAT: 100,
+    helpers._EntityType.CHANNEL: 100,
+}
+
+# How many of those requests may be in-flight at once, so
+# that looking up thousands of peers doesn't flood wait.
+_MAX_CONCURRENT_FETCHES = 4
+
+
+class _EntityLoader:
+    """
+    Resolves entities on behalf of the client, so that many concurrent
+    lookups (e.g. from event handlers) don't each make their own request.
+
+    Identical lookups made while another is in-flight share its result,
+    and the users, chats or channels requested within `_BATCH_WINDOW` are
+    fetched together (in as many requests as needed, at most
+    `_MAX_CONCURRENT_FETCHES` at once). Lookups made while nothing else
+    is in-flight don't wait for the window. Usernames that can't be
+    resolved are remembered for a while.
+    """
+    def __init__(self, client):
+        self._client = client
+        self._in_flight = {}
+        self._pending = {ty: {} for ty in _BATCH_LIMITS}
+        self._flush_handle = None
+        self._unoccupied = {}
+        self._semaphore = None
+
+    async def single_flight(self, key, func):
+        """
+        Awaits ``func()``, unless a call with the same `key` is already
+        in-flight, in which case its result is awaited instead.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = helpers.get_running_loop().create_task(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+
+        # Shield so that a cancelled caller doesn't cancel the others
+        return await asyncio.shield(task)
+
+    def _done(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            future.exception()  # retrieve it, the callers may be gone
+
+    async def resolve_username(self, username):
+        """
+        Invokes :tl:`ResolveUsernameRequest`, raising `ValueError` early
+        if the username was recently found not to be occupied.
+        """
+        username = username.lower()
+        expiry = self._unoccupied.get(username)
+        if expiry is not None:
+            if expiry > time.time():
+                raise ValueError('No user has "{}" as username'.format(username))
+            del self._unoccupied[username]
+
+        try:
+            return await self.single_flight(
+                ('username', username),
+                lambda: self._client(functions.contacts.ResolveUsernameRequest(username))
+            )
+        except errors.UsernameNotOccupiedError as e:
+            self._client.session.forget_username(username)
+            now = time.time()
+            # They all live as long, so the first ones are the first to expire
+            while self._unoccupied and next(iter(self._unoccupied.values())) <= now:
+                del self._unoccupied[next(iter(self._unoccupied))]
+
+            self._unoccupied.pop(username, None)
+            self._unoccupied[username] = now + _UNOCCUPIED_USERNAME_TTL
+            raise ValueError('No user has "{}" as username'
+                             .format(username)) from e
+        except errors.UsernameInvalidError:
+            self._client.session.forget_username(username)
+            raise
+
+    async def load(self, ty, input_peers, return_exceptions=False):
+        """
+        Fetches the :tl:`User`, :tl:`Chat` or :tl:`Channel` (per `ty`) for
+        each of the input peers, batching them with any other concurrent
+        lookups. `None` is returned for those that Telegram omitted.
+
+        If fetching any peer fails, its error is raised, unless
+        `return_exceptions` is set, in which case it's returned in its
+        place so that the rest can still be used.
+        """
+        loop = helpers.get_running_loop()
+        pending = self._pending[ty]
+        futures = []
+        for peer in input_peers:
+            key = (ty, self._key(peer))
+            future = self._in_flight.get(key)
+            if future is not None:
+                futures.append(future)
+                continue
+
+            future = loop.create_future()
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f, key=key: self._done(key, f))
+            pending[key] = (peer, future)
+            futures.append(future)
+            if len(pending) >= _BATCH_LIMITS[ty]:
+                self._flush()
+
+        if self._flush_handle is None and any(self._pending.values()):
+            if len(self._in_flight) == sum(map(len, self._pending.values())):
+                # Nothing else is being fetched, so only the lookups made
+                # at the same time are worth waiting for (not the window)
+                self._flush_handle = loop.call_soon(self._flush)
+            else:
+                self._flush_handle = loop.call_later(_BATCH_WINDOW, self._flush)
+
+        results = await asyncio.shield(asyncio.gather(*futures, return_exceptions=True))
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+        return results
+
+    @staticmethod
+    def _key(peer):
+        if isinstance(peer, (types.InputPeerSelf, types.InputUserSelf)):
+            return None
+        return utils.get_peer_id(peer, add_mark=False), getattr(peer, 'access_hash', None)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        loop = helpers.get_running_loop()
+        for ty, pending in self._pending.items():
+            items = list(pending.values())
+            pending.clear()
+            limit = _BATCH_LIMITS[ty]
+            for i in range(0, len(items), limit):
+                loop.create_task(self._fetch(ty, items[i:i + limit]))
+
+    async def _fetch(self, ty, items):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(_MAX_CONCURRENT_FETCHES)
+
+        try:
+            peers = [peer for peer, _ in items]
+            # Only the request holds the semaphore, as bisecting fetches again
+            async with self._semaphore:
+                if ty == helpers._EntityType.USER:
+                    entities = await self._client(functions.users.GetUsersRequest(peers))
+                elif ty == helpers._EntityType.CHAT:
+                    entities = (await self._client(functions.messages.GetChatsRequest(
+                        [x.chat_id for x in peers]))).chats
+                else:
+                    entities = (await self._client(functions.channels.GetChannelsRequest(peers))).chats
+        except errors.BadRequestError as e:
+            if len(items) == 1:
+                if not items[0][1].done():
+                    items[0][1].set_exception(e)
+            else:
+                # A single invalid peer fails the entire request, so retry
+                # each half separately until the invalid ones are found.
+                half = len(items) // 2
+                await asyncio.gather(self._fetch(ty, items[:half]), self._fetch(ty, items[half:]))
+            return
+        except asyncio.CancelledError:
+            for _, future in items:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_id = {x.id: x for x in entities}
+        for peer, future in items:
+            key = self._key(peer)
+            if key is None:
+                entity = next((x for x in entities
+                               if isinstance(x, types.User) and x.is_self), None)
+            else:
+                entity = by_id.get(key[0])
+            if not future.done():
+                future.set_result(entity)
+
+
 class UserMethods:
     async def __call__(self: 'TelegramClient', request, ordered=False, flood_sleep_threshold=None):
         return await self._call(self._sender, request, ordered=ordered)
@@ -227,14 +428,22 @@ class UserMethods:
         """
         Turns the given entity into a valid Telegram :tl:`User`, :tl:`Chat`
         or :tl:`Channel`. You can also pass a list or iterable of entities,
-        and they will be efficiently fetched from the network.
+        and they will be efficiently fetched from the network (along with
+        any other entities being fetched concurrently).
+
+        When a list is given, the entities that could not be found or
+        fetched (for example, because an ID is not in the cache, one of the
+        peers is invalid or a username is not occupied) are `None` instead,
+        so that the rest are still returned.
 
         Arguments
             entity (`str` | `int` | :tl:`Peer` | :tl:`InputPeer`):
                 If a username is given, **the username will be resolved** making
                 an API call every time. Resolving usernames is an expensive
                 operation and will start hitting flood waits around 50 usernames
-                in a short period of time.
+                in a short period of time. This can be avoided by creating the
+                client with ``username_cache_ttl``, if reusing usernames resolved
+                a while ago is acceptable.
 
                 If you want to get the entity for a *cached* username, you should
                 first `get_input_entity(username) <get_input_entity>` which will
@@ -281,17 +490,23 @@ class UserMethods:
         if single:
             entity = (entity,)
 
+        async def get_input(x):
+            return x if isinstance(x, str) else await self.get_input_entity(x)
+
+        # Input entities are resolved concurrently so that those needing
+        # a request are batched together. For lists, the ones that can't
+        # be found are left as `None` (but unsupported types still raise).
+        inputs = await asyncio.gather(*map(get_input, entity), return_exceptions=not single)
+        for i, x in enumerate(inputs):
+            if isinstance(x, (ValueError, errors.RPCError)):
+                inputs[i] = None
+            elif isinstance(x, BaseException):
+                raise x
+
         # Group input entities by string (resolve username),
         # input users (get users), input chat (get chats) and
         # input channels (get channels) to get the most entities
         # in the less amount of calls possible.
-        inputs = []
-        for x in entity:
-            if isinstance(x, str):
-                inputs.append(x)
-            else:
-                inputs.append(await self.get_input_entity(x))
-
         lists = {
             helpers._EntityType.USER: [],
             helpers._EntityType.CHAT: [],
@@ -303,46 +518,51 @@ class UserMethods:
             except TypeError:
                 pass
 
-        users = lists[helpers._EntityType.USER]
-        chats = lists[helpers._EntityType.CHAT]
-        channels = lists[helpers._EntityType.CHANNEL]
-        if users:
-            # GetUsersRequest has a limit of 200 per call
-            tmp = []
-            while users:
-                curr, users = users[:200], users[200:]
-                tmp.extend(await self(functions.users.GetUsersRequest(curr)))
-            users = tmp
-        if chats:  # TODO Handle chats slice?
-            chats = (await self(
-                functions.messages.GetChatsRequest([x.chat_id for x in chats]))).chats
-        if channels:
-            channels = (await self(
-                functions.channels.GetChannelsRequest(channels))).chats
+        # Fetched in chunks along with concurrent lookups. For lists,
+        # the peers that failed are left out instead of raising.
+        fetched = await asyncio.gather(*(
+            self._entity_loader.load(ty, peers, return_exceptions=not single)
+            for ty, peers in lists.items() if peers))
 
         # Merge users, chats and channels into a single dictionary
         id_entity = {
             # `get_input_entity` might've guessed the type from a non-marked ID,
             # so the only way to match that with the input is by not using marks here.
             utils.get_peer_id(x, add_mark=False): x
-            for x in itertools.chain(users, chats, channels)
+            for x in itertools.chain.from_iterable(fetched)
+            if x is not None and not isinstance(x, Exception)
         }
 
         # We could check saved usernames and put them into the users,
         # chats and channels list from before. While this would reduce
         # the amount of ResolveUsername calls, it would fail to catch
         # username changes.
+        from_strings = iter(await asyncio.gather(
+            *(self._get_entity_from_string(x) for x in inputs if isinstance(x, str)),
+            return_exceptions=not single
+        ))
+
         result = []
         for x in inputs:
-            if isinstance(x, str):
-                result.append(await self._get_entity_from_string(x))
-            elif not isinstance(x, types.InputPeerSelf):
-                result.append(id_entity[utils.get_peer_id(x, add_mark=False)])
-            else:
-                result.append(next(
-                    u for u in id_entity.values()
-                    if isinstance(u, types.User) and u.is_self
-                ))
+            try:
+                if x is None:
+                    entity = None
+                elif isinstance(x, str):
+                    entity = next(from_strings)
+                    if isinstance(entity, BaseException):
+                        raise entity
+                elif not isinstance(x, types.InputPeerSelf):
+                    entity = id_entity[utils.get_peer_id(x, add_mark=False)]
+                else:
+                    entity = next(
+                        u for u in id_entity.values()
+                        if isinstance(u, types.User) and u.is_self
+                    )
+            except (ValueError, KeyError, StopIteration, errors.RPCError):
+                if single:
+                    raise
+                entity = None
+            result.append(entity)
 
         return result[0] if single else result
 
@@ -445,9 +665,9 @@ class UserMethods:
         # regardless. These are the only two special-cased requests.
         peer = utils.get_peer(peer)
         if isinstance(peer, types.PeerUser):
-            users = await self(functions.users.GetUsersRequest([
-                types.InputUser(peer.user_id, access_hash=0)]))
-            if users and not isinstance(users[0], types.UserEmpty):
+            users = await self._entity_loader.load(helpers._EntityType.USER, [
+                types.InputPeerUser(peer.user_id, access_hash=0)])
+            if users[0] and not isinstance(users[0], types.UserEmpty):
                 # If the user passed a valid ID they expect to work for
                 # channels but would be valid for users, we get UserEmpty.
                 # Avoid returning the invalid empty input peer for that.
@@ -460,9 +680,10 @@ class UserMethods:
             return types.InputPeerChat(peer.chat_id)
         elif isinstance(peer, types.PeerChannel):
             try:
-                channels = await self(functions.channels.GetChannelsRequest([
-                    types.InputChannel(peer.channel_id, access_hash=0)]))
-                return utils.get_input_peer(channels.chats[0])
+                channels = await self._entity_loader.load(helpers._EntityType.CHANNEL, [
+                    types.InputPeerChannel(peer.channel_id, access_hash=0)])
+                if channels[0]:
+                    return utils.get_input_peer(channels[0])
             except errors.ChannelInvalidError:
                 pass
 
@@ -552,12 +773,17 @@ class UserMethods:
                 elif isinstance(invite, types.ChatInviteAlready):
                     return invite.chat
             elif username:
-                try:
-                    result = await self(
-                        functions.contacts.ResolveUsernameRequest(username))
-                except errors.UsernameNotOccupiedError as e:
-                    raise ValueError('No user has "{}" as username'
-                                     .format(username)) from e
+                if self._username_cache_ttl:
+                    peer = self.session.get_cached_username(
+                        username.lower(), self._username_cache_ttl)
+                    if peer:
+                        try:
+                            return await self.get_entity(peer)
+                        except (ValueError, errors.BadRequestError):
+                            self.session.forget_username(username.lower())
+
+                # Concurrent resolves of the same username are made only once
+                result = await self._entity_loader.resolve_username(username)
 
                 try:
                     pid = utils.get_peer_id(result.peer, add_mark=False)
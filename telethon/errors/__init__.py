@@ -2,8 +2,6 @@
 This module holds all the base and automatically generated errors that the
 Telegram API has. See telethon_generator/errors.json for more.
 """
-import re
-
 from .common import (
     ReadCancelledError, TypeNotFoundError, InvalidChecksumError,
     InvalidBufferError, AuthKeyNotFound, SecurityError, CdnFileTamperedError,
@@ -29,11 +27,10 @@ def rpc_message_to_error(rpc_error, request):
     if cls:
         return cls(request=request)
 
-    for msg_regex, cls in rpc_errors_re:
-        m = re.match(msg_regex, rpc_error.error_message)
-        if m:
-            capture = int(m.group(1)) if m.groups() else None
-            return cls(request=request, capture=capture)
+    m = rpc_errors_re_combined.match(rpc_error.error_message)
+    if m:
+        return rpc_errors_re_classes[m.lastgroup](
+            request=request, capture=int(m.group(m.lastgroup)))
 
     # Some errors are negative:
     # * -500 for "No workers running",
@@ -0,0 +1,196 @@
+"""
+This module dumps many `TLObject` (such as the messages returned by
+`client.iter_messages() <telethon.client.messages.MessageMethods.iter_messages>`)
+as they're produced, either as JSON lines or as batches of columns for
+``pyarrow``, without keeping them all in memory at once.
+
+The JSON is written directly from the fields of the objects, which is
+a lot cheaper than building their ``to_dict()`` first, and it matches
+what ``to_json()`` would produce (bytes are base64-encoded and dates
+ISO-formatted). Only some of the fields may be chosen with ``fields``.
+"""
+import datetime
+import inspect
+
+from .tl.tlobject import TLObject, _json_str, _json_value
+
+# Arguments of these types (or lists of them) become typed columns
+_PRIMITIVES = (int, float, str, bytes, bool, datetime.datetime, type(None))
+
+# Cache ``{(class, field): bool}`` of whether the field holds JSON text
+_json_columns = {}
+
+
+async def _iterate(objects):
+    # Both the client's iterators and plain iterables are supported
+    if hasattr(objects, '__aiter__'):
+        async for obj in objects:
+            yield obj
+    else:
+        for obj in objects:
+            yield obj
+
+
+def _make_writer(fields):
+    if fields is None:
+        return _json_value
+
+    keys = [',' + _json_str(name) + ':' for name in fields]
+
+    def write(w, obj):
+        w('{"_":' + _json_str(type(obj).__name__))
+        for key, name in zip(keys, fields):
+            w(key)
+            _json_value(w, getattr(obj, name, None))
+        w('}')
+
+    return write
+
+
+def to_json_line(obj, fields=None):
+    """
+    Returns the JSON of the given object in a single line (without the
+    line break). If ``fields`` is a list of attribute names, only those
+    (and the ``'_'`` with the type name) are included, and they may
+    be properties too (such as ``'sender_id'`` for messages).
+
+    Example
+        .. code-block:: python
+
+            from telethon import export
+
+            line = export.to_json_line(message, fields=['id', 'date', 'text'])
+    """
+    parts = []
+    _make_writer(fields)(parts.append, obj)
+    return ''.join(parts)
+
+
+async def write_json_lines(objects, fp, *, fields=None):
+    """
+    Writes every object of the given iterable or asynchronous iterable
+    as a line of JSON (see `to_json_line`) into the file ``fp`` opened
+    in text mode, one at a time, and returns how many were written.
+
+    Example
+        .. code-block:: python
+
+            from telethon import export
+
+            with open('history.jsonl', 'w') as fp:
+                count = await export.write_json_lines(
+                    client.iter_messages(chat), fp,
+                    fields=['id', 'date', 'sender_id', 'message', 'media'])
+    """
+    write = _make_writer(fields)
+    count = 0
+    async for obj in _iterate(objects):
+        parts = []
+        write(parts.append, obj)
+        parts.append('\n')
+        fp.write(''.join(parts))
+        count += 1
+
+    return count
+
+
+def _holds_objects(annotation):
+    if annotation in _PRIMITIVES:
+        return False
+
+    # ``Optional``, ``Union`` and ``List`` hold objects if any argument does
+    args = getattr(annotation, '__args__', None)
+    if args:
+        return any(_holds_objects(a) for a in args)
+
+    return True
+
+
+def _is_json_column(cls, name):
+    """
+    Whether the values of the field ``name`` of ``cls`` are kept as JSON
+    text, decided from the type of its argument (so that empty lists
+    are JSON text too), or `None` if the field is not an argument.
+    """
+    key = (cls, name)
+    try:
+        return _json_columns[key]
+    except KeyError:
+        pass
+
+    try:
+        param = inspect.signature(cls.__init__).parameters.get(name)
+    except (TypeError, ValueError):
+        param = None
+
+    if param is None or param.annotation is inspect.Parameter.empty:
+        result = None
+    else:
+        result = _holds_objects(param.annotation)
+
+    _json_columns[key] = result
+    return result
+
+
+def _column_value(value, as_json):
+    # Objects don't have a fixed shape so they're kept as JSON text
+    if value is None:
+        return None
+    if as_json is None:
+        as_json = isinstance(value, TLObject) or (
+            isinstance(value, list) and any(isinstance(v, TLObject) for v in value))
+    return to_json_line(value) if as_json else value
+
+
+def _to_columns(objects, fields):
+    return {name: [_column_value(getattr(obj, name, None), _is_json_column(type(obj), name))
+                   for obj in objects]
+            for name in fields}
+
+
+async def iter_arrow_batches(objects, fields, *, batch_size=10000, schema=None):
+    """
+    Asynchronous generator yielding a ``pyarrow.RecordBatch`` with the
+    given ``fields`` (attribute names) as columns for every ``batch_size``
+    objects of the given iterable or asynchronous iterable, which needs
+    ``pyarrow`` to be installed.
+
+    Numbers, strings, bytes, dates and lists of those become columns of
+    the matching types, while objects (such as the media of a message)
+    and lists that can hold them (even if empty) become their JSON text
+    (see `to_json_line`). For fields that are not arguments of the
+    object (such as properties), this is decided from each value.
+
+    The ``schema`` of the batches is inferred from the first batch unless
+    given, which fails if a later batch doesn't fit in it (for instance,
+    if a field was always `None` in the first batch).
+
+    Example
+        .. code-block:: python
+
+            import pyarrow.parquet
+            from telethon import export
+
+            writer = None
+            async for batch in export.iter_arrow_batches(
+                    client.iter_messages(chat), ['id', 'date', 'message']):
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter('history.parquet', batch.schema)
+                writer.write_batch(batch)
+
+            if writer:
+                writer.close()
+    """
+    import pyarrow
+
+    batch = []
+    async for obj in _iterate(objects):
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            record_batch = pyarrow.RecordBatch.from_pydict(_to_columns(batch, fields), schema=schema)
+            schema = record_batch.schema
+            batch = []
+            yield record_batch
+
+    if batch:
+        yield pyarrow.RecordBatch.from_pydict(_to_columns(batch, fields), schema=schema)
@@ -118,7 +118,12 @@ class BinaryReader:
     def tgread_object(self):
         """Reads a Telegram object."""
         constructor_id = self.read_int(signed=False)
-        clazz = tlobjects.get(constructor_id, None)
+        try:
+            # Indexing (rather than `get`) lets classes be imported on demand
+            clazz = tlobjects[constructor_id]
+        except KeyError:
+            clazz = None
+
         if clazz is None:
             # The class was None, but there's still a
             # chance of it being a manually parsed value like bool!
@@ -20,7 +20,10 @@ from ..tl.types import (
 class HTMLToTelegramParser(HTMLParser):
     def __init__(self):
         super().__init__()
-        self.text = ''
+        # The text is joined once needed, and the entities' lengths are
+        # determined when closing their tag from the length of the text.
+        self._text = []
+        self._length = 0
         self.entities = []
         self._building_entities = {}
         self._open_tags = deque()
@@ -81,7 +84,7 @@ class HTMLToTelegramParser(HTMLParser):
 
         if EntityType and tag not in self._building_entities:
             self._building_entities[tag] = EntityType(
-                offset=len(self.text),
+                offset=self._length,
                 # The length will be determined when closing the tag.
                 length=0,
                 **args)
@@ -93,10 +96,8 @@ class HTMLToTelegramParser(HTMLParser):
             if url:
                 text = url
 
-        for tag, entity in self._building_entities.items():
-            entity.length += len(text)
-
-        self.text += text
+        self._text.append(text)
+        self._length += len(text)
 
     def handle_endtag(self, tag):
         try:
@@ -106,8 +107,13 @@ class HTMLToTelegramParser(HTMLParser):
             pass
         entity = self._building_entities.pop(tag, None)
         if entity:
+            entity.length = self._length - entity.offset
             self.entities.append(entity)
 
+    @property
+    def text(self):
+        return ''.join(self._text)
+
 
 def parse(html: str) -> Tuple[str, List[TypeMessageEntity]]:
     """
@@ -178,17 +184,17 @@ def unparse(text: str, entities: Iterable[TypeMessageEntity]) -> str:
             insert_at.append((s, i, delimiter[0]))
             insert_at.append((e, -i, delimiter[1]))
 
+    # Same logic as markdown.py, escaping the text in between
     insert_at.sort(key=lambda t: (t[0], t[1]))
-    next_escape_bound = len(text)
-    while insert_at:
-        # Same logic as markdown.py
-        at, _, what = insert_at.pop()
+    pieces = []
+    last = 0
+    for at, _, what in insert_at:
         while within_surrogate(text, at):
             at += 1
 
-        text = text[:at] + what + escape(text[at:next_escape_bound]) + text[next_escape_bound:]
-        next_escape_bound = at
-
-    text = escape(text[:next_escape_bound]) + text[next_escape_bound:]
+        pieces.append(escape(text[last:at]))
+        pieces.append(what)
+        last = at
 
-    return del_surrogate(text)
+    pieces.append(escape(text[last:]))
+    return del_surrogate(''.join(pieces))
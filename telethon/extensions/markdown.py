@@ -56,85 +56,133 @@ def parse(message, delimiters=None, url_re=None):
     # Build a regex to efficiently test all delimiters at once.
     # Note that the largest delimiter should go first, we don't
     # want ``` to be interpreted as a single back-tick in a code block.
-    delim_re = re.compile('|'.join('({})'.format(re.escape(k))
+    # (Without groups, which would make searching it a lot slower.)
+    delim_re = re.compile('|'.join(re.escape(k)
                                    for k in sorted(delimiters, key=len, reverse=True)))
 
-    # Cannot use a for loop because we need to skip some indices
-    i = 0
-    result = []
-
-    # Work on byte level with the utf-16le encoding to get the offsets right.
-    # The offset will just be half the index we're at.
+    # Work on the text with surrogates to get the offsets right, and do so in
+    # a single pass, appending the text without the markdown to `text` (whose
+    # `length` is the offset where the next entity would start).
     message = add_surrogate(message)
-    while i < len(message):
-        m = delim_re.match(message, pos=i)
+    result = []
+    text = []
+    length = 0
+
+    # {position: (delimiter length, entity)} of the closing delimiters of the
+    # entities still open. Their length is known once the position is reached.
+    closing = {}
+
+    # {delimiter: position} after which the delimiter doesn't occur anymore
+    missing = {}
+
+    def overlaps_closing(start, end):
+        return any(start < at + size and at < end for at, (size, _) in closing.items())
+
+    def find_closing(delim, pos):
+        while missing.get(delim, len(message)) > pos:
+            end = message.find(delim, pos)
+            if end == -1:
+                missing[delim] = pos
+            elif closing and overlaps_closing(end, end + len(delim)):
+                pos = end + 1
+            else:
+                return end
+        return -1
+
+    # Positions of the next closing delimiter, delimiter and URL (if any)
+    close_at = delim_at = url_at = len(message)
+    delim_m = delim_re.search(message)
+    if delim_m:
+        delim_at = delim_m.start()
+    url_m = url_re.search(message) if url_re else None
+    if url_m:
+        url_at = url_m.start()
 
-        # Did we find some delimiter here at `i`?
-        if m:
-            delim = next(filter(None, m.groups()))
+    i = 0
+    while True:
+        at = min(close_at, delim_at, url_at)
+        if at > i:
+            text.append(message[i:at])
+            length += at - i
+            i = at
+
+        if i == len(message):
+            break
+
+        if i == close_at:
+            size, ent = closing.pop(i)
+            ent.length = length - ent.offset
+            close_at = min(closing) if closing else len(message)
+            i += size
+
+        # The closing delimiters are not part of the text, so neither
+        # are the delimiters they overlap with
+        elif i == delim_at and not (closing and overlaps_closing(i, delim_m.end())):
+            delim = delim_m.group()
 
             # +1 to avoid matching right after (e.g. "****")
-            end = message.find(delim, i + len(delim) + 1)
+            end = i + len(delim)
+            while end in closing:
+                end += closing[end][0]
+            end = find_closing(delim, end + 1)
 
             # Did we find the earliest closing tag?
-            if end != -1:
-
-                # Remove the delimiter from the string
-                message = ''.join((
-                        message[:i],
-                        message[i + len(delim):end],
-                        message[end + len(delim):]
-                ))
-
-                # Check other affected entities
-                for ent in result:
-                    # If the end is after our start, it is affected
-                    if ent.offset + ent.length > i:
-                        # If the old start is also before ours, it is fully enclosed
-                        if ent.offset <= i:
-                            ent.length -= len(delim) * 2
-                        else:
-                            ent.length -= len(delim)
-
+            if end == -1:
+                text.append(message[i])
+                length += 1
+                i += 1
+            else:
                 # Append the found entity
                 ent = delimiters[delim]
                 if ent == MessageEntityPre:
-                    result.append(ent(i, end - i - len(delim), ''))  # has 'lang'
+                    ent = ent(length, 0, '')  # has 'lang'
                 else:
-                    result.append(ent(i, end - i - len(delim)))
+                    ent = ent(length, 0)
+
+                result.append(ent)
+                closing[end] = (len(delim), ent)
+                close_at = min(close_at, end)
+                i += len(delim)
 
                 # No nested entities inside code blocks
-                if ent in (MessageEntityCode, MessageEntityPre):
-                    i = end - len(delim)
-
-                continue
-
-        elif url_re:
-            m = url_re.match(message, pos=i)
-            if m:
-                # Replace the whole match with only the inline URL text.
-                message = ''.join((
-                    message[:m.start()],
-                    m.group(1),
-                    message[m.end():]
-                ))
-
-                delim_size = m.end() - m.start() - len(m.group())
-                for ent in result:
-                    # If the end is after our start, it is affected
-                    if ent.offset + ent.length > m.start():
-                        ent.length -= delim_size
-
-                result.append(MessageEntityTextUrl(
-                    offset=m.start(), length=len(m.group(1)),
-                    url=del_surrogate(m.group(2))
-                ))
-                i += len(m.group(1))
-                continue
-
-        i += 1
-
-    message = strip_text(message, result)
+                if isinstance(ent, (MessageEntityCode, MessageEntityPre)):
+                    delim_at = url_at = end  # look for them after the end
+
+        elif i == url_at:
+            # Replace the whole match with only the inline URL text.
+            result.append(MessageEntityTextUrl(
+                offset=length, length=len(url_m.group(1)),
+                url=del_surrogate(url_m.group(2))
+            ))
+            text.append(url_m.group(1))
+            length += len(url_m.group(1))
+            i = url_m.end()
+
+            # Entities closed within the URL end with it
+            while close_at < i:
+                ent = closing.pop(close_at)[1]
+                ent.length = length - ent.offset
+                close_at = min(closing) if closing else len(message)
+
+        else:
+            # A delimiter overlapping a closing one, taken as text
+            text.append(message[i])
+            length += 1
+            i += 1
+
+        # Find the next delimiter and URL if they were left behind
+        if delim_at < i:
+            delim_m = delim_re.search(message, i)
+            delim_at = delim_m.start() if delim_m else len(message)
+        if url_at < i:
+            url_m = url_re.search(message, i) if url_re else None
+            url_at = url_m.start() if url_m else len(message)
+
+    # Closing delimiters skipped over by overlapping ones end with the text
+    for ent in closing.values():
+        ent.length = length - ent.offset
+
+    message = strip_text(''.join(text), result)
     return del_surrogate(message), result
 
 
@@ -181,17 +229,21 @@ def unparse(text, entities, delimiters=None, url_fmt=None):
                 insert_at.append((s, i, '['))
                 insert_at.append((e, -i, ']({})'.format(url)))
 
+    # Insert everything in a single pass, joining the pieces at the end
     insert_at.sort(key=lambda t: (t[0], t[1]))
-    while insert_at:
-        at, _, what = insert_at.pop()
-
-        # If we are in the middle of a surrogate nudge the position by -1.
+    pieces = []
+    last = 0
+    for at, _, what in insert_at:
+        # If we are in the middle of a surrogate nudge the position by +1.
         # Otherwise we would end up with malformed text and fail to encode.
         # For example of bad input: "Hi \ud83d\ude1c"
         # https://en.wikipedia.org/wiki/UTF-16#U+010000_to_U+10FFFF
         while within_surrogate(text, at):
             at += 1
 
-        text = text[:at] + what + text[at:]
+        pieces.append(text[last:at])
+        pieces.append(what)
+        last = at
 
-    return del_surrogate(text)
+    pieces.append(text[last:])
+    return del_surrogate(''.join(pieces))
@@ -1,6 +1,7 @@
 import asyncio
 import collections
 import io
+import itertools
 import struct
 
 from ..tl import TLRequest
@@ -47,6 +48,8 @@ class MessagePacker:
             self._ready.clear()
             await self._ready.wait()
 
+        await self._pack_bodies()
+
         buffer = io.BytesIO()
         batch = []
         size = 0
@@ -55,12 +58,13 @@ class MessagePacker:
         # as long as we don't exceed the maximum length of messages.
         while self._deque and len(batch) <= MessageContainer.MAXIMUM_LENGTH:
             state = self._deque.popleft()
-            size += len(state.data) + TLMessage.SIZE_OVERHEAD
+            size += len(state.body or state.data) + TLMessage.SIZE_OVERHEAD
 
             if size <= MessageContainer.MAXIMUM_SIZE:
                 state.msg_id = self._state.write_data_as_message(
                     buffer, state.data, isinstance(state.request, TLRequest),
-                    after_id=state.after.msg_id if state.after else None
+                    after_id=state.after.msg_id if state.after else None,
+                    request=state.request, body=state.body
                 )
                 batch.append(state)
                 self._log.debug('Assigned msg_id = %d to %s (%x)',
@@ -106,6 +110,28 @@ class MessagePacker:
             )
             for s in batch:
                 s.container_id = container_id
+        else:
+            # The state may have been sent inside a container before
+            # (e.g. when it's being resent), which no longer applies.
+            batch[0].container_id = None
 
         data = buffer.getvalue()
         return batch, data
+
+    async def _pack_bodies(self):
+        """
+        Packs the body of the states that may go in the next batch as
+        the `GzipPolicy` dictates. This happens before any message ID is
+        assigned, because large payloads may be compressed in a thread
+        and message IDs must be sent in the same order they're generated.
+
+        Bodies are kept in the state so that resending doesn't need to
+        pack them again. Ordered requests are packed when written since
+        their body depends on the message ID of the request before them.
+        """
+        policy = self._state.gzip_policy
+        states = list(itertools.islice(self._deque, MessageContainer.MAXIMUM_LENGTH))
+        for state in states:
+            if state.body is None and state.after is None \
+                    and isinstance(state.request, TLRequest):
+                state.body = await policy.pack_async(state.request, state.data)
@@ -1 +1,11 @@
-from .tl.functions import *
+from .tl import functions as _functions
+
+
+# Members are looked up lazily so that importing this module doesn't
+# import every class (as ``from .tl.functions import *`` would do).
+def __getattr__(name):
+    return getattr(_functions, name)
+
+
+def __dir__():
+    return dir(_functions)
@@ -3,7 +3,7 @@ import asyncio
 import io
 import enum
 import os
-import struct
+import re
 import inspect
 import logging
 import functools
@@ -36,13 +36,19 @@ def ensure_parent_dir_exists(file_path):
         os.makedirs(parent, exist_ok=True)
 
 
+# SMP -> Surrogate Pairs (Telegram offsets are calculated with these).
+# See https://en.wikipedia.org/wiki/Plane_(Unicode)#Overview for more.
+_SMP_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+
+def _to_surrogate_pair(match):
+    c = ord(match.group()) - 0x10000
+    return chr(0xD800 + (c >> 10)) + chr(0xDC00 + (c & 0x3FF))
+
+
 def add_surrogate(text):
-    return ''.join(
-        # SMP -> Surrogate Pairs (Telegram offsets are calculated with these).
-        # See https://en.wikipedia.org/wiki/Plane_(Unicode)#Overview for more.
-        ''.join(chr(y) for y in struct.unpack('<HH', x.encode('utf-16le')))
-        if (0x10000 <= ord(x) <= 0x10FFFF) else x for x in text
-    )
+    # Only the characters outside the BMP need replacing, which is most text
+    return _SMP_RE.sub(_to_surrogate_pair, text)
 
 
 def del_surrogate(text):
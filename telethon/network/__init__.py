@@ -5,6 +5,8 @@ with Telegram's servers and the protocol used (TCP full, abridged, etc.).
 from .mtprotoplainsender import MTProtoPlainSender
 from .authenticator import do_authentication
 from .mtprotosender import MTProtoSender
+from .gzippolicy import GzipPolicy
+from .senderpool import SenderPool
 from .connection import (
     Connection,
     ConnectionTcpFull, ConnectionTcpIntermediate, ConnectionTcpAbridged,
@@ -19,13 +19,17 @@ from ..tl.functions import (
 )
 
 
-async def do_authentication(sender):
+async def do_authentication(sender, executor=None):
     """
     Executes the authentication process with the Telegram servers.
 
     :param sender: a connected `MTProtoPlainSender`.
+    :param executor: the executor in which to run the CPU-bound steps
+                     (``None`` for the event loop's default executor).
     :return: returns a (authorization key, time offset) tuple.
     """
+    loop = helpers.get_running_loop()
+
     # Step 1 sending: PQ Request, endianness doesn't matter since it's random
     nonce = int.from_bytes(os.urandom(16), 'big', signed=True)
     res_pq = await sender.send(ReqPqMultiRequest(nonce))
@@ -37,7 +41,7 @@ async def do_authentication(sender):
     pq = get_int(res_pq.pq)
 
     # Step 2 sending: DH Exchange
-    p, q = Factorization.factorize(pq)
+    p, q = await loop.run_in_executor(executor, Factorization.factorize, pq)
     p, q = rsa.get_byte_array(p), rsa.get_byte_array(q)
     new_nonce = int.from_bytes(os.urandom(32), 'little', signed=True)
 
@@ -131,8 +135,7 @@ async def do_authentication(sender):
     time_offset = server_dh_inner.server_time - int(time.time())
 
     b = get_int(os.urandom(256), signed=False)
-    g_b = pow(g, b, dh_prime)
-    gab = pow(g_a, b, dh_prime)
+    g_b, gab = await loop.run_in_executor(executor, _dh_exchange, g, g_a, b, dh_prime)
 
     # IMPORTANT: Apart from the conditions on the Diffie-Hellman prime
     # dh_prime and generator g, both sides are to check that g, g_a and
@@ -200,6 +203,13 @@ async def do_authentication(sender):
     return auth_key, time_offset
 
 
+def _dh_exchange(g, g_a, b, dh_prime):
+    """
+    Returns ``(g_b, g_ab)`` for the given Diffie-Hellman parameters.
+    """
+    return pow(g, b, dh_prime), pow(g_a, b, dh_prime)
+
+
 def get_int(byte_array, signed=True):
     """
     Gets the specified integer from its byte array.
@@ -0,0 +1,166 @@
+import gzip
+import struct
+import time
+import zlib
+
+from .. import helpers
+from ..tl.core import GzipPacked
+from ..tl.tlobject import TLObject
+from ..tl.functions.upload import SaveFilePartRequest, SaveBigFilePartRequest
+
+
+class GzipPolicy:
+    """
+    Decides whether outgoing content-related payloads should be sent
+    as :tl:`GzipPacked`, and keeps counters on how well that's working.
+
+    Compressing a payload only to find out it did not get any smaller
+    (such as a file part of an already-compressed video) wastes CPU
+    on every request, so payloads are only compressed if they're not
+    of a type in the skip list and a small sample of them compresses
+    well enough.
+
+    The same instance may be shared by several senders.
+
+    Arguments
+        threshold (`int`, optional):
+            Payloads of this many bytes or less are never compressed.
+
+        level (`int`, optional):
+            The zlib compression level to use, from 1 (fastest)
+            to 9 (smallest).
+
+        skip (`list`, optional):
+            Request types whose payloads are never compressed. By default,
+            these are the requests used to upload file parts.
+
+        sample_size (`int`, optional):
+            How many bytes of the payload to compress before compressing
+            all of it, as a cheap estimate of how compressible it is.
+            Payloads smaller than this are compressed directly. Set it
+            to ``0`` to always compress the entire payload.
+
+        sample_ratio (`float`, optional):
+            The payload is only compressed if its sample shrinks to less
+            than this ratio of its original size.
+
+        offload_threshold (`int`, optional):
+            Payloads of this many bytes or more are compressed in the
+            default executor so that the event loop isn't blocked.
+            Set it to `None` to always compress in the event loop.
+
+    Counters
+        skipped (`int`):
+            How many payloads were not compressed, either because of
+            their type or because their sample did not compress.
+
+        attempts (`int`):
+            How many payloads were compressed in full.
+
+        compressed (`int`):
+            How many of those payloads were sent compressed
+            (because they got smaller).
+
+        bytes_in (`int`):
+            The sum of the length of every compressed payload.
+
+        bytes_saved (`int`):
+            How many bytes were saved by sending compressed payloads.
+
+        cpu_time (`float`):
+            Seconds spent sampling and compressing payloads.
+    """
+    def __init__(
+            self,
+            *,
+            threshold=512,
+            level=9,
+            skip=(SaveFilePartRequest, SaveBigFilePartRequest),
+            sample_size=1024,
+            sample_ratio=0.9,
+            offload_threshold=64 * 1024
+    ):
+        self.threshold = threshold
+        self.level = level
+        self.skip = {x.CONSTRUCTOR_ID for x in skip}
+        self.sample_size = sample_size
+        self.sample_ratio = sample_ratio
+        self.offload_threshold = offload_threshold
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Resets all counters back to zero.
+        """
+        self.skipped = 0
+        self.attempts = 0
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_saved = 0
+        self.cpu_time = 0.0
+
+    def pack(self, request, data):
+        """
+        Returns the body that should be sent for the given request
+        data, which will be either ``data`` or its gzipped version.
+        """
+        if not self._should_compress(request, data):
+            return data
+
+        return self._record(data, *self._compress(data))
+
+    async def pack_async(self, request, data):
+        """
+        Like `pack`, but large payloads are compressed in an executor.
+        """
+        if not self._should_compress(request, data):
+            return data
+
+        if self.offload_threshold is not None and len(data) >= self.offload_threshold:
+            result = await helpers.get_running_loop().run_in_executor(
+                None, self._compress, data)
+        else:
+            result = self._compress(data)
+
+        return self._record(data, *result)
+
+    def _should_compress(self, request, data):
+        if len(data) <= self.threshold:
+            return False
+
+        if getattr(request, 'CONSTRUCTOR_ID', None) in self.skip:
+            self.skipped += 1
+            return False
+
+        if self.sample_size and len(data) > self.sample_size:
+            start = time.perf_counter()
+            # Sample both ends and the middle, because the start of a
+            # request is made up of its constructor and smaller fields.
+            n = self.sample_size // 3
+            mid = len(data) // 2
+            sample = data[:n] + data[mid:mid + n] + data[-n:]
+            ratio = len(zlib.compress(sample, 1)) / len(sample)
+            self.cpu_time += time.perf_counter() - start
+            if ratio >= self.sample_ratio:
+                self.skipped += 1
+                return False
+
+        return True
+
+    def _compress(self, data):
+        # May run in a different thread, so it must not touch the counters
+        start = time.perf_counter()
+        packed = struct.pack('<I', GzipPacked.CONSTRUCTOR_ID) + \
+            TLObject.serialize_bytes(gzip.compress(data, self.level))
+        return packed, time.perf_counter() - start
+
+    def _record(self, data, packed, elapsed):
+        self.attempts += 1
+        self.bytes_in += len(data)
+        self.cpu_time += elapsed
+        if len(packed) < len(data):
+            self.compressed += 1
+            self.bytes_saved += len(data) - len(packed)
+            return packed
+        else:
+            return data
@@ -47,7 +47,7 @@ class MTProtoSender:
     """
     def __init__(self, auth_key, *, loggers,
                  retries=5, delay=1, auto_reconnect=True, connect_timeout=None,
-                 auth_key_callback=None,
+                 auth_key_callback=None, gzip_policy=None, crypto_executor=None,
                  updates_queue=None, auto_reconnect_callback=None):
         self._connection = None
         self._loggers = loggers
@@ -57,6 +57,7 @@ class MTProtoSender:
         self._auto_reconnect = auto_reconnect
         self._connect_timeout = connect_timeout
         self._auth_key_callback = auth_key_callback
+        self._crypto_executor = crypto_executor
         self._updates_queue = updates_queue
         self._auto_reconnect_callback = auto_reconnect_callback
         self._connect_lock = asyncio.Lock()
@@ -79,7 +80,8 @@ class MTProtoSender:
 
         # Preserving the references of the AuthKey and state is important
         self.auth_key = auth_key or AuthKey(None)
-        self._state = MTProtoState(self.auth_key, loggers=self._loggers)
+        self._state = MTProtoState(self.auth_key, loggers=self._loggers,
+                                   gzip_policy=gzip_policy)
 
         # Outgoing messages are put in a queue and sent in a batch.
         # Note that here we're also storing their ``_RequestState``.
@@ -88,6 +90,11 @@ class MTProtoSender:
         # Sent states are remembered until a response is received.
         self._pending_state = {}
 
+        # Container IDs mapped to the IDs of their still-pending inner
+        # messages, so that responses referring to a container don't need
+        # to scan every pending state (see `_pop_states`).
+        self._pending_containers = {}
+
         # Responses must be acknowledged, and we can also batch these.
         self._pending_ack = set()
 
@@ -217,6 +224,23 @@ class MTProtoSender:
         """
         return asyncio.shield(self._disconnected)
 
+    def get_server_state(self):
+        """
+        Returns the ``(time_offset, salts)`` known for the server and the
+        current authorization key, to be restored with `set_server_state`.
+        """
+        return self._state.time_offset, list(self._state.future_salts)
+
+    def set_server_state(self, time_offset, salts):
+        """
+        Restores the time offset and the list of :tl:`FutureSalt` known
+        from a previous connection with the same authorization key, so
+        that the first request doesn't need to be resent with the right
+        salt. Must be called before connecting.
+        """
+        self._state.time_offset = time_offset
+        self._state.future_salts = list(salts)
+
     # Private methods
 
     async def _connect(self):
@@ -263,6 +287,9 @@ class MTProtoSender:
             await self._disconnect(error=e)
             raise e
 
+        if self._state.pick_salt():
+            self._log.debug('Using known future salt for the new session')
+
         loop = helpers.get_running_loop()
         self._log.debug('Starting send loop')
         self._send_loop_handle = loop.create_task(self._send_loop())
@@ -295,7 +322,10 @@ class MTProtoSender:
         try:
             self._log.debug('New auth_key attempt %d...', attempt)
             self.auth_key.key, self._state.time_offset = \
-                await authenticator.do_authentication(plain)
+                await authenticator.do_authentication(plain, self._crypto_executor)
+
+            # The salts of any previous key can't be used with this one
+            self._state.future_salts = []
 
             # This is *EXTREMELY* important since we don't control
             # external references to the authorization key, we must
@@ -323,13 +353,12 @@ class MTProtoSender:
             await self._connection.disconnect()
         finally:
             self._log.debug('Cancelling %d pending message(s)...', len(self._pending_state))
-            for state in self._pending_state.values():
+            for state in self._clear_pending_states():
                 if error and not state.future.done():
                     state.future.set_exception(error)
                 else:
                     state.future.cancel()
 
-            self._pending_state.clear()
             await helpers._cancel(
                 self._log,
                 send_loop_handle=self._send_loop_handle,
@@ -398,8 +427,7 @@ class MTProtoSender:
 
                 await asyncio.sleep(self._delay)
             else:
-                self._send_queue.extend(self._pending_state.values())
-                self._pending_state.clear()
+                self._send_queue.extend(self._clear_pending_states())
 
                 if self._auto_reconnect_callback:
                     helpers.get_running_loop().create_task(self._auto_reconnect_callback())
@@ -479,11 +507,11 @@ class MTProtoSender:
             for state in batch:
                 if not isinstance(state, list):
                     if isinstance(state.request, TLRequest):
-                        self._pending_state[state.msg_id] = state
+                        self._add_pending_state(state)
                 else:
                     for s in state:
                         if isinstance(s.request, TLRequest):
-                            self._pending_state[s.msg_id] = s
+                            self._add_pending_state(s)
 
             try:
                 await self._connection.send(data)
@@ -570,23 +598,53 @@ class MTProtoSender:
                                      self._handle_update)
         await handler(message)
 
+    def _add_pending_state(self, state):
+        """
+        Remembers the given state as pending a response, indexing
+        it under its container ID if it was sent inside one.
+        """
+        self._pending_state[state.msg_id] = state
+        if state.container_id is not None:
+            self._pending_containers.setdefault(
+                state.container_id, {})[state.msg_id] = None
+
+    def _pop_pending_state(self, msg_id):
+        """
+        Pops the pending state with the given ID (or `None` if there is
+        no such state), keeping the container index in sync.
+        """
+        state = self._pending_state.pop(msg_id, None)
+        if state and state.container_id is not None:
+            msg_ids = self._pending_containers.get(state.container_id)
+            if msg_ids is not None:
+                msg_ids.pop(msg_id, None)
+                if not msg_ids:
+                    del self._pending_containers[state.container_id]
+
+        return state
+
+    def _clear_pending_states(self):
+        """
+        Forgets about all pending states and returns them.
+        """
+        states = list(self._pending_state.values())
+        self._pending_state.clear()
+        self._pending_containers.clear()
+        return states
+
     def _pop_states(self, msg_id):
         """
         Pops the states known to match the given ID from pending messages.
 
         This method should be used when the response isn't specific.
         """
-        state = self._pending_state.pop(msg_id, None)
+        state = self._pop_pending_state(msg_id)
         if state:
             return [state]
 
-        to_pop = []
-        for state in self._pending_state.values():
-            if state.container_id == msg_id:
-                to_pop.append(state.msg_id)
-
-        if to_pop:
-            return [self._pending_state.pop(x) for x in to_pop]
+        msg_ids = self._pending_containers.pop(msg_id, None)
+        if msg_ids:
+            return [self._pending_state.pop(x) for x in msg_ids]
 
         for ack in self._last_acks:
             if ack.msg_id == msg_id:
@@ -603,7 +661,7 @@ class MTProtoSender:
         This is where the future results for sent requests are set.
         """
         rpc_result = message.obj
-        state = self._pending_state.pop(rpc_result.req_msg_id, None)
+        state = self._pop_pending_state(rpc_result.req_msg_id)
         self._log.debug('Handling RPC result for message %d',
                         rpc_result.req_msg_id)
 
@@ -734,7 +792,7 @@ class MTProtoSender:
         if self._ping == pong.ping_id:
             self._ping = None
 
-        state = self._pending_state.pop(pong.msg_id, None)
+        state = self._pop_pending_state(pong.msg_id)
         if state:
             state.future.set_result(pong)
 
@@ -749,6 +807,9 @@ class MTProtoSender:
         bad_salt = message.obj
         self._log.debug('Handling bad salt for message %d', bad_salt.bad_msg_id)
         self._state.salt = bad_salt.new_server_salt
+        # The known salts (or the time offset) can't have been right
+        self._state.future_salts = []
+
         states = self._pop_states(bad_salt.bad_msg_id)
         self._send_queue.extend(states)
 
@@ -845,7 +906,7 @@ class MTProtoSender:
         for msg_id in ack.msg_ids:
             state = self._pending_state.get(msg_id)
             if state and isinstance(state.request, LogOutRequest):
-                del self._pending_state[msg_id]
+                self._pop_pending_state(msg_id)
                 if not state.future.cancelled():
                     state.future.set_result(True)
 
@@ -857,10 +918,10 @@ class MTProtoSender:
             future_salts#ae500895 req_msg_id:long now:int
             salts:vector<future_salt> = FutureSalts;
         """
-        # TODO save these salts and automatically adjust to the
-        # correct one whenever the salt in use expires.
-        self._log.debug('Handling future salts for message %d', message.msg_id)
-        state = self._pending_state.pop(message.msg_id, None)
+        # These are used to pick the right salt when (re)connecting
+        self._log.debug('Handling future salts for message %d', message.obj.req_msg_id)
+        self._state.future_salts = message.obj.salts
+        state = self._pop_pending_state(message.obj.req_msg_id)
         if state:
             state.future.set_result(message.obj)
 
@@ -890,7 +951,7 @@ class MTProtoSender:
         else:
             return
 
-        del self._pending_state[msg_id]
+        self._pop_pending_state(msg_id)
         if not state.future.cancelled():
             state.future.set_result(message.obj)
 
@@ -905,7 +966,7 @@ class MTProtoSender:
         self._log.debug('Handling destroy auth key %s', message.obj)
         for msg_id, state in list(self._pending_state.items()):
             if isinstance(state.request, DestroyAuthKeyRequest):
-                del self._pending_state[msg_id]
+                self._pop_pending_state(msg_id)
                 if not state.future.cancelled():
                     state.future.set_result(message.obj)
 
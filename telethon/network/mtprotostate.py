@@ -10,8 +10,8 @@ from ..extensions import BinaryReader
 from ..tl.core import TLMessage
 from ..tl.tlobject import TLRequest
 from ..tl.functions import InvokeAfterMsgRequest
-from ..tl.core.gzippacked import GzipPacked
 from ..tl.types import BadServerSalt, BadMsgNotification
+from .gzippolicy import GzipPolicy
 
 
 # N is not  specified in https://core.telegram.org/mtproto/security_guidelines#checking-msg-id, but 500 is reasonable
@@ -59,12 +59,16 @@ class MTProtoState:
     many methods that would be needed to make it convenient to use for the
     authentication process, at which point the `MTProtoPlainSender` is better.
     """
-    def __init__(self, auth_key, loggers):
+    def __init__(self, auth_key, loggers, gzip_policy=None):
         self.auth_key = auth_key
         self._log = loggers[__name__]
+        self.gzip_policy = gzip_policy or GzipPolicy()
         self.time_offset = 0
         self.salt = 0
 
+        # :tl:`FutureSalt` known for the auth key, to pick the valid one
+        self.future_salts = []
+
         self.id = self._sequence = self._last_msg_id = None
         self._recent_remote_ids = deque(maxlen=MAX_RECENT_MSG_IDS)
         self._highest_remote_id = 0
@@ -107,21 +111,24 @@ class MTProtoState:
         return aes_key, aes_iv
 
     def write_data_as_message(self, buffer, data, content_related,
-                              *, after_id=None):
+                              *, after_id=None, request=None, body=None):
         """
         Writes a message containing the given data into buffer.
 
+        If the body is given, it must be the data already packed by
+        the `gzip_policy` (without `after_id`), and is written as-is.
+
         Returns the message id.
         """
         msg_id = self._get_new_msg_id()
         seq_no = self._get_seq_no(content_related)
-        if after_id is None:
-            body = GzipPacked.gzip_if_smaller(content_related, data)
-        else:
-            # The `RequestState` stores `bytes(request)`, not the request itself.
-            # `invokeAfterMsg` wants a `TLRequest` though, hence the wrapping.
-            body = GzipPacked.gzip_if_smaller(content_related,
-                bytes(InvokeAfterMsgRequest(after_id, _OpaqueRequest(data))))
+        if body is None:
+            if after_id is not None:
+                # The `RequestState` stores `bytes(request)`, not the request itself.
+                # `invokeAfterMsg` wants a `TLRequest` though, hence the wrapping.
+                data = bytes(InvokeAfterMsgRequest(after_id, _OpaqueRequest(data)))
+
+            body = self.gzip_policy.pack(request, data) if content_related else data
 
         buffer.write(struct.pack('<qii', msg_id, seq_no, len(body)))
         buffer.write(body)
@@ -266,6 +273,19 @@ class MTProtoState:
 
         return self.time_offset
 
+    def pick_salt(self):
+        """
+        Uses the future salt valid at the current (server) time, if any
+        is known, and returns whether there was one.
+        """
+        now = time.time() + self.time_offset
+        for future in self.future_salts:
+            if future.valid_since <= now < future.valid_until:
+                self.salt = future.salt
+                return True
+
+        return False
+
     def _get_seq_no(self, content_related):
         """
         Generates the next sequence number depending on whether
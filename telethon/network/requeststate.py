@@ -5,15 +5,17 @@ class RequestState:
     """
     This request state holds several information relevant to sent messages,
     in particular the message ID assigned to the request, the container ID
-    it belongs to, the request itself, the request as bytes, and the future
-    result that will eventually be resolved.
+    it belongs to, the request itself, the request as bytes (and the body
+    as it will be sent, possibly gzipped), and the future result that will
+    eventually be resolved.
     """
-    __slots__ = ('container_id', 'msg_id', 'request', 'data', 'future', 'after')
+    __slots__ = ('container_id', 'msg_id', 'request', 'data', 'body', 'future', 'after')
 
     def __init__(self, request, after=None):
         self.container_id = None
         self.msg_id = None
         self.request = request
         self.data = bytes(request)
+        self.body = None
         self.future = asyncio.Future()
         self.after = after
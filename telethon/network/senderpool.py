@@ -0,0 +1,175 @@
+import asyncio
+import time
+
+from .. import helpers
+
+
+class _Entry:
+    __slots__ = ('sender', 'borrows', 'idle_since')
+
+    def __init__(self, sender):
+        self.sender = sender
+        self.borrows = 0
+        self.idle_since = time.time()
+
+
+class SenderPool:
+    """
+    Keeps up to `size` connected senders to the same data center, so that
+    several requests (such as downloads of different files) can be made
+    to it in parallel without waiting on each other.
+
+    Borrowing a sender lends the least busy of them. A new one is only
+    created if all of them are busy and there is room for more. Senders
+    that lost their connection are dropped instead of being lent, and
+    those not borrowed for `idle_timeout` seconds are disconnected.
+
+    Every pool has its own lock, so connecting to one data center
+    doesn't make those borrowing from other data centers wait.
+
+    Arguments
+        dc_id (`int`):
+            The data center the senders are connected to.
+
+        create (`callable`):
+            Coroutine function creating a new connected sender.
+
+        size (`int`, optional):
+            How many senders to have connected at most.
+
+        idle_timeout (`float`, optional):
+            How many seconds a sender may not be borrowed for
+            before it is disconnected.
+
+    Counters
+        borrows (`int`):
+            How many times a sender was borrowed.
+
+        created (`int`):
+            How many senders were created.
+
+        evicted (`int`):
+            How many senders were disconnected for being idle.
+
+        dropped (`int`):
+            How many senders were dropped for having lost their connection.
+    """
+    def __init__(self, dc_id, create, *, loggers, size=1, idle_timeout=60):
+        self.dc_id = dc_id
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._create = create
+        self._log = loggers[__name__]
+        self._entries = []
+        self._lock = asyncio.Lock()
+        self._evict_handle = None
+        self._evict_task = None
+
+        self.borrows = 0
+        self.created = 0
+        self.evicted = 0
+        self.dropped = 0
+
+    @property
+    def in_use(self):
+        """How many senders are currently borrowed (counting each borrow)."""
+        return sum(e.borrows for e in self._entries)
+
+    @property
+    def connected(self):
+        """How many senders are currently connected."""
+        return len(self._entries)
+
+    async def borrow(self):
+        """
+        Borrows the least busy sender, connecting a new one if needed.
+        It must be `release`'d once it's no longer needed.
+        """
+        async with self._lock:
+            dropped = [e for e in self._entries if not e.sender.is_connected()]
+            for entry in dropped:
+                # Borrowed senders are disconnected when they're released
+                self._entries.remove(entry)
+                if not entry.borrows:
+                    await entry.sender.disconnect()
+
+            if dropped:
+                self._log.info('Dropping %d disconnected senders for DC %d', len(dropped), self.dc_id)
+                self.dropped += len(dropped)
+
+            entry = min(self._entries, key=lambda e: e.borrows, default=None)
+            if entry is None or (entry.borrows and len(self._entries) < self.size):
+                self._log.debug('Creating new sender for DC %d', self.dc_id)
+                entry = _Entry(await self._create())
+                self._entries.append(entry)
+                self.created += 1
+
+            entry.borrows += 1
+            self.borrows += 1
+            return entry.sender
+
+    async def release(self, sender):
+        """
+        Releases a borrowed sender. It will be disconnected
+        if it's not borrowed again in `idle_timeout` seconds.
+        """
+        entry = next((e for e in self._entries if e.sender is sender), None)
+        if entry is None:
+            # Dropped (or the pool was closed) while it was borrowed
+            await sender.disconnect()
+            return
+
+        entry.borrows -= 1
+        assert entry.borrows >= 0, 'released sender more times than it was borrowed'
+        if entry.borrows == 0:
+            entry.idle_since = time.time()
+            self._schedule_evict(self.idle_timeout)
+
+    def _schedule_evict(self, delay):
+        if self._evict_handle is None:
+            self._evict_handle = helpers.get_running_loop().call_later(delay, self._start_evict)
+
+    def _start_evict(self):
+        self._evict_handle = None
+        if not self._evict_task or self._evict_task.done():
+            self._evict_task = helpers.get_running_loop().create_task(self.evict_idle())
+
+    async def evict_idle(self):
+        """
+        Disconnects the senders that have been idle for too long.
+        """
+        now = time.time()
+        async with self._lock:
+            expired = [e for e in self._entries
+                       if not e.borrows and now - e.idle_since >= self.idle_timeout]
+            for entry in expired:
+                self._entries.remove(entry)
+
+            if expired:
+                self._log.info('Disconnecting %d idle senders for DC %d', len(expired), self.dc_id)
+                self.evicted += len(expired)
+
+            idle = [e.idle_since for e in self._entries if not e.borrows]
+            if idle:
+                self._schedule_evict(min(idle) + self.idle_timeout - now)
+
+        for entry in expired:
+            # Disconnect should never raise
+            await entry.sender.disconnect()
+
+    async def close(self):
+        """
+        Disconnects all senders, even if they're borrowed.
+        """
+        if self._evict_handle:
+            self._evict_handle.cancel()
+            self._evict_handle = None
+
+        await helpers._cancel(self._log, evict_task=self._evict_task)
+        self._evict_task = None
+
+        async with self._lock:
+            entries, self._entries = self._entries, []
+
+        for entry in entries:
+            await entry.sender.disconnect()
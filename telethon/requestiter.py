@@ -25,11 +25,18 @@ class RequestIter(abc.ABC):
     Iterators may be used with ``reversed``, and their `reverse` flag will
     be set to `True` if that's the case. Note that if this flag is set,
     `buffer` should be filled in reverse too.
+
+    If `prefetch` is set, up to that many chunks will be loaded in the
+    background while the items of previous chunks are being consumed.
+    In this mode, `left` indicates how many items are left to be loaded
+    (rather than emitted). The background loading is cancelled by `aclose`,
+    or when the iterator is restarted or garbage collected.
     """
-    def __init__(self, client, limit, *, reverse=False, wait_time=None, **kwargs):
+    def __init__(self, client, limit, *, reverse=False, wait_time=None, prefetch=0, **kwargs):
         self.client = client
         self.reverse = reverse
         self.wait_time = wait_time
+        self.prefetch = prefetch
         self.kwargs = kwargs
         self.limit = max(float('inf') if limit is None else limit, 0)
         self.left = self.limit
@@ -37,6 +44,9 @@ class RequestIter(abc.ABC):
         self.index = 0
         self.total = None
         self.last_load = 0
+        self._chunks = None
+        self._chunk = None
+        self._prefetch_task = None
 
     async def _init(self, **kwargs):
         """
@@ -53,6 +63,9 @@ class RequestIter(abc.ABC):
         """
 
     async def __anext__(self):
+        if self.prefetch:
+            return await self._prefetched_anext()
+
         if self.buffer is None:
             self.buffer = []
             if await self._init(**self.kwargs):
@@ -82,6 +95,102 @@ class RequestIter(abc.ABC):
         self.index += 1
         return result
 
+    async def _prefetched_anext(self):
+        if self._chunks is None:
+            self._chunks = asyncio.Queue(self.prefetch)
+            self._chunk = []
+            self._prefetch_task = helpers.get_running_loop().create_task(self._prefetch_chunks())
+
+        while self.index == len(self._chunk):
+            item = await self._chunks.get()
+            if item is None or isinstance(item, Exception):
+                # Nothing else will be loaded, so further calls should stop too
+                self._chunks.put_nowait(None)
+                self._chunk = []
+                self.index = 0
+                if item is None:
+                    raise StopAsyncIteration
+                raise item
+
+            self._chunk = item
+            self.index = 0
+
+        result = self._chunk[self.index]
+        self.index += 1
+        return result
+
+    async def _prefetch_chunks(self):
+        """
+        Loads the chunks (and does the initialization) on behalf of the
+        consumer, putting each chunk, trimmed to the items that should
+        actually be emitted, in the queue. The end of the iteration is
+        signaled with `None`, and errors are put in the queue to be
+        raised by the consumer.
+        """
+        try:
+            self.buffer = []
+            last = await self._init(**self.kwargs)
+            first = True
+            while True:
+                chunk = self.buffer
+                if last:
+                    self.left = len(chunk)
+
+                # <= 0 because subclasses may change it
+                if self.left < len(chunk):
+                    del chunk[max(self.left, 0):]
+
+                self.left -= len(chunk)
+                if chunk:
+                    await self._chunks.put(chunk)
+
+                if last or (not chunk and not first) or self.left <= 0:
+                    break
+
+                # asyncio will handle times <= 0 to sleep 0 seconds
+                if self.wait_time:
+                    await asyncio.sleep(
+                        self.wait_time - (time.time() - self.last_load)
+                    )
+                    self.last_load = time.time()
+
+                first = False
+                self.buffer = []
+                last = await self._load_next_chunk()
+        except asyncio.CancelledError:
+            raise
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            await self._chunks.put(e)
+            return
+
+        await self._chunks.put(None)
+
+    def _cancel_prefetch(self):
+        if self._prefetch_task and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+
+        self._chunks = None
+        self._prefetch_task = None
+
+    async def aclose(self):
+        """
+        Stops loading chunks in the background (if `prefetch` was used).
+        Should be called when the iteration is stopped early.
+        """
+        task = self._prefetch_task
+        self._cancel_prefetch()
+        if task:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def __del__(self):
+        if getattr(self, '_prefetch_task', None):
+            self._cancel_prefetch()
+
     def __next__(self):
         try:
             return self.client.loop.run_until_complete(self.__anext__())
@@ -89,6 +198,7 @@ class RequestIter(abc.ABC):
             raise StopIteration
 
     def __aiter__(self):
+        self._cancel_prefetch()
         self.buffer = None
         self.index = 0
         self.last_load = 0
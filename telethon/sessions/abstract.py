@@ -61,6 +61,54 @@ class Session(ABC):
         """
         raise NotImplementedError
 
+    def get_exported_auth_key(self, dc_id):
+        """
+        Returns the ``AuthKey`` that was imported into the given (foreign)
+        data center ``dc_id`` to use the account from there, or `None` if
+        a new one should be generated and imported. Can be left
+        unimplemented, in which case keys will be generated every time.
+        """
+        return None
+
+    def set_exported_auth_key(self, dc_id, auth_key):
+        """
+        Saves the ``AuthKey`` imported into the given data center ``dc_id``
+        to use the account from there, or forgets it if ``auth_key`` is
+        `None` (because the server doesn't know about it anymore).
+        """
+
+    def get_server_state(self, dc_id):
+        """
+        Returns the ``(time_offset, salts)`` saved through `set_server_state`
+        for the given data center ``dc_id``, or `None` if nothing is known.
+        Can be left unimplemented, in which case the first request made
+        after connecting will need to be resent with the right salt.
+        """
+        return None
+
+    def set_server_state(self, dc_id, time_offset, salts):
+        """
+        Saves how many seconds the clock of the given data center ``dc_id``
+        is ahead of ours (``time_offset``), and the list of :tl:`FutureSalt`
+        it gave for the saved authorization key (``salts``), each of which
+        can only be used between its ``valid_since`` and ``valid_until``.
+        """
+
+    def get_config(self, name):
+        """
+        Returns the ``TLObject`` saved through `set_config` with the given
+        ``name`` (``'config'`` for :tl:`Config`, or ``'cdn_config'`` for
+        :tl:`CdnConfig`), or `None` if it's unknown or it has expired.
+        Can be left unimplemented, in which case it will be fetched again.
+        """
+        return None
+
+    def set_config(self, name, config, expires):
+        """
+        Saves the ``config`` with the given ``name`` until ``expires``
+        (a Unix timestamp), after which `get_config` should not return it.
+        """
+
     @property
     @abstractmethod
     def takeout_id(self):
@@ -150,6 +198,24 @@ class Session(ABC):
         """
         raise NotImplementedError
 
+    def get_cached_username(self, username, max_age):
+        """
+        Returns the ``InputPeer`` that the given (lowercase) ``username``
+        belonged to, if this was known to be the case at most ``max_age``
+        seconds ago, or ``None`` otherwise. Used to avoid resolving
+        the same usernames over and over. Can be left unimplemented,
+        in which case usernames will always be resolved.
+        """
+        return None
+
+    def forget_username(self, key):
+        """
+        Called when a username is known to no longer belong to the
+        entity it was saved with. The ``key`` is either the (lowercase)
+        username, or the marked ID of the entity that changed its
+        username. Should remove any saved username matching it.
+        """
+
     @abstractmethod
     def cache_file(self, md5_digest, file_size, instance):
         """
@@ -157,7 +223,8 @@ class Session(ABC):
         doesn't need to be re-uploaded in case the file is used again.
 
         The ``instance`` will be either an ``InputPhoto`` or ``InputDocument``,
-        both with an ``.id`` and ``.access_hash`` attributes.
+        both with an ``.id``, ``.access_hash`` and ``.file_reference``
+        attributes.
         """
         raise NotImplementedError
 
@@ -167,6 +234,16 @@ class Session(ABC):
         Returns an instance of ``cls`` if the ``md5_digest`` and ``file_size``
         match an existing saved record. The class will either be an
         ``InputPhoto`` or ``InputDocument``, both with two parameters
-        ``id`` and ``access_hash`` in that order.
+        ``id`` and ``access_hash`` in that order, and an optional
+        ``file_reference`` keyword argument.
         """
         raise NotImplementedError
+
+    def forget_file(self, instance):
+        """
+        Called when a cached ``InputPhoto`` or ``InputDocument`` could
+        not be used anymore (for instance, because its file reference
+        expired). Should remove any saved record pointing to it.
+        Can be left empty, in which case the record will be
+        replaced once the file is uploaded and cached again.
+        """
@@ -1,3 +1,4 @@
+import time
 from enum import Enum
 
 from .abstract import Session
@@ -33,9 +34,15 @@ class MemorySession(Session):
         self._port = None
         self._auth_key = None
         self._takeout_id = None
+        self._exported_auth_keys = {}
+        self._server_states = {}
+        self._configs = {}
 
         self._files = {}
+        self.file_cache_ttl = 24 * 60 * 60
+        self.file_cache_size = 1000
         self._entities = set()
+        self._usernames = {}
         self._update_states = {}
 
     def set_dc(self, dc_id, server_address, port):
@@ -63,6 +70,28 @@ class MemorySession(Session):
     def auth_key(self, value):
         self._auth_key = value
 
+    def get_exported_auth_key(self, dc_id):
+        return self._exported_auth_keys.get(dc_id)
+
+    def set_exported_auth_key(self, dc_id, auth_key):
+        if auth_key is None:
+            self._exported_auth_keys.pop(dc_id, None)
+        else:
+            self._exported_auth_keys[dc_id] = auth_key
+
+    def get_server_state(self, dc_id):
+        return self._server_states.get(dc_id)
+
+    def set_server_state(self, dc_id, time_offset, salts):
+        self._server_states[dc_id] = (time_offset, list(salts))
+
+    def get_config(self, name):
+        config, expires = self._configs.get(name, (None, 0))
+        return config if expires > time.time() else None
+
+    def set_config(self, name, config, expires):
+        self._configs[name] = (config, expires)
+
     @property
     def takeout_id(self):
         return self._takeout_id
@@ -148,7 +177,13 @@ class MemorySession(Session):
         return rows
 
     def process_entities(self, tlo):
-        self._entities |= set(self._entities_to_rows(tlo))
+        rows = self._entities_to_rows(tlo)
+        self._entities |= set(rows)
+
+        now = time.time()
+        for row in rows:
+            if row[2]:
+                self._usernames[row[2]] = (row[0], row[1], now)
 
     def get_entity_rows_by_phone(self, phone):
         try:
@@ -224,28 +259,69 @@ class MemorySession(Session):
             result = self.get_entity_rows_by_name(key)
 
         if result:
-            entity_id, entity_hash = result  # unpack resulting tuple
-            entity_id, kind = utils.resolve_id(entity_id)
-            # removes the mark and returns type of entity
-            if kind == PeerUser:
-                return InputPeerUser(entity_id, entity_hash)
-            elif kind == PeerChat:
-                return InputPeerChat(entity_id)
-            elif kind == PeerChannel:
-                return InputPeerChannel(entity_id, entity_hash)
+            return self._row_to_input_peer(*result)  # unpack resulting tuple
         else:
             raise ValueError('Could not find input entity with key ', key)
 
+    @staticmethod
+    def _row_to_input_peer(entity_id, entity_hash):
+        entity_id, kind = utils.resolve_id(entity_id)
+        # removes the mark and returns type of entity
+        if kind == PeerUser:
+            return InputPeerUser(entity_id, entity_hash)
+        elif kind == PeerChat:
+            return InputPeerChat(entity_id)
+        elif kind == PeerChannel:
+            return InputPeerChannel(entity_id, entity_hash)
+
+    def get_cached_username(self, username, max_age):
+        try:
+            entity_id, entity_hash, date = self._usernames[username]
+        except KeyError:
+            return None
+
+        if time.time() - date > max_age:
+            return None
+
+        return self._row_to_input_peer(entity_id, entity_hash)
+
+    def forget_username(self, key):
+        index = 0 if isinstance(key, int) else 2
+        for username in [u for u, v in self._usernames.items()
+                         if (v[0] if index == 0 else u) == key]:
+            del self._usernames[username]
+
+        for row in [r for r in self._entities if r[index] == key]:
+            self._entities.remove(row)
+            self._entities.add(self._entity_values_to_row(
+                row[0], row[1], None, row[3], row[4]))
+
     def cache_file(self, md5_digest, file_size, instance):
         if not isinstance(instance, (InputDocument, InputPhoto)):
             raise TypeError('Cannot cache %s instance' % type(instance))
         key = (md5_digest, file_size, _SentFileType.from_type(type(instance)))
-        value = (instance.id, instance.access_hash)
+        value = (instance.id, instance.access_hash, instance.file_reference, time.time())
+
+        # Re-insert so that the oldest entries are always the first ones
+        self._files.pop(key, None)
         self._files[key] = value
+        while len(self._files) > self.file_cache_size:
+            del self._files[next(iter(self._files))]
 
     def get_file(self, md5_digest, file_size, cls):
         key = (md5_digest, file_size, _SentFileType.from_type(cls))
         try:
-            return cls(*self._files[key])
+            id, access_hash, file_reference, date = self._files[key]
         except KeyError:
             return None
+
+        if time.time() - date > self.file_cache_ttl:
+            del self._files[key]
+            return None
+
+        return cls(id, access_hash, file_reference=file_reference)
+
+    def forget_file(self, instance):
+        ty = _SentFileType.from_type(type(instance))
+        for key in [k for k, v in self._files.items() if k[2] == ty and v[0] == instance.id]:
+            del self._files[key]
@@ -1,13 +1,16 @@
 import datetime
 import os
+import struct
 import time
 
 from ..tl import types
 from .memory import MemorySession, _SentFileType
 from .. import utils
 from ..crypto import AuthKey
+from ..errors import TypeNotFoundError
+from ..extensions import BinaryReader
 from ..tl.types import (
-    InputPhoto, InputDocument, PeerUser, PeerChat, PeerChannel
+    InputPhoto, InputDocument, PeerUser, PeerChat, PeerChannel, FutureSalt
 )
 
 try:
@@ -18,7 +21,7 @@ except ImportError as e:
     sqlite3_err = type(e)
 
 EXTENSION = '.session'
-CURRENT_VERSION = 7  # database version
+CURRENT_VERSION = 10  # database version
 
 
 class SQLiteSession(MemorySession):
@@ -95,6 +98,8 @@ class SQLiteSession(MemorySession):
                     type integer,
                     id integer,
                     hash integer,
+                    file_reference blob,
+                    date integer,
                     primary key(md5_digest, file_size, type)
                 )"""
                 ,
@@ -105,6 +110,23 @@ class SQLiteSession(MemorySession):
                     date integer,
                     seq integer
                 )"""
+                ,
+                """exported_auth_keys (
+                    dc_id integer primary key,
+                    auth_key blob
+                )"""
+                ,
+                """server_state (
+                    dc_id integer primary key,
+                    time_offset integer,
+                    salts blob
+                )"""
+                ,
+                """configs (
+                    name text primary key,
+                    data blob,
+                    expires integer
+                )"""
             )
             c.execute("insert into version values (?)", (CURRENT_VERSION,))
             self._update_session_table()
@@ -153,6 +175,29 @@ class SQLiteSession(MemorySession):
         if old == 6:
             old += 1
             c.execute("alter table entities add column date integer")
+        if old == 7:
+            old += 1
+            # Cached files without a file reference or date are useless
+            c.execute('delete from sent_files')
+            c.execute("alter table sent_files add column file_reference blob")
+            c.execute("alter table sent_files add column date integer")
+        if old == 8:
+            old += 1
+            self._create_table(c, """exported_auth_keys (
+                dc_id integer primary key,
+                auth_key blob
+            )""")
+        if old == 9:
+            old += 1
+            self._create_table(c, """server_state (
+                dc_id integer primary key,
+                time_offset integer,
+                salts blob
+            )""", """configs (
+                name text primary key,
+                data blob,
+                expires integer
+            )""")
 
         c.close()
 
@@ -201,6 +246,47 @@ class SQLiteSession(MemorySession):
         ))
         c.close()
 
+    def get_exported_auth_key(self, dc_id):
+        row = self._execute('select auth_key from exported_auth_keys '
+                            'where dc_id = ?', dc_id)
+        if row:
+            return AuthKey(data=row[0])
+
+    def set_exported_auth_key(self, dc_id, auth_key):
+        if auth_key is None:
+            self._execute('delete from exported_auth_keys where dc_id = ?', dc_id)
+        else:
+            self._execute('insert or replace into exported_auth_keys values (?,?)',
+                          dc_id, auth_key.key)
+
+    def get_server_state(self, dc_id):
+        row = self._execute('select time_offset, salts from server_state '
+                            'where dc_id = ?', dc_id)
+        if row:
+            time_offset, data = row
+            return time_offset, [FutureSalt(*struct.unpack_from('<iiq', data, i))
+                                 for i in range(0, len(data), 16)]
+
+    def set_server_state(self, dc_id, time_offset, salts):
+        data = b''.join(struct.pack('<iiq', s.valid_since, s.valid_until, s.salt)
+                        for s in salts)
+        self._execute('insert or replace into server_state values (?,?,?)',
+                      dc_id, time_offset, data)
+
+    def get_config(self, name):
+        row = self._execute('select data from configs where name = ? '
+                            'and expires > ?', name, int(time.time()))
+        if row:
+            try:
+                return BinaryReader(row[0]).tgread_object()
+            except TypeNotFoundError:
+                # Saved by a version of the library with a different layer
+                return None
+
+    def set_config(self, name, config, expires):
+        self._execute('insert or replace into configs values (?,?,?)',
+                      name, bytes(config), expires)
+
     def get_update_state(self, entity_id):
         row = self._execute('select pts, qts, date, seq from update_state '
                             'where id = ?', entity_id)
@@ -328,6 +414,19 @@ class SQLiteSession(MemorySession):
         finally:
             c.close()
 
+    def get_cached_username(self, username, max_age):
+        row = self._execute(
+            'select id, hash from entities where username = ? and date >= ? '
+            'order by date desc', username, int(time.time() - max_age))
+        if row:
+            return self._row_to_input_peer(*row)
+
+    def forget_username(self, key):
+        if isinstance(key, int):
+            self._execute('update entities set username = null where id = ?', key)
+        else:
+            self._execute('update entities set username = null where username = ?', key)
+
     def get_entity_rows_by_name(self, name):
         return self._execute(
             'select id, hash from entities where name = ?', name)
@@ -348,21 +447,39 @@ class SQLiteSession(MemorySession):
 
     def get_file(self, md5_digest, file_size, cls):
         row = self._execute(
-            'select id, hash from sent_files '
-            'where md5_digest = ? and file_size = ? and type = ?',
-            md5_digest, file_size, _SentFileType.from_type(cls).value
+            'select id, hash, file_reference from sent_files '
+            'where md5_digest = ? and file_size = ? and type = ? and date >= ?',
+            md5_digest, file_size, _SentFileType.from_type(cls).value,
+            int(time.time() - self.file_cache_ttl)
         )
         if row:
             # Both allowed classes have (id, access_hash) as parameters
-            return cls(row[0], row[1])
+            return cls(row[0], row[1], file_reference=row[2])
 
     def cache_file(self, md5_digest, file_size, instance):
         if not isinstance(instance, (InputDocument, InputPhoto)):
             raise TypeError('Cannot cache %s instance' % type(instance))
 
+        now = int(time.time())
+        c = self._cursor()
+        try:
+            c.execute(
+                'insert or replace into sent_files values (?,?,?,?,?,?,?)', (
+                    md5_digest, file_size,
+                    _SentFileType.from_type(type(instance)).value,
+                    instance.id, instance.access_hash, instance.file_reference, now
+                ))
+
+            # Evict expired entries, and the oldest ones if there are too many
+            c.execute('delete from sent_files where date < ?', (now - self.file_cache_ttl,))
+            c.execute('delete from sent_files where rowid not in '
+                      '(select rowid from sent_files order by date desc limit ?)',
+                      (self.file_cache_size,))
+        finally:
+            c.close()
+
+    def forget_file(self, instance):
         self._execute(
-            'insert or replace into sent_files values (?,?,?,?,?)',
-            md5_digest, file_size,
-            _SentFileType.from_type(type(instance)).value,
-            instance.id, instance.access_hash
+            'delete from sent_files where type = ? and id = ?',
+            _SentFileType.from_type(type(instance)).value, instance.id
         )
@@ -0,0 +1,497 @@
+"""
+This module runs the clients of many accounts spread across several
+worker processes, each with its own event loop, so that all the cores
+of the machine can be used (a single event loop only ever uses one).
+"""
+import asyncio
+import inspect
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+
+from . import helpers
+
+_log = logging.getLogger(__name__)
+
+# In seconds, how often workers check how late their event loop is running.
+_HEARTBEAT = 0.1
+
+
+class WorkerLoad:
+    """
+    How busy a worker process is, as reported by `Supervisor.load`.
+
+    Members:
+        index (`int`):
+            The index of the worker, which can be used to `Supervisor.move`
+            the clients of other workers into it.
+
+        pid (`int`):
+            The process ID of the worker.
+
+        sessions (`list`):
+            The sessions of the clients running in the worker.
+
+        loop_lag (`float`):
+            The most seconds the event loop of the worker was late to run
+            something since its load was last reported. Clients sharing an
+            event loop which is often late will react slower to updates.
+
+        cpu_time (`float`):
+            Seconds of CPU the worker has spent since it started.
+
+        calls (`int`):
+            How many times `Supervisor.call` was used on its clients.
+
+        pending (`int`):
+            How many of those calls are still running.
+    """
+    def __init__(self, index, pid, sessions, loop_lag, cpu_time, calls, pending):
+        self.index = index
+        self.pid = pid
+        self.sessions = sessions
+        self.loop_lag = loop_lag
+        self.cpu_time = cpu_time
+        self.calls = calls
+        self.pending = pending
+
+    def __repr__(self):
+        return '<WorkerLoad {} pid={} clients={} loop_lag={:.3f}s cpu_time={:.1f}s pending={}>'.format(
+            self.index, self.pid, len(self.sessions), self.loop_lag, self.cpu_time, self.pending)
+
+
+class Supervisor:
+    """
+    Runs one client per session, spread across several worker processes.
+
+    Each worker has its own event loop, optionally from ``uvloop``, in
+    which the clients it owns are connected and run. The supervisor can
+    be used from any event loop to start and stop clients, run code with
+    them, and move them to a different worker to balance the load.
+
+    Because the clients live in other processes, the code that runs
+    with them (`setup` and the functions given to `call`) must be
+    defined at the top level of a module so that it can be pickled, as
+    must their arguments and results. Workers are started with the
+    ``'spawn'`` method, so the script creating the supervisor must be
+    guarded by ``if __name__ == '__main__'``.
+
+    Arguments
+        api_id (`int`), api_hash (`str`):
+            Passed to every client.
+
+        workers (`int`, optional):
+            How many worker processes to run. Defaults to the number of
+            cores of the machine.
+
+        client_class (`type`, optional):
+            The class of the clients. Defaults to `TelegramClient
+            <telethon.client.telegramclient.TelegramClient>`.
+
+        client_kwargs (`dict`, optional):
+            Additional keyword arguments passed to every client.
+
+        setup (`callable`, optional):
+            Function (or ``async def``) called with every client after it
+            connects, which can be used for instance to add event handlers.
+
+        use_uvloop (`bool`, optional):
+            Whether the workers should use the (faster) event loop from
+            ``uvloop``, which must be installed.
+
+    Example
+        .. code-block:: python
+
+            from telethon import events
+            from telethon.sharding import Supervisor
+
+            async def echo(event):
+                await event.reply(event.text)
+
+            def setup(client):
+                client.add_event_handler(echo, events.NewMessage)
+
+            async def get_name(client):
+                return (await client.get_me()).first_name
+
+            async def main():
+                async with Supervisor(api_id, api_hash, setup=setup) as supervisor:
+                    await supervisor.start(['account1', 'account2', 'account3'])
+                    print(await supervisor.call('account2', get_name))
+
+                    # Move a client out of the busiest worker
+                    loads = await supervisor.load()
+                    busiest = max(loads, key=lambda w: w.loop_lag)
+                    idlest = min(loads, key=lambda w: w.loop_lag)
+                    if busiest.sessions and busiest is not idlest:
+                        await supervisor.move(busiest.sessions[0], idlest.index)
+
+            if __name__ == '__main__':
+                asyncio.run(main())
+    """
+    def __init__(
+            self,
+            api_id,
+            api_hash,
+            *,
+            workers=None,
+            client_class=None,
+            client_kwargs=None,
+            setup=None,
+            use_uvloop=False
+    ):
+        if use_uvloop:
+            # Fail early (and not in every worker) if it's not installed
+            import uvloop  # noqa: F401
+
+        self._count = workers or os.cpu_count() or 1
+        self._options = dict(
+            api_id=api_id,
+            api_hash=api_hash,
+            client_class=client_class,
+            client_kwargs=client_kwargs or {},
+            setup=setup,
+            use_uvloop=use_uvloop
+        )
+        self._workers = []
+        self._owners = {}  # {session: _WorkerProcess}
+
+    async def start(self, sessions=()):
+        """
+        Starts the worker processes (if they are not running yet), and
+        a client for each of the given sessions (see `add`).
+        """
+        if not self._workers:
+            context = multiprocessing.get_context('spawn')
+            for index in range(self._count):
+                worker = _WorkerProcess(index, context, self._options)
+                worker.start(helpers.get_running_loop())
+                self._workers.append(worker)
+
+        await asyncio.gather(*(self.add(session) for session in sessions))
+
+    async def add(self, session, worker=None):
+        """
+        Starts a client for the given session (usually the name of a
+        session file) in the given worker index, or the worker with the
+        fewest clients if it's `None`, and returns the index of the worker.
+
+        The session must already be logged in, or `ValueError` is raised.
+        """
+        if session in self._owners:
+            raise ValueError('A client for {!r} is already running'.format(session))
+
+        if worker is None:
+            owner = min(self._workers, key=lambda w: len(w.sessions))
+        else:
+            owner = self._workers[worker]
+
+        # Claim it before awaiting so that concurrent adds spread out
+        self._owners[session] = owner
+        owner.sessions.add(session)
+        try:
+            await owner.request('start', session)
+        except BaseException:
+            del self._owners[session]
+            owner.sessions.discard(session)
+            raise
+
+        return owner.index
+
+    async def remove(self, session):
+        """
+        Disconnects and forgets the client of the given session.
+        """
+        owner = self._owner(session)
+        try:
+            await owner.request('stop', session)
+        finally:
+            del self._owners[session]
+            owner.sessions.discard(session)
+
+    async def call(self, session, func, *args, **kwargs):
+        """
+        Calls ``func(client, *args, **kwargs)`` in the worker running the
+        client of the given session and returns its result (awaiting it
+        first if needed). Errors it raises are raised here too.
+        """
+        return await self._owner(session).request('call', session, func, args, kwargs)
+
+    async def move(self, session, worker):
+        """
+        Moves the client of the given session to the given worker index,
+        disconnecting it in the worker that was running it first.
+        """
+        if self._owner(session).index != worker:
+            await self.remove(session)
+            await self.add(session, worker)
+
+    async def load(self):
+        """
+        Returns a `WorkerLoad` with how busy each of the workers is.
+        """
+        return list(await asyncio.gather(*(w.request('load') for w in self._workers)))
+
+    async def stop(self):
+        """
+        Disconnects every client and stops the worker processes.
+        """
+        workers, self._workers = self._workers, []
+        self._owners.clear()
+        await asyncio.gather(*(w.stop() for w in workers))
+
+    def _owner(self, session):
+        try:
+            return self._owners[session]
+        except KeyError:
+            raise ValueError('There is no client running for {!r}'.format(session)) from None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+
+class _WorkerProcess:
+    """
+    The supervisor's end of a worker process, which sends it requests
+    and resolves their futures as the responses are received.
+    """
+    def __init__(self, index, context, options):
+        self.index = index
+        self.sessions = set()
+        self._conn, child_conn = context.Pipe()
+        self._process = context.Process(
+            target=_run_worker, args=(child_conn, index, options),
+            name='telethon-worker-{}'.format(index), daemon=True)
+        self._child_conn = child_conn
+        self._ids = itertools.count()
+        self._pending = {}
+        self._loop = None
+
+    def start(self, loop):
+        self._loop = loop
+        self._process.start()
+        # The child has its own copy, so only its end remains open
+        self._child_conn.close()
+        threading.Thread(target=self._recv_loop, daemon=True,
+                         name='telethon-worker-{}-reader'.format(self.index)).start()
+
+    def _recv_loop(self):
+        # Blocking reads are done in a thread so that the event loop isn't
+        # blocked (and without taking threads from the default executor).
+        while True:
+            try:
+                call_id, ok, data = self._conn.recv()
+            except (EOFError, OSError):
+                break
+
+            # Results are pickled separately so that the errors
+            # unpickling one don't prevent reading the rest.
+            try:
+                result = pickle.loads(data)
+            except Exception as e:
+                ok, result = False, RuntimeError(
+                    'Could not receive result from worker {}: {}'.format(self.index, e))
+
+            self._loop.call_soon_threadsafe(self._on_response, call_id, ok, result)
+
+        self._loop.call_soon_threadsafe(self._on_exit)
+
+    def _on_response(self, call_id, ok, result):
+        future = self._pending.pop(call_id, None)
+        if future and not future.done():
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(result)
+
+    def _on_exit(self):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError('Worker {} exited'.format(self.index)))
+
+    async def request(self, command, *args):
+        if not self._process.is_alive():
+            raise ConnectionError('Worker {} exited'.format(self.index))
+
+        call_id = next(self._ids)
+        future = self._pending[call_id] = self._loop.create_future()
+        try:
+            self._conn.send((call_id, command, args))
+        except BaseException:
+            del self._pending[call_id]
+            raise
+
+        return await future
+
+    async def stop(self):
+        try:
+            await asyncio.wait_for(self.request('shutdown'), 30)
+        except Exception as e:
+            _log.warning('Worker %d did not shut down cleanly: %s', self.index, e)
+
+        await self._loop.run_in_executor(None, self._process.join, 5)
+        if self._process.is_alive():
+            self._process.terminate()
+
+        self._conn.close()
+
+
+def _run_worker(conn, index, options):
+    """
+    Entry point of the worker processes.
+    """
+    if options.pop('use_uvloop'):
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    asyncio.run(_Worker(conn, index, **options).run())
+
+
+class _Worker:
+    """
+    The worker's end, which runs the clients and executes the requests
+    the supervisor sends to it.
+    """
+    def __init__(self, conn, index, api_id, api_hash, client_class, client_kwargs, setup):
+        if client_class is None:
+            from . import TelegramClient as client_class
+
+        self._conn = conn
+        self._index = index
+        self._api_id = api_id
+        self._api_hash = api_hash
+        self._client_class = client_class
+        self._client_kwargs = client_kwargs
+        self._setup = setup
+        self._clients = {}
+        self._tasks = set()
+        self._stopped = None
+        self._lag = 0
+        self._calls = 0
+        self._running = 0
+
+    async def run(self):
+        loop = helpers.get_running_loop()
+        self._stopped = loop.create_future()
+        threading.Thread(target=self._recv_loop, args=(loop,), daemon=True).start()
+        heartbeat = loop.create_task(self._heartbeat())
+        try:
+            await self._stopped
+        finally:
+            await helpers._cancel(_log, heartbeat=heartbeat)
+            for task in self._tasks:
+                task.cancel()
+
+            for client in self._clients.values():
+                await client.disconnect()
+
+        self._reply(*self._stopped.result())
+        self._conn.close()
+
+    def _recv_loop(self, loop):
+        while True:
+            try:
+                message = self._conn.recv()
+            except (EOFError, OSError):
+                # The supervisor is gone, so there's no one to reply to
+                message = (None, 'shutdown', ())
+
+            loop.call_soon_threadsafe(self._dispatch, *message)
+            if message[1] == 'shutdown':
+                break
+
+    def _dispatch(self, call_id, command, args):
+        if command == 'shutdown':
+            if not self._stopped.done():
+                self._stopped.set_result((call_id, True, None))
+            return
+
+        task = helpers.get_running_loop().create_task(self._handle(call_id, command, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, call_id, command, args):
+        try:
+            result = await getattr(self, '_' + command)(*args)
+        except Exception as e:
+            self._reply(call_id, False, e)
+        else:
+            self._reply(call_id, True, result)
+
+    def _reply(self, call_id, ok, result):
+        if call_id is None:
+            return
+        try:
+            data = pickle.dumps(result)
+        except Exception as e:
+            ok, data = False, pickle.dumps(RuntimeError(
+                'Could not send {!r} back from worker {}: {}'.format(result, self._index, e)))
+        try:
+            self._conn.send((call_id, ok, data))
+        except (EOFError, OSError):
+            pass  # the supervisor is gone
+
+    async def _heartbeat(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(_HEARTBEAT)
+            self._lag = max(self._lag, time.perf_counter() - start - _HEARTBEAT)
+
+    async def _start(self, session):
+        client = self._client_class(session, self._api_id, self._api_hash, **self._client_kwargs)
+        await client.connect()
+        try:
+            if not await client.is_user_authorized():
+                raise ValueError('The session {!r} is not logged in'.format(session))
+
+            if self._setup:
+                result = self._setup(client)
+                if inspect.isawaitable(result):
+                    await result
+        except BaseException:
+            await client.disconnect()
+            raise
+
+        self._clients[session] = client
+
+    async def _stop(self, session):
+        client = self._clients.pop(session, None)
+        if client:
+            await client.disconnect()
+
+    async def _call(self, session, func, args, kwargs):
+        try:
+            client = self._clients[session]
+        except KeyError:
+            raise ValueError('There is no client running for {!r}'.format(session)) from None
+
+        self._calls += 1
+        self._running += 1
+        try:
+            result = func(client, *args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            self._running -= 1
+
+    async def _load(self):
+        lag, self._lag = self._lag, 0
+        return WorkerLoad(
+            index=self._index,
+            pid=os.getpid(),
+            sessions=list(self._clients),
+            loop_lag=lag,
+            cpu_time=time.process_time(),
+            calls=self._calls,
+            pending=self._running
+        )
@@ -1,7 +1,7 @@
 from .adminlogevent import AdminLogEvent
 from .draft import Draft
 from .dialog import Dialog
-from .inputsizedfile import InputSizedFile
+from .inputsizedfile import InputSizedFile, InputSizedFileBig
 from .messagebutton import MessageButton
 from .forward import Forward
 from .message import Message
@@ -1,4 +1,4 @@
-from ..types import InputFile
+from ..types import InputFile, InputFileBig
 
 
 class InputSizedFile(InputFile):
@@ -7,3 +7,11 @@ class InputSizedFile(InputFile):
         super().__init__(id_, parts, name, md5.hexdigest())
         self.md5 = md5.digest()
         self.size = size
+
+
+class InputSizedFileBig(InputFileBig):
+    """InputFileBig class with two extra parameters: md5 (digest) and size"""
+    def __init__(self, id_, parts, name, md5, size):
+        super().__init__(id_, parts, name)
+        self.md5 = md5.digest()
+        self.size = size
@@ -9,6 +9,14 @@ from .. import TLObject, types, functions, alltlobjects
 from ... import utils, errors
 
 
+# Attributes that are found from the entities given to `Message._finish_init`,
+# which is only done when any of them is first needed (see `__getattr__`).
+_HYDRATED_ATTRS = frozenset((
+    '_sender', '_input_sender', '_chat', '_input_chat', '_via_bot', '_via_input_bot',
+    '_forward', '_action_entities', '_linked_chat', '_reply_to_chat', '_reply_to_sender'
+))
+
+
 # TODO Figure out a way to have the code generator error on missing fields
 # Maybe parsing the init function alone if that's possible.
 class Message(ChatGetter, SenderGetter, TLObject):
@@ -232,10 +240,8 @@ class Message(ChatGetter, SenderGetter, TLObject):
         self._buttons = None
         self._buttons_flat = None
         self._buttons_count = None
-        self._via_bot = None
-        self._via_input_bot = None
-        self._action_entities = None
-        self._linked_chat = None
+        self._entities = None
+        self._given_input_chat = None
 
         sender_id = None
         if from_id is not None:
@@ -248,19 +254,22 @@ class Message(ChatGetter, SenderGetter, TLObject):
             if post or (not out and isinstance(peer_id, types.PeerUser)):
                 sender_id = utils.get_peer_id(peer_id)
 
-        # Note that these calls would reset the client
-        ChatGetter.__init__(self, peer_id, broadcast=post)
-        SenderGetter.__init__(self, sender_id)
-
-        self._forward = None
-        self._reply_to_chat = None
-        self._reply_to_sender = None
+        # The rest of `ChatGetter` and `SenderGetter` attributes (along with
+        # the others in `_HYDRATED_ATTRS`) are set when first needed.
+        self._chat_peer = peer_id
+        self._broadcast = post
+        self._sender_id = sender_id
+        self._client = None
 
     def _finish_init(self, client, entities, input_chat):
         """
         Finishes the initialization of this message by setting
         the client that sent the message and making use of the
         known entities.
+
+        The entities are only looked up when first needed, so most of
+        the work is deferred. If `entities` is `None`, the sender, chat,
+        etc. will only be found if they are in the client's cache.
         """
         self._client = client
 
@@ -269,53 +278,78 @@ class Message(ChatGetter, SenderGetter, TLObject):
         if self.peer_id == types.PeerUser(client._self_id) and not self.fwd_from:
             self.out = True
 
-        cache = client._mb_entity_cache
+        self._entities = entities
+        self._given_input_chat = input_chat
+
+    def __getattr__(self, name):
+        # Only called for missing attributes, which the hydrated ones are until needed
+        if name not in _HYDRATED_ATTRS:
+            raise AttributeError("'{}' object has no attribute '{}'"
+                                 .format(type(self).__name__, name))
 
-        self._sender, self._input_sender = utils._get_entity_pair(
+        self._hydrate()
+        return self.__dict__[name]
+
+    def _hydrate(self):
+        """
+        Sets all the attributes in `_HYDRATED_ATTRS` that were not set
+        yet, from the entities given to `_finish_init` (if any).
+        """
+        entities = self.__dict__.get('_entities') or {}
+        client = self._client
+        cache = client._mb_entity_cache if client else None
+        values = dict.fromkeys(_HYDRATED_ATTRS)
+
+        values['_sender'], values['_input_sender'] = utils._get_entity_pair(
             self.sender_id, entities, cache)
 
-        self._chat, self._input_chat = utils._get_entity_pair(
+        values['_chat'], values['_input_chat'] = utils._get_entity_pair(
             self.chat_id, entities, cache)
 
-        if input_chat:  # This has priority
-            self._input_chat = input_chat
+        if self._given_input_chat:  # This has priority
+            values['_input_chat'] = self._given_input_chat
 
         if self.via_bot_id:
-            self._via_bot, self._via_input_bot = utils._get_entity_pair(
+            values['_via_bot'], values['_via_input_bot'] = utils._get_entity_pair(
                 self.via_bot_id, entities, cache)
 
         if self.fwd_from:
-            self._forward = Forward(self._client, self.fwd_from, entities)
+            values['_forward'] = Forward(client, self.fwd_from, entities)
 
         if self.action:
             if isinstance(self.action, (types.MessageActionChatAddUser,
                                         types.MessageActionChatCreate)):
-                self._action_entities = [entities.get(i)
-                                         for i in self.action.users]
+                values['_action_entities'] = [entities.get(i)
+                                              for i in self.action.users]
             elif isinstance(self.action, types.MessageActionChatDeleteUser):
-                self._action_entities = [entities.get(self.action.user_id)]
+                values['_action_entities'] = [entities.get(self.action.user_id)]
             elif isinstance(self.action, types.MessageActionChatJoinedByLink):
-                self._action_entities = [entities.get(self.action.inviter_id)]
+                values['_action_entities'] = [entities.get(self.action.inviter_id)]
             elif isinstance(self.action, types.MessageActionChatMigrateTo):
-                self._action_entities = [entities.get(utils.get_peer_id(
+                values['_action_entities'] = [entities.get(utils.get_peer_id(
                     types.PeerChannel(self.action.channel_id)))]
             elif isinstance(
                     self.action, types.MessageActionChannelMigrateFrom):
-                self._action_entities = [entities.get(utils.get_peer_id(
+                values['_action_entities'] = [entities.get(utils.get_peer_id(
                     types.PeerChat(self.action.chat_id)))]
 
         if self.replies and self.replies.channel_id:
-            self._linked_chat = entities.get(utils.get_peer_id(
+            values['_linked_chat'] = entities.get(utils.get_peer_id(
                     types.PeerChannel(self.replies.channel_id)))
-        
+
         if isinstance(self.reply_to, types.MessageReplyHeader):
             if self.reply_to.reply_to_peer_id:
-                self._reply_to_chat = entities.get(utils.get_peer_id(self.reply_to.reply_to_peer_id))
+                values['_reply_to_chat'] = entities.get(utils.get_peer_id(self.reply_to.reply_to_peer_id))
             if self.reply_to.reply_from:
                 if self.reply_to.reply_from.from_id:
-                    self._reply_to_sender = entities.get(utils.get_peer_id(self.reply_to.reply_from.from_id))
+                    values['_reply_to_sender'] = entities.get(utils.get_peer_id(self.reply_to.reply_from.from_id))
 
+        # Values set in the meantime (e.g. by `_reload_message`) are kept
+        for name, value in values.items():
+            self.__dict__.setdefault(name, value)
 
+        # Not needed anymore, so don't keep the entities alive
+        self._entities = None
 
     # endregion Initialization
 
@@ -101,7 +101,7 @@ class MessageButton:
         elif isinstance(self.button, types.KeyboardButtonCallback):
             if password is not None:
                 pwd = await self._client(functions.account.GetPasswordRequest())
-                password = pwd_mod.compute_check(pwd, password)
+                password = await self._client._run_crypto_job(pwd_mod.compute_check, pwd, password)
 
             req = functions.messages.GetBotCallbackAnswerRequest(
                 peer=self._chat, msg_id=self._msg_id, data=self.button.data,
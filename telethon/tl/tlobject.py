@@ -31,7 +31,46 @@ def _json_default(value):
         return repr(value)
 
 
+# Used by the generated ``_write_json`` of every `TLObject`, which must
+# produce the same JSON as `TLObject.to_json` (but without the spaces).
+_json_str = json.encoder.encode_basestring_ascii
+_json_dumps = json.JSONEncoder(default=_json_default, separators=(',', ':')).encode
+
+
+def _json_bytes(value):
+    if isinstance(value, bytes):
+        return '"' + base64.b64encode(value).decode('ascii') + '"'
+    return _json_dumps(value)
+
+
+def _json_date(value):
+    if isinstance(value, datetime):
+        return '"' + value.isoformat() + '"'
+    return _json_dumps(value)
+
+
+def _json_value(w, value):
+    if value is None:
+        w('null')
+    elif isinstance(value, TLObject):
+        value._write_json(w)
+    elif isinstance(value, list):
+        _json_list(w, value)
+    else:
+        w(_json_dumps(value))
+
+
+def _json_list(w, values):
+    sep = '['
+    for value in values or ():
+        w(sep)
+        sep = ','
+        _json_value(w, value)
+    w(']' if sep == ',' else '[]')
+
+
 class TLObject:
+    __slots__ = ()
     CONSTRUCTOR_ID = None
     SUBCLASS_OF_ID = None
 
@@ -161,7 +200,7 @@ class TLObject:
         return isinstance(o, type(self)) and self.to_dict() == o.to_dict()
 
     def __ne__(self, o):
-        return not isinstance(o, type(self)) or self.to_dict() != o.to_dict()
+        return not self == o
 
     def __str__(self):
         return TLObject.pretty_format(self)
@@ -189,6 +228,13 @@ class TLObject:
         else:
             return json.dumps(d, default=default, **kwargs)
 
+    def _write_json(self, w):
+        """
+        Writes the JSON of this object in pieces through ``w``. The
+        generated classes write their fields directly, without `to_dict`.
+        """
+        w(_json_dumps(self.to_dict()))
+
     def __bytes__(self):
         try:
             return self._bytes()
@@ -214,6 +260,8 @@ class TLRequest(TLObject):
     """
     Represents a content-related `TLObject` (a request that can be sent).
     """
+    __slots__ = ()
+
     @staticmethod
     def read_result(reader):
         return reader.tgread_object()
@@ -1 +1,11 @@
-from .tl.types import *
+from .tl import types as _types
+
+
+# Members are looked up lazily so that importing this module doesn't
+# import every class (as ``from .tl.types import *`` would do).
+def __getattr__(name):
+    return getattr(_types, name)
+
+
+def __dir__():
+    return dir(_types)
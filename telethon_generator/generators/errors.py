@@ -17,6 +17,7 @@ def generate_errors(errors, f):
             exact_match.append(error)
 
     # Imports and new subclass creation
+    f.write('import re\n\n')
     f.write('from .rpcbaseerrors import RPCError, {}\n'
             .format(", ".join(sorted(import_base))))
 
@@ -58,3 +59,16 @@ def generate_errors(errors, f):
     for error in regex_match:
         f.write('    ({}, {}),\n'.format(repr(error.pattern), error.name))
     f.write(')\n')
+
+    # Alternation of all the patterns above, tried in the same order, so
+    # that classifying an error takes a single match. Each capture group
+    # is named after its class so `Match.lastgroup` tells which one hit.
+    f.write('\n# Matches any of the above, naming the capture after its class\n')
+    f.write('rpc_errors_re_combined = re.compile(\n')
+    for i, error in enumerate(regex_match):
+        f.write('    {}\n'.format(repr(('|' if i else '') + error.pattern.replace(
+            r'(\d+)', r'(?P<{}>\d+)'.format(error.name), 1))))
+    f.write(')\n\nrpc_errors_re_classes = {\n')
+    for error in regex_match:
+        f.write('    {}: {},\n'.format(repr(error.name), error.name))
+    f.write('}\n')
@@ -1,4 +1,5 @@
 import functools
+import itertools
 import os
 import re
 import shutil
@@ -47,116 +48,223 @@ NAMED_BLACKLIST = {
     'messages.discardEncryption'
 }
 
+# Attributes the library sets on instances of these types (by result
+# type) besides their fields, which need to be part of their `__slots__`.
+EXTRA_SLOTS = {
+    'User': ('participant',),
+    'Update': ('_entities', '_self_outgoing'),
+    'Updates': ('_entities', '_self_outgoing'),
+}
+
+# Types (by result type) which are used to identify something and are
+# not meant to be modified, so they can be hashed (i.e. used as keys).
+HASHABLE_TYPES = {'Peer', 'InputPeer', 'InputUser', 'InputChannel'}
+
 BASE_TYPES = ('string', 'bytes', 'int', 'long', 'int128',
               'int256', 'double', 'Bool', 'true', 'date')
 
 
+def _get_module_name(tlobject):
+    """
+    Gets the name of the private module where the class for the given
+    `TLObject` is defined. Constructors of the same type (which tend to
+    be used together) share a module, while every request has its own.
+    """
+    name = tlobject.fullname if tlobject.is_function else tlobject.result
+    return '_' + name.replace('.', '__').lower()
+
+
 def _write_modules(
         out_dir, depth, kind, namespace_tlobjects, type_constructors):
     # namespace_tlobjects: {'namespace', [TLObject]}
     out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Classes are defined in private modules, which the public namespace
+    # modules only import once one of their classes is first used.
+    module_tlobjects = defaultdict(list)
+    for tlobjects in namespace_tlobjects.values():
+        for t in tlobjects:
+            module_tlobjects[_get_module_name(t)].append(t)
+
+    for module, tlobjects in module_tlobjects.items():
+        names = {t.fullname if t.is_function else t.result for t in tlobjects}
+        if len(names) != 1:
+            raise ValueError('{} would be defined in the same module {}'
+                             .format(', '.join(sorted(names)), module))
+
+        file = out_dir / '{}.py'.format(module)
+        with file.open('w') as f, SourceBuilder(f) as builder:
+            _write_class_module(builder, depth, kind, tlobjects,
+                                type_constructors)
+
     for ns, tlobjects in namespace_tlobjects.items():
         file = out_dir / '{}.py'.format(ns or '__init__')
         with file.open('w') as f, SourceBuilder(f) as builder:
-            builder.writeln(AUTO_GEN_NOTICE)
-
-            builder.writeln('from {}.tl.tlobject import TLObject', '.' * depth)
-            if kind != 'TLObject':
-                builder.writeln(
-                    'from {}.tl.tlobject import {}', '.' * depth, kind)
-
-            builder.writeln('from typing import Optional, List, '
-                            'Union, TYPE_CHECKING')
-
-            # Add the relative imports to the namespaces,
-            # unless we already are in a namespace.
-            if not ns:
-                builder.writeln('from . import {}', ', '.join(sorted(
-                    x for x in namespace_tlobjects.keys() if x
-                )))
-
-            # Import 'os' for those needing access to 'os.urandom()'
-            # Currently only 'random_id' needs 'os' to be imported,
-            # for all those TLObjects with arg.can_be_inferred.
-            builder.writeln('import os')
-
-            # Import struct for the .__bytes__(self) serialization
-            builder.writeln('import struct')
-
-            # Import datetime for type hinting
-            builder.writeln('from datetime import datetime')
-
-            tlobjects.sort(key=lambda x: x.name)
-
-            type_names = set()
-            type_defs = []
-
-            # Find all the types in this file and generate type definitions
-            # based on the types. The type definitions are written to the
-            # file at the end.
-            for t in tlobjects:
-                if not t.is_function:
-                    type_name = t.result
-                    if '.' in type_name:
-                        type_name = type_name[type_name.rindex('.'):]
-                    if type_name in type_names:
-                        continue
-                    type_names.add(type_name)
-                    constructors = type_constructors[type_name]
-                    if not constructors:
-                        pass
-                    elif len(constructors) == 1:
-                        type_defs.append('Type{} = {}'.format(
-                            type_name, constructors[0].class_name))
-                    else:
-                        type_defs.append('Type{} = Union[{}]'.format(
-                            type_name, ','.join(c.class_name
-                                                for c in constructors)))
-
-            imports = {}
-            primitives = {'int', 'long', 'int128', 'int256', 'double',
-                          'string', 'date', 'bytes', 'Bool', 'true'}
-            # Find all the types in other files that are used in this file
-            # and generate the information required to import those types.
-            for t in tlobjects:
-                for arg in t.args:
-                    name = arg.type
-                    if not name or name in primitives:
-                        continue
-
-                    import_space = '{}.tl.types'.format('.' * depth)
-                    if '.' in name:
-                        namespace = name.split('.')[0]
-                        name = name.split('.')[1]
-                        import_space += '.{}'.format(namespace)
-
-                    if name not in type_names:
-                        type_names.add(name)
-                        if name == 'date':
-                            imports['datetime'] = ['datetime']
-                            continue
-                        elif import_space not in imports:
-                            imports[import_space] = set()
-                        imports[import_space].add('Type{}'.format(name))
-
-            # Add imports required for type checking
-            if imports:
-                builder.writeln('if TYPE_CHECKING:')
-                for namespace, names in imports.items():
-                    builder.writeln('from {} import {}',
-                                    namespace, ', '.join(sorted(names)))
+            _write_namespace_module(builder, ns, namespace_tlobjects,
+                                    tlobjects, type_constructors)
 
-                builder.end_block()
 
-            # Generate the class for every TLObject
-            for t in tlobjects:
-                _write_source_code(t, kind, builder, type_constructors)
-                builder.current_indent = 0
+def _get_type_defs(tlobjects, type_constructors):
+    """
+    Gets the ``Type`` definitions (as ``{name: definition}``)
+    for the types that the given constructors belong to.
+    """
+    type_defs = {}
+    for t in tlobjects:
+        # Only types outside of namespaces get a definition
+        if t.is_function or '.' in t.result:
+            continue
+
+        name = 'Type{}'.format(t.result)
+        constructors = type_constructors[t.result]
+        if name in type_defs or not constructors:
+            continue
+        elif len(constructors) == 1:
+            type_defs[name] = constructors[0].class_name
+        else:
+            type_defs[name] = 'Union[{}]'.format(
+                ','.join(c.class_name for c in constructors))
+
+    return type_defs
+
 
-            # Write the type definitions generated earlier.
-            builder.writeln()
-            for line in type_defs:
-                builder.writeln(line)
+def _write_class_module(builder, depth, kind, tlobjects, type_constructors):
+    builder.writeln(AUTO_GEN_NOTICE)
+
+    builder.writeln('from {}.tl.tlobject import TLObject, _json_str, '
+                    '_json_bytes, _json_date, _json_value, _json_list', '.' * depth)
+    if kind != 'TLObject':
+        builder.writeln(
+            'from {}.tl.tlobject import {}', '.' * depth, kind)
+
+    builder.writeln('from typing import Optional, List, '
+                    'Union, TYPE_CHECKING')
+
+    # Import 'os' for those needing access to 'os.urandom()'
+    # Currently only 'random_id' needs 'os' to be imported,
+    # for all those TLObjects with arg.can_be_inferred.
+    builder.writeln('import os')
+
+    # Import struct for the .__bytes__(self) serialization
+    builder.writeln('import struct')
+
+    # Import datetime for type hinting
+    builder.writeln('from datetime import datetime')
+
+    tlobjects.sort(key=lambda x: x.name)
+
+    # The type definitions are written to the file at the end.
+    type_defs = _get_type_defs(tlobjects, type_constructors)
+    type_names = set(type_defs)
+
+    imports = {}
+    primitives = {'int', 'long', 'int128', 'int256', 'double',
+                  'string', 'date', 'bytes', 'Bool', 'true'}
+    # Find all the types in other files that are used in this file
+    # and generate the information required to import those types.
+    for t in tlobjects:
+        for arg in t.args:
+            name = arg.type
+            if not name or name in primitives:
+                continue
+
+            import_space = '{}.tl.types'.format('.' * depth)
+            if '.' in name:
+                namespace = name.split('.')[0]
+                name = name.split('.')[1]
+                import_space += '.{}'.format(namespace)
+
+            name = 'Type{}'.format(name)
+            if name not in type_names:
+                type_names.add(name)
+                imports.setdefault(import_space, set()).add(name)
+
+    # Add imports required for type checking
+    if imports:
+        builder.writeln('if TYPE_CHECKING:')
+        for namespace, names in imports.items():
+            builder.writeln('from {} import {}',
+                            namespace, ', '.join(sorted(names)))
+
+        builder.end_block()
+
+    # Generate the class for every TLObject
+    for t in tlobjects:
+        _write_source_code(t, kind, builder, type_constructors)
+        builder.current_indent = 0
+
+    # Write the type definitions generated earlier.
+    builder.writeln()
+    for name, definition in type_defs.items():
+        builder.writeln('{} = {}', name, definition)
+
+
+def _write_namespace_module(
+        builder, ns, namespace_tlobjects, tlobjects, type_constructors):
+    builder.writeln(AUTO_GEN_NOTICE)
+    builder.writeln('import importlib')
+    builder.writeln('from typing import TYPE_CHECKING')
+
+    # Add the relative imports to the namespaces,
+    # unless we already are in a namespace.
+    namespaces = []
+    if not ns:
+        namespaces = sorted(x for x in namespace_tlobjects.keys() if x)
+        builder.writeln('from . import {}', ', '.join(namespaces))
+
+    tlobjects.sort(key=lambda x: x.name)
+
+    # {name: module} for every class and type definition in this namespace
+    modules = {}
+    for t in tlobjects:
+        module = _get_module_name(t)
+        modules[t.class_name] = module
+        for name in _get_type_defs([t], type_constructors):
+            modules[name] = module
+
+    builder.writeln()
+    builder.writeln('# The private module defining each of the members')
+    builder.writeln('_modules = {')
+    for name, module in modules.items():
+        builder.writeln('    {!r}: {!r},', name, '.' + module)
+    builder.writeln('}')
+    builder.writeln()
+
+    builder.writeln('__all__ = [')
+    for name in itertools.chain(namespaces, modules):
+        builder.writeln('    {!r},', name)
+    builder.writeln(']')
+    builder.writeln()
+
+    # Let type checkers and IDEs know about the members
+    builder.writeln('if TYPE_CHECKING:')
+    by_module = defaultdict(list)
+    for name, module in modules.items():
+        by_module[module].append(name)
+    for module, names in by_module.items():
+        builder.writeln('from .{} import {}', module, ', '.join(names))
+    builder.end_block()
+
+    builder.writeln()
+    builder.writeln('def __getattr__(name):')
+    builder.writeln('try:')
+    builder.writeln('module = _modules[name]')
+    builder.current_indent -= 1
+    builder.writeln('except KeyError:')
+    builder.writeln('raise AttributeError('
+                    "'module {!r} has no attribute {!r}'"
+                    '.format(__name__, name)) from None')
+    builder.current_indent -= 1
+    builder.writeln()
+    builder.writeln('# Cache it so that this is only called once per name')
+    builder.writeln('value = globals()[name] = getattr('
+                    'importlib.import_module(module, __package__), name)')
+    builder.writeln('return value')
+    builder.end_block()
+    builder.writeln()
+    builder.writeln('def __dir__():')
+    builder.writeln('return sorted({*globals(), *_modules})')
+    builder.end_block()
 
 
 def _write_source_code(tlobject, kind, builder, type_constructors):
@@ -171,6 +279,8 @@ def _write_source_code(tlobject, kind, builder, type_constructors):
     _write_class_init(tlobject, kind, type_constructors, builder)
     _write_resolve(tlobject, builder)
     _write_to_dict(tlobject, builder)
+    _write_to_json(tlobject, builder)
+    _write_eq(tlobject, builder)
     _write_to_bytes(tlobject, builder)
     _write_from_reader(tlobject, builder)
     _write_read_result(tlobject, builder)
@@ -185,6 +295,20 @@ def _write_class_init(tlobject, kind, type_constructors, builder):
     builder.writeln('CONSTRUCTOR_ID = {:#x}', tlobject.id)
     builder.writeln('SUBCLASS_OF_ID = {:#x}',
                     crc32(tlobject.result.encode('ascii')))
+
+    # The class is defined in a private module, but it belongs (and
+    # should be pickled as belonging) to its public namespace module.
+    if tlobject.namespace:
+        builder.writeln("__module__ = __package__ + '.{}'", tlobject.namespace)
+    else:
+        builder.writeln('__module__ = __package__')
+
+    # Generated classes only hold their fields (and the few attributes
+    # the library sets on them), so don't give them an instance __dict__.
+    slots = [a.name for a in tlobject.real_args]
+    slots.extend(EXTRA_SLOTS.get(tlobject.result, ()))
+    builder.writeln('__slots__ = ({}{})', ', '.join(map(repr, slots)),
+                    ',' if len(slots) == 1 else '')
     builder.writeln()
 
     # Convert the args to string parameters, those with flag having =None
@@ -320,6 +444,90 @@ def _write_to_dict(tlobject, builder):
     builder.end_block()
 
 
+def _write_to_json(tlobject, builder):
+    # Writes the same JSON as `to_json` (without spaces) in pieces through
+    # ``w`` (usually ``list.append``), which is a lot cheaper than building
+    # the `to_dict` first when dumping many objects. Vectors of objects and
+    # values that are not base types may hold anything, as with `to_dict`.
+    builder.writeln('def _write_json(self, w):')
+
+    # Consecutive base types are concatenated and written at once
+    pieces = ["'{{\"_\":\"{}\"'".format(tlobject.class_name)]
+
+    def flush():
+        if pieces:
+            builder.writeln('w({})', ' + '.join(pieces))
+            pieces.clear()
+
+    for arg in tlobject.real_args:
+        key = "',\"{}\":'".format(arg.name)
+        value = 'self.{}'.format(arg.name)
+        if arg.type not in BASE_TYPES:
+            flush()
+            builder.writeln('if {} is None:', value)
+            builder.writeln("w({})", key[:-1] + ("[]'" if arg.is_vector else "null'"))
+            builder.current_indent -= 1
+            builder.writeln('else:')
+            builder.writeln('w({})', key)
+            builder.writeln('{}(w, {})', '_json_list' if arg.is_vector else '_json_value', value)
+            builder.current_indent -= 1
+            continue
+
+        pieces.append(key)
+        if arg.is_vector:
+            if arg.type in ('int', 'long'):
+                pieces.append("'[' + ','.join(map(str, {} or ())) + ']'".format(value))
+            elif arg.type == 'string':
+                pieces.append("'[' + ','.join(map(_json_str, {} or ())) + ']'".format(value))
+            else:
+                flush()
+                builder.writeln('_json_list(w, {})', value)
+        elif arg.type in ('int', 'long', 'int128', 'int256'):
+            pieces.append("('null' if {0} is None else str({0}))".format(value))
+        elif arg.type == 'string':
+            pieces.append("('null' if {0} is None else _json_str({0}))".format(value))
+        elif arg.type in ('Bool', 'true'):
+            pieces.append("('null' if {0} is None else 'true' if {0} else 'false')".format(value))
+        elif arg.type == 'bytes':
+            pieces.append('_json_bytes({})'.format(value))
+        elif arg.type == 'date':
+            pieces.append('_json_date({})'.format(value))
+        else:
+            flush()
+            builder.writeln('_json_value(w, {})', value)
+
+    pieces.append("'}'")
+    flush()
+    builder.end_block()
+
+
+def _write_eq(tlobject, builder):
+    # Comparing the fields directly is a lot cheaper than comparing
+    # the result of `to_dict`, which is what `TLObject.__eq__` does.
+    # Vectors are compared as in `to_dict`, where `None` becomes `[]`.
+    fields = [
+        '(self.{0} or []) == (other.{0} or [])' if a.is_vector
+        else 'self.{0} == other.{0}'
+        for a in tlobject.real_args
+    ]
+    builder.writeln('def __eq__(self, other):')
+    builder.writeln('return {}', ' and '.join(
+        ['isinstance(other, type(self))']
+        + [f.format(a.name) for f, a in zip(fields, tlobject.real_args)]
+    ))
+    builder.end_block()
+
+    if tlobject.result in HASHABLE_TYPES:
+        builder.writeln('def __hash__(self):')
+        values = ['{:#x}'.format(tlobject.id)] + [
+            ('tuple(self.{} or ())' if a.is_vector else 'self.{}').format(a.name)
+            for a in tlobject.real_args
+        ]
+        builder.writeln('return hash(({}{}))', ', '.join(values),
+                        ',' if len(values) == 1 else '')
+        builder.end_block()
+
+
 def _write_to_bytes(tlobject, builder):
     builder.writeln('def _bytes(self):')
 
@@ -655,6 +863,8 @@ def _write_all_tlobjects(tlobjects, layer, builder):
     builder.writeln(AUTO_GEN_NOTICE)
     builder.writeln()
 
+    builder.writeln('import importlib')
+    builder.writeln()
     builder.writeln('from . import types, functions')
     builder.writeln()
 
@@ -662,23 +872,70 @@ def _write_all_tlobjects(tlobjects, layer, builder):
     builder.writeln('LAYER = {}', layer)
     builder.writeln()
 
-    # Then create the dictionary containing constructor_id: class
-    builder.writeln('tlobjects = {')
+    # Then create the dictionary containing constructor_id: (module, name)
+    builder.writeln('# Where the class for every constructor ID can be found')
+    builder.writeln('_tlobject_names = {')
     builder.current_indent += 1
 
-    # Fill the dictionary (0x1a2b3c4f: tl.full.type.path.Class)
+    # Fill the dictionary (0x1a2b3c4f: ('.tl.full.type.path', 'Class'))
     tlobjects.sort(key=lambda x: x.name)
     for tlobject in tlobjects:
-        builder.write('{:#010x}: ', tlobject.id)
-        builder.write('functions' if tlobject.is_function else 'types')
-
+        module = '.functions' if tlobject.is_function else '.types'
         if tlobject.namespace:
-            builder.write('.{}', tlobject.namespace)
+            module += '.' + tlobject.namespace
 
-        builder.writeln('.{},', tlobject.class_name)
+        builder.writeln('{:#010x}: ({!r}, {!r}),',
+                        tlobject.id, module, tlobject.class_name)
 
     builder.current_indent -= 1
     builder.writeln('}')
+    builder.writeln()
+    builder.writeln()
+
+    # The classes are looked up through their namespace module (and
+    # not the private module they're in) to respect patched classes.
+    builder.writeln('class _TLObjects(dict):')
+    builder.writeln('"""')
+    builder.writeln('Dictionary from constructor ID to class, which')
+    builder.writeln('imports each class the first time it is needed.')
+    builder.writeln('"""')
+    builder.writeln('def __missing__(self, constructor_id):')
+    builder.writeln('module, name = _tlobject_names[constructor_id]')
+    builder.writeln('cls = self[constructor_id] = getattr('
+                    'importlib.import_module(module, __package__), name)')
+    builder.writeln('return cls')
+    builder.end_block()
+    builder.writeln('def get(self, constructor_id, default=None):')
+    builder.writeln('try:')
+    builder.writeln('return self[constructor_id]')
+    builder.current_indent -= 1
+    builder.writeln('except KeyError:')
+    builder.writeln('return default')
+    builder.current_indent -= 1
+    builder.end_block()
+    builder.writeln('def __contains__(self, constructor_id):')
+    builder.writeln('return constructor_id in _tlobject_names '
+                    'or dict.__contains__(self, constructor_id)')
+    builder.end_block()
+    builder.writeln('def _load_all(self):')
+    builder.writeln('for constructor_id in _tlobject_names:')
+    builder.writeln('self[constructor_id]')
+    builder.current_indent -= 1
+    builder.writeln('return self')
+    builder.end_block()
+
+    # Anything else needs every class, so they're all imported
+    for method, args in (('__iter__', ''), ('__len__', ''), ('__eq__', 'other'),
+                         ('__repr__', ''), ('keys', ''), ('values', ''),
+                         ('items', ''), ('copy', '')):
+        builder.writeln('def {}({}):', method, ', '.join(filter(None, ('self', args))))
+        builder.writeln('return dict.{}({})', method,
+                        ', '.join(filter(None, ('self._load_all()', args))))
+        builder.end_block()
+
+    builder.current_indent = 0
+    builder.writeln()
+    builder.writeln('tlobjects = _TLObjects()')
 
 
 def generate_tlobjects(tlobjects, layer, import_depth, output_dir):
@@ -0,0 +1,49 @@
+"""
+Benchmarks `telethon.errors.rpc_message_to_error` over every error in
+``errors.csv``, comparing the combined pattern against trying every
+pattern in a loop. Run with ``python -m tests.benchmarks.bench_errors``.
+"""
+import re
+import timeit
+from pathlib import Path
+
+from telethon import errors
+from telethon.tl.types import RpcError
+from telethon_generator.parsers import parse_errors
+
+ERRORS_CSV = Path(__file__).parents[2] / 'telethon_generator/data/errors.csv'
+
+
+def loop_classify(rpc_error, request):
+    cls = errors.rpc_errors_dict.get(rpc_error.error_message.upper(), None)
+    if cls:
+        return cls(request=request)
+
+    for msg_regex, cls in errors.rpc_errors_re:
+        m = re.match(msg_regex, rpc_error.error_message)
+        if m:
+            return cls(request=request, capture=int(m.group(1)))
+
+    cls = errors.base_errors.get(abs(rpc_error.error_code), errors.RPCError)
+    return cls(request=request, message=rpc_error.error_message,
+               code=rpc_error.error_code)
+
+
+def main():
+    rpc_errors = [
+        RpcError(e.int_code, e.str_code.replace('_X', '_30'))
+        for e in parse_errors(ERRORS_CSV)
+    ]
+    captured = [e for e in rpc_errors if e.error_message not in errors.rpc_errors_dict]
+    print('{} errors, {} with captures'.format(len(rpc_errors), len(captured)))
+
+    for name, errs in (('all', rpc_errors), ('captured', captured)):
+        for func in (loop_classify, errors.rpc_message_to_error):
+            number = max(1, 200000 // len(errs))
+            t = timeit.timeit(lambda: [func(e, None) for e in errs], number=number)
+            print('{:>9} {:>20}: {:.2f}us per error'.format(
+                name, func.__name__, t / (number * len(errs)) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
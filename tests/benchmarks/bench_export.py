@@ -0,0 +1,62 @@
+"""
+Benchmarks dumping messages (with entities, media and reply headers) as
+JSON lines with `telethon.export`, which writes the JSON straight from
+their fields, against ``to_json()``, which builds ``to_dict()`` first,
+as well as dumping only some of their fields.
+Run with ``python -m tests.benchmarks.bench_export``.
+"""
+import asyncio
+import datetime
+import io
+import timeit
+
+from telethon import export
+from telethon.tl import types
+
+COUNT = 10000
+NUMBER = 3
+DATE = datetime.datetime.now(tz=datetime.timezone.utc)
+FIELDS = ['id', 'date', 'from_id', 'message']
+
+
+def make_message(i):
+    return types.Message(
+        id=i,
+        peer_id=types.PeerChannel(10),
+        date=DATE,
+        message='Message number {} with **some** text'.format(i),
+        from_id=types.PeerUser(i % 50),
+        reply_to=types.MessageReplyHeader(reply_to_msg_id=i - 1) if i % 3 else None,
+        entities=[types.MessageEntityBold(15, 4), types.MessageEntityUrl(20, 10)],
+        media=types.MessageMediaPhoto(photo=types.Photo(
+            id=i, access_hash=i, file_reference=b'\x01' * 16, date=DATE, dc_id=2, sizes=[
+                types.PhotoSize('m', 320, 240, 10000),
+                types.PhotoSize('x', 800, 600, 50000),
+            ])) if i % 5 == 0 else None,
+        views=i * 10,
+    )
+
+
+def main():
+    messages = [make_message(i) for i in range(COUNT)]
+
+    def to_json():
+        fp = io.StringIO()
+        for message in messages:
+            fp.write(message.to_json())
+            fp.write('\n')
+
+    def write_json_lines(fields=None):
+        asyncio.run(export.write_json_lines(messages, io.StringIO(), fields=fields))
+
+    for name, func in (
+            ('to_json', to_json),
+            ('write_json_lines', write_json_lines),
+            ('write_json_lines (fields)', lambda: write_json_lines(FIELDS)),
+    ):
+        t = min(timeit.repeat(func, number=1, repeat=NUMBER))
+        print('{:>26}: {:6.2f}us per message'.format(name, t / COUNT * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmarks `Message._finish_init` over pages of history, as returned by
+``messages.getHistory``, along with the peer comparison it makes for
+every message, using the generated ``__eq__`` against the generic
+`TLObject.__eq__` (which compares the result of ``to_dict``), and
+the cost of finding the entities once they are needed.
+Run with ``python -m tests.benchmarks.bench_finish_init``.
+"""
+import datetime
+import timeit
+
+from telethon import TelegramClient, utils
+from telethon._updates import EntityCache
+from telethon.tl import TLObject, types
+
+PAGES = 100
+PAGE_SIZE = 100
+DATE = datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+class Client(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        self._mb_entity_cache = EntityCache()
+        self._mb_entity_cache.set_self_user(1, False, 1)
+
+
+def make_page(offset):
+    users = [types.User(id=i, access_hash=i, first_name='User') for i in range(2, 12)]
+    chat = types.Channel(id=10, title='Chat', photo=types.ChatPhotoEmpty(), date=DATE, access_hash=10)
+    messages = [
+        types.Message(
+            id=offset + i,
+            peer_id=types.PeerChannel(10),
+            date=DATE,
+            message='Message {}'.format(i),
+            from_id=types.PeerUser(users[i % len(users)].id),
+            reply_to=types.MessageReplyHeader(reply_to_msg_id=offset + i - 1) if i % 3 else None,
+        )
+        for i in range(PAGE_SIZE)
+    ]
+    entities = {utils.get_peer_id(x): x for x in users + [chat]}
+    return messages, entities, utils.get_input_peer(chat)
+
+
+def main():
+    client = Client()
+    pages = [make_page(p * PAGE_SIZE) for p in range(PAGES)]
+    n = PAGES * PAGE_SIZE
+
+    def finish_init():
+        for messages, entities, input_chat in pages:
+            for message in messages:
+                message._finish_init(client, entities, input_chat)
+
+    def finish_init_and_hydrate():
+        for messages, entities, input_chat in pages:
+            for message in messages:
+                message._finish_init(client, entities, input_chat)
+                message.sender
+
+    peers = (types.PeerUser, types.PeerChat, types.PeerChannel)
+    generated = {cls: cls.__eq__ for cls in peers}
+    for name in ('generated', 'to_dict'):
+        for cls in peers:
+            cls.__eq__ = generated[cls] if name == 'generated' else TLObject.__eq__
+
+        a, b = types.PeerUser(2), types.PeerUser(1)
+        t = min(timeit.repeat(lambda: a == b, number=n, repeat=5))
+        print('{:>10} __eq__: {:6.3f}us per comparison'.format(name, t / n * 1e6))
+
+        t = min(timeit.repeat(finish_init, number=1, repeat=5))
+        print('{:>10} _finish_init: {:6.2f}us per message ({} pages of {})'
+              .format(name, t / n * 1e6, PAGES, PAGE_SIZE))
+
+    for cls in peers:
+        cls.__eq__ = generated[cls]
+
+    # Entities are only looked up once first needed (here, to get the sender),
+    # so new messages are used to make sure they have not been looked up yet
+    pages[:] = [make_page(p * PAGE_SIZE) for p in range(PAGES)]
+    t = timeit.timeit(finish_init_and_hydrate, number=1)
+    print('{:>10} _finish_init: {:6.2f}us per message (and getting the sender)'
+          .format('hydrated', t / n * 1e6))
+
+
+if __name__ == '__main__':
+    main()
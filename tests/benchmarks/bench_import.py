@@ -0,0 +1,48 @@
+"""
+Benchmarks the cold start of the library: the time it takes to
+``import telethon`` and the peak memory (RSS) of the process after,
+as well as after deserializing a message and after loading every class
+(which is roughly what importing the library used to cost).
+Run with ``python -m tests.benchmarks.bench_import``.
+"""
+import subprocess
+import sys
+
+SCRIPT = '''
+import resource, time
+start = time.perf_counter()
+import telethon
+took = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+from telethon.extensions import BinaryReader
+from telethon.tl.alltlobjects import tlobjects
+data = bytes(telethon.types.Message(1, telethon.types.PeerUser(1), None, 'hi'))
+start = time.perf_counter()
+BinaryReader(data).tgread_object()
+first_read = time.perf_counter() - start
+read_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+start = time.perf_counter()
+len(tlobjects)
+load_all = time.perf_counter() - start
+all_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(took, rss, first_read, read_rss, load_all, all_rss)
+'''
+
+
+def main(runs=5):
+    results = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', SCRIPT], check=True,
+                             stdout=subprocess.PIPE, universal_newlines=True)
+        results.append([float(x) for x in out.stdout.split()])
+
+    best = [min(r[i] for r in results) for i in range(6)]
+    print('import telethon:     {:7.1f}ms {:7.1f}MiB'.format(best[0] * 1e3, best[1] / 1024))
+    print('first message read:  {:7.1f}ms {:7.1f}MiB'.format(best[2] * 1e3, best[3] / 1024))
+    print('load every class:    {:7.1f}ms {:7.1f}MiB'.format(best[4] * 1e3, best[5] / 1024))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmarks how long the event loop is blocked while many accounts log in
+at the same time, each checking its 2FA password (`compute_check`) and
+creating an authorization key (factorizing ``pq`` and the Diffie-Hellman
+exponentiations), when running these steps in the event loop itself as
+opposed to running them in a thread or process pool executor.
+Run with ``python -m tests.benchmarks.bench_login``.
+"""
+import asyncio
+import concurrent.futures
+import os
+import time
+
+from telethon import password as pwd_mod
+from telethon.crypto import Factorization
+from telethon.network import authenticator
+from telethon.tl import types
+
+ACCOUNTS = 20
+HEARTBEAT = 0.001
+
+# The example from https://core.telegram.org/mtproto/samples-auth_key
+PQ = 0x17ED48941A08F981
+PRIME = int.from_bytes(pwd_mod._GOOD_PRIME, 'big')
+
+
+def make_password():
+    return types.account.Password(
+        new_algo=types.PasswordKdfAlgoUnknown(),
+        new_secure_algo=types.SecurePasswordKdfAlgoUnknown(),
+        secure_random=os.urandom(32),
+        has_password=True,
+        current_algo=types.PasswordKdfAlgoSHA256SHA256PBKDF2HMACSHA512iter100000SHA256ModPow(
+            salt1=os.urandom(32), salt2=os.urandom(32), g=3, p=pwd_mod._GOOD_PRIME),
+        srp_B=pow(3, int.from_bytes(os.urandom(256), 'big'), PRIME).to_bytes(256, 'big'),
+        srp_id=1
+    )
+
+
+async def login(executor, inline):
+    loop = asyncio.get_running_loop()
+    g_a = pow(3, int.from_bytes(os.urandom(256), 'big'), PRIME)
+    b = int.from_bytes(os.urandom(256), 'big')
+
+    async def run(func, *args):
+        await asyncio.sleep(0)  # the network round-trip in between steps
+        if inline:
+            return func(*args)
+        return await loop.run_in_executor(executor, func, *args)
+
+    await run(Factorization.factorize, PQ)
+    await run(authenticator._dh_exchange, 3, g_a, b, PRIME)
+    await run(pwd_mod.compute_check, make_password(), 'hunter2')
+
+
+async def measure(executor, inline):
+    stalls = []
+
+    async def heartbeat():
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(HEARTBEAT)
+            stalls.append(time.perf_counter() - start - HEARTBEAT)
+
+    task = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(executor, inline) for _ in range(ACCOUNTS)))
+    took = time.perf_counter() - start
+    task.cancel()
+    return took, max(stalls), sum(s for s in stalls if s > HEARTBEAT)
+
+
+def main():
+    with concurrent.futures.ThreadPoolExecutor() as threads, \
+            concurrent.futures.ProcessPoolExecutor() as processes:
+        # Warm up the pools so that starting them isn't measured
+        list(processes.map(abs, range(processes._max_workers)))
+        list(threads.map(abs, range(threads._max_workers)))
+
+        for name, executor, inline in (
+                ('loop', None, True),
+                ('threads', threads, False),
+                ('processes', processes, False),
+        ):
+            took, worst, blocked = asyncio.run(measure(executor, inline))
+            print('{:>9}: {} logins in {:6.2f}s, loop blocked {:6.2f}s (worst stall {:7.2f}ms)'
+                  .format(name, ACCOUNTS, took, blocked, worst * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Measures how much memory instances of common types take, by allocating
+many of them and tracing the memory allocated in the process.
+Run with ``python -m tests.benchmarks.bench_memory``.
+"""
+import datetime
+import tracemalloc
+
+from telethon import types
+
+COUNT = 100000
+DATE = datetime.datetime.now(tz=datetime.timezone.utc)
+
+
+def make_peer_user(i):
+    return types.PeerUser(i)
+
+
+def make_user(i):
+    return types.User(id=i, access_hash=i, first_name='First', last_name='Last',
+                      username='username', phone='123', bot=False)
+
+
+def make_message(i):
+    return types.Message(id=i, peer_id=types.PeerUser(i), date=DATE, message='Hello',
+                         out=False, from_id=types.PeerUser(i))
+
+
+def measure(factory):
+    factory(0)  # warm up any caches
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(COUNT)]
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del objects
+    return size / COUNT
+
+
+def main():
+    for name, factory in (
+            ('PeerUser', make_peer_user),
+            ('User', make_user),
+            ('Message', make_message),
+    ):
+        print('{:>10}: {:6.0f} bytes per instance'.format(name, measure(factory)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmarks parsing and unparsing markdown and HTML messages of 4096
+characters (the most a message can have) with an increasing amount of
+entities, which should take time proportional to the length of the
+message (so about the same time per entity), as well as sending the
+same text again, which is parsed only once.
+Run with ``python -m tests.benchmarks.bench_parse``.
+"""
+import asyncio
+import random
+import timeit
+
+from telethon import TelegramClient
+from telethon.client import messageparse
+from telethon.extensions import markdown, html
+
+LENGTH = 4096
+ENTITIES = (50, 200, 400)
+NUMBER = 20
+
+MARKDOWN = ['**{}**', '__{}__', '~~{}~~', '`{}`', '[{}](https://example.com/{})']
+HTML = ['<b>{}</b>', '<i>{}</i>', '<s>{}</s>', '<code>{}</code>', '<a href="https://example.com/{}">{}</a>']
+
+
+class Client(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        self._parse_mode = markdown
+
+
+def make_message(formats, entities):
+    # Some of the words (some with emoji) are formatted as entities
+    rng = random.Random(entities)
+    parts = []
+    size = 0
+    while size < LENGTH:
+        word = rng.choice(('word', 'emoji👉', 'text'))
+        if rng.random() < entities / (LENGTH / 6):
+            word = rng.choice(formats).format(word, size)
+
+        parts.append(word + ' ')
+        size += len(parts[-1])
+
+    return ''.join(parts)[:LENGTH]
+
+
+def main():
+    for name, mode, formats in (('markdown', markdown, MARKDOWN), ('html', html, HTML)):
+        for count in ENTITIES:
+            message = make_message(formats, count)
+            text, entities = mode.parse(message)
+
+            t = min(timeit.repeat(lambda: mode.parse(message), number=NUMBER, repeat=3)) / NUMBER
+            u = min(timeit.repeat(lambda: mode.unparse(text, entities), number=NUMBER, repeat=3)) / NUMBER
+            print('{:>8} {:4} entities: parse {:6.2f}ms ({:5.2f}us per entity), unparse {:6.2f}ms'
+                  .format(name, len(entities), t * 1e3, t / len(entities) * 1e6, u * 1e3))
+
+    client = Client()
+    loop = asyncio.new_event_loop()
+    message = make_message(MARKDOWN, ENTITIES[-1])
+
+    def parse_message_text():
+        loop.run_until_complete(client._parse_message_text(message, ()))
+
+    def parse_message_text_uncached():
+        messageparse._parse_cached.cache_clear()
+        parse_message_text()
+
+    for name, func in (('uncached', parse_message_text_uncached), ('cached', parse_message_text)):
+        t = min(timeit.repeat(func, number=NUMBER, repeat=3)) / NUMBER
+        print('{:>8} _parse_message_text: {:6.2f}ms'.format(name, t * 1e3))
+
+    loop.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+import concurrent.futures
+import os
+
+import pytest
+
+from telethon import TelegramClient, password as pwd_mod
+from telethon.tl import types, functions
+
+
+def make_password():
+    p = int.from_bytes(pwd_mod._GOOD_PRIME, 'big')
+    return types.account.Password(
+        new_algo=types.PasswordKdfAlgoUnknown(),
+        new_secure_algo=types.SecurePasswordKdfAlgoUnknown(),
+        secure_random=os.urandom(32),
+        has_password=True,
+        current_algo=types.PasswordKdfAlgoSHA256SHA256PBKDF2HMACSHA512iter100000SHA256ModPow(
+            salt1=os.urandom(32), salt2=os.urandom(32), g=3, p=pwd_mod._GOOD_PRIME),
+        srp_B=pow(3, int.from_bytes(os.urandom(256), 'big'), p).to_bytes(256, 'big'),
+        srp_id=123
+    )
+
+
+class RecordingProcessPool(concurrent.futures.ProcessPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(fn)
+        return super().submit(fn, *args, **kwargs)
+
+
+class AuthClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, crypto_executor):
+        self._crypto_executor = crypto_executor
+        self.requests = []
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        if isinstance(request, functions.account.GetPasswordRequest):
+            return make_password()
+        return types.auth.Authorization(user=types.User(id=1))
+
+    async def get_me(self, input_peer=False):
+        return None
+
+    async def _on_login(self, user):
+        return user
+
+
+@pytest.mark.asyncio
+async def test_sign_in_password_in_crypto_executor():
+    client = AuthClient(RecordingProcessPool())
+    try:
+        user = await client.sign_in(password='hunter2')
+    finally:
+        client._crypto_executor.shutdown()
+
+    assert user.id == 1
+    assert client._crypto_executor.submitted == [pwd_mod.compute_check]
+
+    check = client.requests[-1].password
+    assert isinstance(check, types.InputCheckPasswordSRP)
+    assert check.srp_id == 123
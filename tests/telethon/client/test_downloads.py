@@ -0,0 +1,237 @@
+import asyncio
+import collections
+import concurrent.futures
+import hashlib
+import logging
+import os
+
+import pytest
+
+from telethon import TelegramClient, errors
+from telethon._updates import EntityCache
+from telethon.client.downloads import _MAX_CDN_REUPLOADS
+from telethon.crypto import AESModeCTR
+from telethon.sessions import MemorySession
+from telethon.tl import types, functions
+
+PART_SIZE = 4096
+DATA = os.urandom(PART_SIZE * 5 + 100)
+
+
+class DownloadClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, fail_at=None):
+        self._log = collections.defaultdict(lambda: logging.getLogger('telethon'))
+        self._mb_entity_cache = EntityCache()
+        self._sender = object()
+        self._crypto_executor = None
+        self.session = MemorySession()
+        self.fail_at = fail_at
+        self.offsets = []
+
+    async def _call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        assert isinstance(request, functions.upload.GetFileRequest)
+        if request.offset == self.fail_at:
+            raise ConnectionError('connection lost')
+
+        self.offsets.append(request.offset)
+        return types.upload.File(
+            type=types.storage.FileUnknown(),
+            mtime=None,
+            bytes=DATA[request.offset:request.offset + request.limit]
+        )
+
+
+async def download(client, path, file_reference=b'ref'):
+    location = types.InputDocumentFileLocation(1, 2, file_reference, '')
+    return await client.download_file(
+        location, path, part_size_kb=PART_SIZE / 1024, file_size=len(DATA), resume=True)
+
+
+@pytest.mark.asyncio
+async def test_resume_download(tmp_path):
+    path = str(tmp_path / 'file.bin')
+
+    with pytest.raises(ConnectionError):
+        await download(DownloadClient(fail_at=3 * PART_SIZE), path)
+
+    assert not os.path.exists(path)
+    assert os.path.getsize(path + '.part') == 3 * PART_SIZE
+
+    # The file reference may have been refreshed, which doesn't matter
+    client = DownloadClient()
+    await download(client, path, file_reference=b'new')
+
+    assert client.offsets[0] == 3 * PART_SIZE
+    with open(path, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(path + '.part')
+    assert not os.path.exists(path + '.part.json')
+
+
+@pytest.mark.asyncio
+async def test_resume_download_starts_over_if_modified(tmp_path):
+    path = str(tmp_path / 'file.bin')
+
+    with pytest.raises(ConnectionError):
+        await download(DownloadClient(fail_at=3 * PART_SIZE), path)
+
+    with open(path + '.part', 'r+b') as f:
+        f.seek(2 * PART_SIZE)
+        f.write(b'garbage')
+
+    client = DownloadClient()
+    await download(client, path)
+
+    assert client.offsets[0] == 0
+    with open(path, 'rb') as f:
+        assert f.read() == DATA
+
+
+CDN_HASH_SIZE = 2 * PART_SIZE
+CDN_KEY = os.urandom(32)
+CDN_IV = os.urandom(16)
+
+
+def cdn_hash(offset):
+    return types.FileHash(offset, CDN_HASH_SIZE, hashlib.sha256(DATA[offset:offset + CDN_HASH_SIZE]).digest())
+
+
+class CdnClient:
+    def __init__(self, tamper_at=None, always_reupload=False, fail_at=None):
+        self.tamper_at = tamper_at
+        self.always_reupload = always_reupload
+        self.fail_at = fail_at
+        self.offsets = []
+        self.reuploaded = False
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.disconnected = False
+
+    async def __call__(self, request):
+        assert isinstance(request, functions.upload.GetCdnFileRequest)
+        assert request.offset % request.limit == 0
+        if request.offset == self.fail_at:
+            raise ConnectionError('connection lost')
+
+        self.offsets.append(request.offset)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+
+        if request.offset >= 2 * CDN_HASH_SIZE and (self.always_reupload or not self.reuploaded):
+            return types.upload.CdnFileReuploadNeeded(b'token')
+
+        data = bytearray(DATA[request.offset:request.offset + request.limit])
+        if self.tamper_at is not None and request.offset <= self.tamper_at < request.offset + len(data):
+            data[self.tamper_at - request.offset] ^= 1
+
+        aes = AESModeCTR(CDN_KEY, CDN_IV[:12] + (request.offset // 16).to_bytes(4, 'big'))
+        return types.upload.CdnFile(aes.encrypt(bytes(data)))
+
+    async def disconnect(self):
+        self.disconnected = True
+
+
+class CdnDownloadClient(DownloadClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, cdn):
+        super().__init__()
+        self.cdn = cdn
+        self.requests = []
+
+    async def _get_cdn_client(self, cdn_redirect):
+        return self.cdn
+
+    async def _call(self, sender, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(type(request).__name__)
+        if isinstance(request, functions.upload.GetFileRequest):
+            return types.upload.FileCdnRedirect(2, b'token', CDN_KEY, CDN_IV, [cdn_hash(0)])
+        if isinstance(request, functions.upload.GetCdnFileHashesRequest):
+            return [cdn_hash(o) for o in range(request.offset, len(DATA), CDN_HASH_SIZE)][:1]
+        if isinstance(request, functions.upload.ReuploadCdnFileRequest):
+            self.cdn.reuploaded = True
+            return []
+        raise AssertionError(request)
+
+
+@pytest.mark.asyncio
+async def test_cdn_download():
+    cdn = CdnClient()
+    client = CdnDownloadClient(cdn)
+    location = types.InputDocumentFileLocation(1, 2, b'ref', '')
+    result = await client.download_file(location, bytes, part_size_kb=PART_SIZE / 1024, file_size=len(DATA))
+
+    assert result == DATA
+    assert cdn.max_in_flight > 1
+    assert cdn.disconnected
+
+    # Hashes are requested as needed, and the file is only reuploaded once
+    assert client.requests.count('ReuploadCdnFileRequest') == 1
+    assert client.requests.count('GetCdnFileHashesRequest') == 2
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.jobs = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.jobs += 1
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_cdn_download_decrypts_in_executor():
+    cdn = CdnClient()
+    client = CdnDownloadClient(cdn)
+    with CountingExecutor() as executor:
+        client._crypto_executor = executor
+        location = types.InputDocumentFileLocation(1, 2, b'ref', '')
+        result = await client.download_file(location, bytes, part_size_kb=PART_SIZE / 1024, file_size=len(DATA))
+
+    assert result == DATA
+    assert executor.jobs == -(-len(DATA) // CDN_HASH_SIZE)
+
+
+@pytest.mark.asyncio
+async def test_cdn_download_reuploads_are_limited():
+    cdn = CdnClient(always_reupload=True)
+    client = CdnDownloadClient(cdn)
+    location = types.InputDocumentFileLocation(1, 2, b'ref', '')
+    with pytest.raises(RuntimeError):
+        await client.download_file(location, bytes, part_size_kb=PART_SIZE / 1024, file_size=len(DATA))
+
+    assert client.requests.count('ReuploadCdnFileRequest') == _MAX_CDN_REUPLOADS
+    assert cdn.disconnected
+
+
+@pytest.mark.asyncio
+async def test_resume_cdn_download(tmp_path):
+    path = str(tmp_path / 'file.bin')
+
+    # The parts downloaded from the CDN are bigger than the ones requested
+    with pytest.raises(ConnectionError):
+        await download(CdnDownloadClient(CdnClient(fail_at=CDN_HASH_SIZE)), path)
+
+    assert os.path.getsize(path + '.part') == CDN_HASH_SIZE
+
+    cdn = CdnClient()
+    await download(CdnDownloadClient(cdn), path)
+
+    assert cdn.offsets[0] == CDN_HASH_SIZE
+    with open(path, 'rb') as f:
+        assert f.read() == DATA
+    assert not os.path.exists(path + '.part.json')
+
+
+@pytest.mark.asyncio
+async def test_cdn_download_tampered():
+    cdn = CdnClient(tamper_at=CDN_HASH_SIZE + 10)
+    client = CdnDownloadClient(cdn)
+    location = types.InputDocumentFileLocation(1, 2, b'ref', '')
+    with pytest.raises(errors.CdnFileTamperedError):
+        await client.download_file(location, bytes, part_size_kb=PART_SIZE / 1024, file_size=len(DATA))
+
+    assert cdn.disconnected
@@ -0,0 +1,52 @@
+import pytest
+
+from telethon import TelegramClient
+from telethon.client import messageparse
+from telethon.extensions import markdown
+from telethon.tl import types
+
+
+class ParseClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        self._parse_mode = markdown
+
+
+@pytest.mark.asyncio
+async def test_parse_message_text_cached(monkeypatch):
+    calls = []
+
+    def parse(message):
+        calls.append(message)
+        return message.strip('*'), [types.MessageEntityBold(0, 2)]
+
+    messageparse._parse_cached.cache_clear()
+    monkeypatch.setattr(markdown, 'parse', parse)
+    client = ParseClient()
+
+    text, entities = await client._parse_message_text('**hi**', ())
+    assert (text, entities) == ('hi', [types.MessageEntityBold(0, 2)])
+
+    # Changing the result must not change what's cached
+    entities.clear()
+    assert await client._parse_message_text('**hi**', ()) == ('hi', [types.MessageEntityBold(0, 2)])
+    assert calls == ['**hi**']
+
+    # Different text or parse mode are parsed separately
+    await client._parse_message_text('**hey**', 'md')
+    await client._parse_message_text('**hi**', 'html')
+    assert calls == ['**hi**', '**hey**']
+
+
+@pytest.mark.asyncio
+async def test_parse_message_text_custom_not_cached():
+    calls = []
+
+    def parse(message):
+        calls.append(message)
+        return message, []
+
+    client = ParseClient()
+    await client._parse_message_text('hi', parse)
+    await client._parse_message_text('hi', parse)
+    assert calls == ['hi', 'hi']
@@ -1,8 +1,11 @@
+import asyncio
 import inspect
 
 import pytest
 
 from telethon import TelegramClient
+from telethon._updates import EntityCache
+from telethon.tl import types, functions
 
 
 @pytest.mark.asyncio
@@ -38,3 +41,189 @@ async def test_send_message_with_file_forwards_args():
 
     client = MockedClient()
     assert (await client.send_message('a', file='b', **arguments)) == sentinel
+
+
+class HistoryClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, ids, fail_after=None):
+        self._mb_entity_cache = EntityCache()
+        self.ids = sorted(ids, reverse=True)
+        self.fail_after = fail_after
+        self.requests = 0
+
+    async def get_input_entity(self, entity):
+        return types.InputPeerChannel(123, 0)
+
+    async def get_peer_id(self, peer, add_mark=True):
+        return -1000000000123
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        assert isinstance(request, functions.messages.GetHistoryRequest)
+        self.requests += 1
+        if self.fail_after is not None and self.requests > self.fail_after:
+            raise ValueError('failed')
+
+        await asyncio.sleep(0)
+        ids = [i for i in self.ids if not request.offset_id or i < request.offset_id]
+        return types.messages.ChannelMessages(
+            pts=0, count=len(self.ids), chats=[], users=[], topics=[],
+            messages=[types.Message(id=i, peer_id=types.PeerChannel(123), date=None, message='')
+                      for i in ids[:request.limit]]
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('ordered', [True, False])
+async def test_iter_messages_parallel(ordered):
+    ids = [i for i in range(1, 2000) if i % 7]
+    client = HistoryClient(ids)
+    result = await client.iter_messages_parallel('a', ordered=ordered, partitions=5).collect()
+
+    assert result.total == len(ids)
+    if ordered:
+        assert [m.id for m in result] == sorted(ids, reverse=True)
+    else:
+        assert sorted(m.id for m in result) == ids
+
+
+@pytest.mark.asyncio
+async def test_iter_messages_parallel_range():
+    client = HistoryClient(range(1, 1000))
+    result = await client.iter_messages_parallel('a', min_id=100, max_id=200, partitions=3).collect()
+    assert [m.id for m in result] == list(range(199, 100, -1))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('ordered', [True, False])
+async def test_iter_messages_parallel_limit_stops_workers(ordered):
+    client = HistoryClient(range(1, 10000))
+    it = client.iter_messages_parallel('a', limit=10, ordered=ordered, partitions=16, concurrency=4)
+    result = [m async for m in it]
+    assert len(result) == 10
+
+    requests = client.requests
+    await asyncio.sleep(0.05)
+    assert client.requests == requests
+    assert not it._workers
+
+
+@pytest.mark.asyncio
+async def test_iter_messages_parallel_checkpoint(tmp_path):
+    checkpoint = tmp_path / 'export.json'
+    ids = list(range(1, 1000))
+
+    seen = []
+    client = HistoryClient(ids, fail_after=6)
+    with pytest.raises(ValueError):
+        async for message in client.iter_messages_parallel(
+                'a', ordered=False, partitions=4, concurrency=1, checkpoint=checkpoint):
+            seen.append(message.id)
+
+    assert 0 < len(seen) < len(ids)
+    client = HistoryClient(ids)
+    async for message in client.iter_messages_parallel(
+            'a', ordered=False, partitions=4, checkpoint=checkpoint):
+        seen.append(message.id)
+
+    # Messages may be returned twice after resuming, but none may be missing
+    assert set(seen) == set(ids)
+    assert len(seen) < 2 * len(ids)
+
+    # Once done, there's nothing left to export
+    assert not await HistoryClient(ids).iter_messages_parallel('a', checkpoint=checkpoint).collect()
+
+
+class BulkClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        self._mb_entity_cache = EntityCache()
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get_input_entity(self, entity):
+        if entity == 'invalid':
+            raise ValueError('no such chat')
+        if entity == 'me':
+            return types.InputPeerSelf()
+        if entity < 0:
+            return types.InputPeerChannel(-entity, 0)
+        return types.InputPeerUser(entity, 0)
+
+    async def get_me(self, input_peer=False):
+        return types.InputPeerUser(5, 0)
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+
+        if isinstance(request, functions.channels.DeleteMessagesRequest) and request.channel.channel_id == 13:
+            raise ValueError('cannot delete')
+        return types.messages.AffectedMessages(pts=1, pts_count=len(getattr(request, 'id', ())))
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_groups_and_chunks():
+    client = BulkClient()
+    items = [(-10, list(range(1, 151))), (5, [1, 2]), (-10, list(range(151, 251))), (-13, 1), ('invalid', [3])]
+
+    results = [r async for r in client.iter_bulk('delete', items, concurrency=3)]
+
+    assert client.max_in_flight == 3
+    sizes = sorted((type(r).__name__, len(r.id)) for r in client.requests)
+    assert sizes == [
+        ('DeleteMessagesRequest', 1),
+        ('DeleteMessagesRequest', 2),
+        ('DeleteMessagesRequest', 50),
+        ('DeleteMessagesRequest', 100),
+        ('DeleteMessagesRequest', 100),
+    ]
+
+    errors = {chat: ids for chat, ids, r in results if isinstance(r, Exception)}
+    assert errors == {-13: [1], 'invalid': [3]}
+    assert sum(len(ids) for chat, ids, r in results if chat == -10) == 250
+
+
+@pytest.mark.asyncio
+async def test_bulk_groups_same_chat_given_differently():
+    client = BulkClient()
+    results = await client.iter_bulk('delete', [('me', [1]), (5, [2])]).collect()
+
+    assert [(chat, ids) for chat, ids, _ in results] == [('me', [1, 2])]
+    assert len(client.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_requires_ids():
+    client = BulkClient()
+    for action in ('delete', 'forward'):
+        with pytest.raises(ValueError):
+            await client.iter_bulk(action, [(5, [1]), (-10, None)], to=5).collect()
+
+    assert not client.requests
+
+
+@pytest.mark.asyncio
+async def test_bulk_read_uses_max_id():
+    client = BulkClient()
+    results = await client.iter_bulk('read', [(5, [1, 7, 3]), (-10, None)]).collect()
+
+    assert len(results) == 2
+    reads = {type(r): r.max_id for r in client.requests}
+    assert reads == {
+        functions.messages.ReadHistoryRequest: 7,
+        functions.channels.ReadHistoryRequest: 0,
+    }
+
+
+def test_bulk_validates_action():
+    client = BulkClient()
+    with pytest.raises(ValueError):
+        client.iter_bulk('archive', [])
+    with pytest.raises(ValueError):
+        client.iter_bulk('forward', [(5, [1])])
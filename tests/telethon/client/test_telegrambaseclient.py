@@ -0,0 +1,139 @@
+import logging
+import time
+
+import pytest
+
+from telethon import TelegramClient, errors
+from telethon.crypto import AuthKey
+from telethon.sessions import MemorySession
+from telethon.tl import types, functions
+
+
+class Loggers(dict):
+    def __missing__(self, key):
+        return logging.getLogger(key)
+
+
+class ExportedSender:
+    def __init__(self, auth_key, fail=None):
+        self.auth_key = auth_key or AuthKey(b'new' * 64)
+        self.fail = fail
+        self.sent = []
+        self.connected = True
+
+    async def send(self, request):
+        self.sent.append(request.query.query)
+        if self.fail:
+            fail, self.fail = self.fail, None
+            raise fail
+
+    async def disconnect(self):
+        self.connected = False
+
+
+class ExportClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, session, fail=None):
+        self.session = session
+        self.fail = fail
+        self.senders = []
+        self.requests = []
+        self._log = Loggers()
+        self._init_request = functions.InitConnectionRequest(
+            0, '', '', '', '', '', '', functions.help.GetConfigRequest())
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        return types.auth.ExportedAuthorization(id=1, bytes=b'auth')
+
+    async def _get_dc(self, dc_id, cdn=False):
+        return types.DcOption(id=dc_id, ip_address='127.0.0.1', port=443)
+
+    async def _connect_exported_sender(self, dc, auth_key):
+        sender = ExportedSender(auth_key, self.fail)
+        self.fail = None
+        self.senders.append(sender)
+        return sender
+
+
+class SaltsSender:
+    def __init__(self, salts):
+        self.auth_key = AuthKey(b'key' * 64)
+        self.salts = salts
+        self.sent = []
+
+    def get_server_state(self):
+        return 0, self.salts
+
+    async def send(self, request):
+        self.sent.append(request)
+        now = int(time.time())
+        self.salts = [types.FutureSalt(now + i * 3600, now + (i + 1) * 3600, i)
+                      for i in range(request.num)]
+
+
+def sent_types(sender):
+    return [type(r) for r in sender.sent]
+
+
+@pytest.mark.asyncio
+async def test_exported_auth_key_is_saved():
+    client = ExportClient(MemorySession())
+    sender = await client._create_exported_sender(2)
+
+    assert sent_types(sender) == [functions.auth.ImportAuthorizationRequest]
+    assert client.session.get_exported_auth_key(2) is sender.auth_key
+
+
+@pytest.mark.asyncio
+async def test_exported_auth_key_is_reused():
+    session = MemorySession()
+    session.set_exported_auth_key(2, AuthKey(b'old' * 64))
+    client = ExportClient(session)
+    sender = await client._create_exported_sender(2)
+
+    assert client.requests == []
+    assert sent_types(sender) == [functions.updates.GetStateRequest]
+    assert sender.auth_key.key == b'old' * 64
+
+
+@pytest.mark.asyncio
+async def test_exported_auth_key_unauthorized():
+    session = MemorySession()
+    session.set_exported_auth_key(2, AuthKey(b'old' * 64))
+    client = ExportClient(session, fail=errors.AuthKeyUnregisteredError(None))
+    sender = await client._create_exported_sender(2)
+
+    # The same key is authorized again
+    assert len(client.senders) == 1
+    assert sent_types(sender) == [functions.updates.GetStateRequest,
+                                  functions.auth.ImportAuthorizationRequest]
+    assert session.get_exported_auth_key(2).key == b'old' * 64
+
+
+@pytest.mark.asyncio
+async def test_exported_auth_key_not_found():
+    session = MemorySession()
+    session.set_exported_auth_key(2, AuthKey(b'old' * 64))
+    client = ExportClient(session, fail=errors.AuthKeyNotFound())
+    sender = await client._create_exported_sender(2)
+
+    assert not client.senders[0].connected
+    assert sender is client.senders[1]
+    assert sent_types(sender) == [functions.auth.ImportAuthorizationRequest]
+    assert session.get_exported_auth_key(2).key == b'new' * 64
+
+
+@pytest.mark.asyncio
+async def test_future_salts_fetched_when_running_out():
+    now = int(time.time())
+    client = ExportClient(MemorySession())
+    client._sender = SaltsSender([types.FutureSalt(now, now + 3600, 1)])
+
+    await client._fetch_future_salts()
+    assert sent_types(client._sender) == [functions.GetFutureSaltsRequest]
+    assert client.session.get_server_state(0) == (0, client._sender.salts)
+
+    # Enough salts are known now, so they're not fetched again
+    await client._fetch_future_salts()
+    assert len(client._sender.sent) == 1
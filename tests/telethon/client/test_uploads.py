@@ -0,0 +1,272 @@
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import logging
+
+import pytest
+
+from telethon import TelegramClient, errors
+from telethon.sessions import MemorySession
+from telethon.client.uploads import _MAX_ALBUM_CONCURRENCY, _hash_stream
+from telethon.tl import types, functions, custom
+
+
+class MockedClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        self.session = MemorySession()
+        self._log = collections.defaultdict(lambda: logging.getLogger('telethon'))
+        self._media_executor = None
+        self.requests = []
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        return True
+
+
+def _sent_document(file_reference):
+    return types.MessageMediaDocument(document=types.Document(
+        id=123, access_hash=456, file_reference=file_reference,
+        date=datetime.datetime.now(tz=datetime.timezone.utc),
+        mime_type='text/plain', size=1000, dc_id=1, attributes=[]
+    ))
+
+
+@pytest.mark.asyncio
+async def test_upload_file_uses_cache():
+    client = MockedClient()
+    data = bytes(range(100)) * 10
+
+    handle = await client.upload_file(data, use_cache=types.InputDocument)
+    assert isinstance(handle, custom.InputSizedFile)
+    assert len(client.requests) == 1
+
+    client._cache_media(handle, _sent_document(b'ref'), image=False)
+    client.requests.clear()
+
+    handle = await client.upload_file(data, use_cache=types.InputDocument)
+    assert handle.to_dict() == types.InputDocument(123, 456, b'ref').to_dict()
+    assert not client.requests
+
+    # Other types or contents are not found in the cache
+    assert isinstance(await client.upload_file(data, use_cache=types.InputPhoto), types.InputFile)
+    assert isinstance(await client.upload_file(data[1:], use_cache=types.InputDocument), types.InputFile)
+    assert isinstance(await client.upload_file(data), types.InputFile)
+
+
+@pytest.mark.asyncio
+async def test_upload_big_file_uses_cache():
+    client = MockedClient()
+    data = bytes(11 * 1024 * 1024)
+
+    handle = await client.upload_file(data, use_cache=types.InputDocument)
+    assert isinstance(handle, custom.InputSizedFileBig)
+    assert isinstance(client.requests[0], functions.upload.SaveBigFilePartRequest)
+
+    client._cache_media(handle, _sent_document(b'ref'), image=False)
+    client.requests.clear()
+
+    handle = await client.upload_file(data, use_cache=types.InputDocument)
+    assert isinstance(handle, types.InputDocument)
+    assert not client.requests
+
+
+class RecordingThreadPool(concurrent.futures.ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(getattr(fn, 'func', fn))
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_upload_file_hashes_in_executor():
+    client = MockedClient()
+    client._media_executor = RecordingThreadPool()
+    try:
+        await client.upload_file(bytes(1000), use_cache=types.InputDocument)
+        assert client._media_executor.submitted == [_hash_stream]
+    finally:
+        client._media_executor.shutdown()
+
+
+class ReuploadClient(MockedClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def get_input_entity(self, entity):
+        return types.InputPeerSelf()
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        if isinstance(request, functions.messages.SendMediaRequest) and self.failures:
+            self.failures -= 1
+            raise errors.FileReferenceExpiredError(request=request)
+        return True
+
+    def _get_response_message(self, request, result, input_chat):
+        return _sent_document(b'new')
+
+
+@pytest.mark.asyncio
+async def test_send_file_reuploads_expired_cached_file():
+    client = ReuploadClient(failures=1)
+    data = bytes(range(100)) * 10
+    handle = await client.upload_file(data, use_cache=types.InputDocument)
+    client._cache_media(handle, _sent_document(b'old'), image=False)
+    client.requests.clear()
+
+    await client.send_file('me', data, parse_mode=None)
+
+    sent = [r for r in client.requests if isinstance(r, functions.messages.SendMediaRequest)]
+    assert len(sent) == 2
+    assert isinstance(sent[1].media, types.InputMediaUploadedDocument)
+    assert any(isinstance(r, functions.upload.SaveFilePartRequest) for r in client.requests)
+
+    # The new upload is what's cached now
+    cached = await client.upload_file(data, use_cache=types.InputDocument)
+    assert cached.file_reference == b'new'
+
+
+@pytest.mark.asyncio
+async def test_send_file_reupload_is_not_retried():
+    client = ReuploadClient(failures=2)
+    data = bytes(range(100)) * 10
+    handle = await client.upload_file(data, use_cache=types.InputDocument)
+    client._cache_media(handle, _sent_document(b'old'), image=False)
+
+    with pytest.raises(errors.FileReferenceExpiredError):
+        await client.send_file('me', data, parse_mode=None)
+
+
+class AlbumClient(MockedClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, fail=None):
+        super().__init__()
+        self.fail = fail
+        self.running = 0
+        self.max_running = 0
+        self.cancelled = []
+
+    async def get_input_entity(self, entity):
+        return types.InputPeerSelf()
+
+    async def _file_to_album_media(self, entity, file, supports_streaming=None,
+                                   force_document=False, ttl=None, progress_callback=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            # Later files finish first
+            await asyncio.sleep(0.01 * (10 - file))
+            if file == self.fail:
+                raise ValueError(file)
+            if progress_callback:
+                progress_callback(1, 2)
+                progress_callback(2, 2)
+            return None, types.InputMediaPhoto(types.InputPhoto(file, file, b''))
+        except asyncio.CancelledError:
+            self.cancelled.append(file)
+            raise
+        finally:
+            self.running -= 1
+
+    def _get_response_message(self, request, result, input_chat):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_send_album_concurrently():
+    client = AlbumClient()
+    progress = []
+    await client._send_album(
+        'me', list(range(10)), caption=[str(i) for i in range(10)], formatting_entities=[],
+        progress_callback=lambda s, t: progress.append((s, t)), parse_mode=None)
+
+    request, = client.requests
+
+    assert 1 < client.max_running <= _MAX_ALBUM_CONCURRENCY
+    assert [m.media.id.id for m in request.multi_media] == list(range(10))
+    assert [m.message for m in request.multi_media] == [str(i) for i in range(10)]
+    assert progress[-1] == (10, 10)
+    assert all(s <= t for s, t in progress)
+
+
+@pytest.mark.asyncio
+async def test_send_album_failure_cancels_rest():
+    client = AlbumClient(fail=7)
+    with pytest.raises(ValueError):
+        await client._send_album('me', list(range(10)), formatting_entities=[], parse_mode=None)
+
+    assert client.running == 0
+    assert client.cancelled
+    assert not client.requests
+
+
+class RecordingProcessPool(concurrent.futures.ProcessPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(fn)
+        return super().submit(fn, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_media_executor(tmp_path):
+    client = MockedClient()
+    client._media_executor = RecordingProcessPool()
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'hello')
+
+    try:
+        _, media, _ = await client._file_to_media(path)
+        assert len(client._media_executor.submitted) == 1
+        assert media.mime_type == 'text/plain'
+        assert media.attributes[0].file_name == 'a.txt'
+
+        # Streams can't be sent to other processes
+        with open(path, 'rb') as f:
+            _, media, _ = await client._file_to_media(f)
+        assert len(client._media_executor.submitted) == 1
+        assert media.attributes[0].file_name == 'a.txt'
+    finally:
+        client._media_executor.shutdown()
+
+
+class ReuploadAlbumClient(AlbumClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        super().__init__()
+        self.forgotten = []
+        self.session.forget_file = self.forgotten.append
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        if len(self.requests) == 1:
+            raise errors.MediaEmptyError(request=request)
+        return True
+
+    async def _file_to_album_media(self, entity, file, supports_streaming=None,
+                                   force_document=False, ttl=None, progress_callback=None):
+        # Even files are cached until they're forgotten
+        photo = types.InputPhoto(file, file, b'')
+        if file % 2 == 0 and photo not in self.forgotten:
+            return photo, types.InputMediaPhoto(photo)
+        return None, types.InputMediaPhoto(types.InputPhoto(file, file, b'new'))
+
+
+@pytest.mark.asyncio
+async def test_send_album_reuploads_cached_files():
+    client = ReuploadAlbumClient()
+    await client._send_album('me', list(range(4)), formatting_entities=[], parse_mode=None)
+
+    assert client.forgotten == [types.InputPhoto(0, 0, b''), types.InputPhoto(2, 2, b'')]
+    first, second = client.requests
+    assert second is first
+    assert [m.media.id.file_reference for m in second.multi_media] == [b'new'] * 4
@@ -0,0 +1,226 @@
+import asyncio
+
+import pytest
+
+from telethon import TelegramClient, errors, utils
+from telethon._updates import EntityCache
+from telethon.sessions import MemorySession
+from telethon.client import users
+from telethon.client.users import _EntityLoader, _MAX_CONCURRENT_FETCHES
+from telethon.tl import types, functions
+
+
+class ResolverClient(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self, invalid_channels=(), username_cache_ttl=None, unknown_users=()):
+        self._mb_entity_cache = EntityCache()
+        self._entity_loader = _EntityLoader(self)
+        self._username_cache_ttl = username_cache_ttl
+        self.session = MemorySession()
+        self.invalid_channels = set(invalid_channels)
+        self.unknown_users = set(unknown_users)
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request, ordered=False, flood_sleep_threshold=None):
+        self.requests.append(request)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return await self._respond(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _respond(self, request):
+        await asyncio.sleep(0.01)
+        if isinstance(request, functions.contacts.ResolveUsernameRequest):
+            result = await self._resolve(request)
+            self.session.process_entities(result)
+            return result
+        elif isinstance(request, functions.users.GetUsersRequest):
+            return [types.UserEmpty(u.user_id) if u.user_id in self.unknown_users
+                    else types.User(id=u.user_id, access_hash=1) for u in request.id]
+        elif isinstance(request, functions.messages.GetChatsRequest):
+            return types.messages.Chats([
+                types.Chat(id=i, title='', photo=types.ChatPhotoEmpty(),
+                           participants_count=0, date=None, version=0)
+                for i in request.id
+            ])
+        elif isinstance(request, functions.channels.GetChannelsRequest):
+            if any(c.channel_id in self.invalid_channels for c in request.id):
+                raise errors.ChannelInvalidError(request=request)
+            return types.messages.Chats([
+                types.Channel(id=c.channel_id, title='', photo=types.ChatPhotoEmpty(),
+                              date=None, access_hash=1)
+                for c in request.id
+            ])
+        raise AssertionError(request)
+
+    async def _resolve(self, request):
+        if request.username.startswith('nobody'):
+            raise errors.UsernameNotOccupiedError(request=request)
+        user = types.User(id=1, access_hash=1, username=request.username)
+        return types.contacts.ResolvedPeer(types.PeerUser(1), chats=[], users=[user])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_username_resolves_are_coalesced():
+    client = ResolverClient()
+    results = await asyncio.gather(*(client.get_entity('username') for _ in range(10)))
+
+    assert len(client.requests) == 1
+    assert all(r.id == 1 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_unoccupied_username_is_remembered():
+    client = ResolverClient()
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            await client.get_entity('nobody')
+
+    assert len(client.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_unoccupied_usernames_are_pruned(monkeypatch):
+    monkeypatch.setattr(users, '_UNOCCUPIED_USERNAME_TTL', 0)
+    client = ResolverClient()
+    for i in range(10):
+        with pytest.raises(ValueError):
+            await client.get_entity('nobody{}'.format(i))
+
+    assert list(client._entity_loader._unoccupied) == ['nobody9']
+
+
+@pytest.mark.asyncio
+async def test_lone_lookup_does_not_wait(monkeypatch):
+    monkeypatch.setattr(users, '_BATCH_WINDOW', 10)
+    client = ResolverClient()
+    result = await asyncio.wait_for(client.get_entity(types.InputPeerUser(1, 1)), 1)
+
+    assert result.id == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_users_are_batched():
+    client = ResolverClient()
+    peers = [types.InputPeerUser(i, 1) for i in range(1, 451)]
+    results = await asyncio.gather(*(client.get_entity(p) for p in peers + peers))
+
+    assert [r.id for r in results] == list(range(1, 451)) * 2
+    assert [len(r.id) for r in client.requests] == [200, 200, 50]
+
+
+@pytest.mark.asyncio
+async def test_invalid_channel_does_not_fail_batch():
+    client = ResolverClient(invalid_channels={2})
+    results = await asyncio.gather(
+        *(client.get_entity(types.InputPeerChannel(i, 1)) for i in range(1, 4)),
+        return_exceptions=True
+    )
+
+    assert results[0].id == 1
+    assert isinstance(results[1], errors.ChannelInvalidError)
+    assert results[2].id == 3
+
+
+@pytest.mark.asyncio
+async def test_mixed_peers_are_chunked_concurrently():
+    client = ResolverClient()
+    peers = [types.InputPeerUser(i, 1) for i in range(1, 451)]
+    peers += [types.InputPeerChat(i) for i in range(1000, 1250)]
+    peers += [types.InputPeerChannel(i, 1) for i in range(2000, 2250)]
+
+    results = await client.get_entity(peers)
+
+    assert [utils.get_peer_id(r) for r in results] == [utils.get_peer_id(p) for p in peers]
+    sizes = {}
+    for r in client.requests:
+        sizes.setdefault(type(r), []).append(len(r.id))
+    assert sizes == {
+        functions.users.GetUsersRequest: [200, 200, 50],
+        functions.messages.GetChatsRequest: [100, 100, 50],
+        functions.channels.GetChannelsRequest: [100, 100, 50],
+    }
+    assert client.max_in_flight == _MAX_CONCURRENT_FETCHES
+
+
+@pytest.mark.asyncio
+async def test_invalid_channel_is_bisected():
+    client = ResolverClient(invalid_channels={42})
+    results = await asyncio.gather(
+        *(client.get_entity(types.InputPeerChannel(i, 1)) for i in range(100)),
+        return_exceptions=True
+    )
+
+    assert [i for i, r in enumerate(results) if isinstance(r, Exception)] == [42]
+    assert len(client.requests) < 20
+
+
+@pytest.mark.asyncio
+async def test_invalid_peer_in_list_does_not_fail_others():
+    client = ResolverClient(invalid_channels={42})
+    peers = [types.InputPeerChannel(i, 1) for i in range(1, 500)]
+    peers += [types.InputPeerUser(i, 1) for i in range(1000, 1300)]
+
+    results = await client.get_entity(peers + ['nobody'])
+
+    assert [i for i, r in enumerate(results) if r is None] == [41, len(peers)]
+    assert [utils.get_peer_id(r) for r in results if r] == \
+        [utils.get_peer_id(p) for p in peers if getattr(p, 'channel_id', 0) != 42]
+    assert client.max_in_flight <= _MAX_CONCURRENT_FETCHES
+
+    with pytest.raises(errors.ChannelInvalidError):
+        await client.get_entity(types.InputPeerChannel(42, 1))
+
+
+@pytest.mark.asyncio
+async def test_unknown_ids_in_list_do_not_fail_others():
+    client = ResolverClient(unknown_users={13, 14})
+    client.session.process_entities(types.contacts.ResolvedPeer(
+        types.PeerUser(1), chats=[], users=[types.User(id=i, access_hash=1) for i in range(1, 4)]))
+
+    ids = list(range(1, 4)) + list(range(10, 20))
+    results = await client.get_entity(ids)
+
+    assert [r and r.id for r in results] == [i if i not in (13, 14) else None for i in ids]
+
+    # The uncached IDs are looked up together, not one after the other
+    lookups = [r for r in client.requests if isinstance(r, functions.users.GetUsersRequest)]
+    assert len(lookups) == 2
+
+    with pytest.raises(ValueError):
+        await client.get_entity(13)
+
+
+@pytest.mark.asyncio
+async def test_username_cache_avoids_resolving():
+    client = ResolverClient(username_cache_ttl=60)
+    assert (await client.get_entity('username')).id == 1
+    assert (await client.get_entity('@UserName')).id == 1
+
+    assert [type(r) for r in client.requests] == [
+        functions.contacts.ResolveUsernameRequest,
+        functions.users.GetUsersRequest,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_username_cache_is_opt_in():
+    client = ResolverClient()
+    await client.get_entity('username')
+    await client.get_entity('username')
+
+    assert [type(r) for r in client.requests] == [
+        functions.contacts.ResolveUsernameRequest,
+    ] * 2
+
+
+def test_username_update_forgets_username():
+    client = ResolverClient(username_cache_ttl=60)
+    client.session.process_entities([types.User(id=1, access_hash=1, username='old')])
+    client._preprocess_updates([types.UpdateUserName(1, '', '', [])], [], [])
+
+    assert client.session.get_cached_username('old', 60) is None
@@ -79,3 +79,23 @@ def test_offset_at_emoji():
 
     assert html.parse(parsed) == (text, entities)
     assert html.unparse(text, entities) == parsed
+
+
+def test_long_message():
+    """
+    Test that long messages with many entities are parsed and unparsed correctly.
+    """
+    parts = []
+    entities = []
+    offset = 0
+    for i in range(500):
+        word = '👉{}&'.format(i)
+        parts.append('<strong>{}</strong> <em>{}</em> '.format(word, word).replace('&', '&amp;'))
+        entities.append(MessageEntityBold(offset, len(word) + 1))
+        entities.append(MessageEntityItalic(offset + len(word) + 2, len(word) + 1))
+        offset += 2 * (len(word) + 2)
+
+    original = ''.join(parts).strip()
+    text, parsed = html.parse(original)
+    assert parsed == entities
+    assert html.unparse(text, parsed) == original
@@ -78,3 +78,38 @@ def test_offset_at_emoji():
 
     assert markdown.parse(parsed) == (text, entities)
     assert markdown.unparse(text, entities) == parsed
+
+
+def test_url_inside_entity():
+    """
+    Test that the markdown of an URL inside an entity is not part of its length.
+    """
+    original = '**[Example](https://example.com) text** after'
+    stripped = 'Example text after'
+
+    text, entities = markdown.parse(original)
+    assert text == stripped
+    assert entities == [MessageEntityBold(0, 12), MessageEntityTextUrl(0, 7, url='https://example.com')]
+
+    text = markdown.unparse(text, entities)
+    assert text == original
+
+
+def test_long_message():
+    """
+    Test that long messages with many entities are parsed and unparsed correctly.
+    """
+    parts = []
+    entities = []
+    offset = 0
+    for i in range(500):
+        word = '👉{}'.format(i)
+        parts.append('**{}** __{}__ '.format(word, word))
+        entities.append(MessageEntityBold(offset, len(word) + 1))
+        entities.append(MessageEntityItalic(offset + len(word) + 2, len(word) + 1))
+        offset += 2 * (len(word) + 2)
+
+    original = ''.join(parts).strip()
+    text, parsed = markdown.parse(original)
+    assert parsed == entities
+    assert markdown.unparse(text, parsed) == original
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from telethon.extensions import BinaryReader
+from telethon.network import GzipPolicy
+from telethon.tl.core import GzipPacked
+from telethon.tl.functions import PingRequest
+from telethon.tl.functions.messages import SendMessageRequest
+from telethon.tl.functions.upload import SaveFilePartRequest
+from telethon.tl.types import InputPeerSelf
+
+
+def text_request(size=4096):
+    return SendMessageRequest(InputPeerSelf(), 'spam ' * (size // 5), 1)
+
+
+def unpack(body):
+    with BinaryReader(body) as reader:
+        return GzipPacked.read(reader)
+
+
+def test_compressible_payload_is_gzipped():
+    policy = GzipPolicy()
+    request = text_request()
+    data = bytes(request)
+    body = policy.pack(request, data)
+
+    assert len(body) < len(data)
+    assert unpack(body) == data
+    assert policy.attempts == 1
+    assert policy.compressed == 1
+    assert policy.bytes_in == len(data)
+    assert policy.bytes_saved == len(data) - len(body)
+    assert policy.cpu_time > 0
+
+
+def test_small_payload_is_left_alone():
+    policy = GzipPolicy()
+    request = PingRequest(1)
+    data = bytes(request)
+
+    assert policy.pack(request, data) is data
+    assert policy.attempts == policy.skipped == 0
+
+
+def test_skipped_types_are_not_compressed():
+    policy = GzipPolicy()
+    request = SaveFilePartRequest(1, 0, b'\0' * 4096)
+    data = bytes(request)
+
+    assert policy.pack(request, data) is data
+    assert policy.skipped == 1
+    assert policy.attempts == 0
+
+    policy = GzipPolicy(skip=())
+    assert len(policy.pack(request, data)) < len(data)
+
+
+def test_incompressible_sample_skips_compression():
+    policy = GzipPolicy(skip=())
+    request = SaveFilePartRequest(1, 0, os.urandom(16 * 1024))
+    data = bytes(request)
+
+    assert policy.pack(request, data) is data
+    assert policy.skipped == 1
+    assert policy.attempts == 0
+
+    # Without sampling the whole payload is compressed, but not used
+    policy = GzipPolicy(skip=(), sample_size=0)
+    assert policy.pack(request, data) is data
+    assert policy.attempts == 1
+    assert policy.compressed == 0
+
+
+def test_compression_level():
+    request = text_request()
+    data = bytes(request)
+    assert unpack(GzipPolicy(level=1).pack(request, data)) == data
+
+
+@pytest.mark.asyncio
+async def test_large_payload_is_offloaded():
+    policy = GzipPolicy(offload_threshold=1024)
+    request = text_request(64 * 1024)
+    data = bytes(request)
+    body = await policy.pack_async(request, data)
+
+    assert unpack(body) == data
+    assert policy.compressed == 1
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import os
+import time
+
+import pytest
+
+from telethon.crypto import AuthKey
+from telethon.network.mtprotosender import MTProtoSender
+from telethon.tl.core import TLMessage
+from telethon.tl.functions import PingRequest, GetFutureSaltsRequest
+from telethon.tl.types import BadServerSalt, Pong, FutureSalt, FutureSalts
+
+
+class _Loggers(dict):
+    def __missing__(self, key):
+        return logging.getLogger(key)
+
+
+class FakeConnection:
+    """
+    Transport that accepts any data and never replies, so the
+    sender's bookkeeping can be driven by hand.
+    """
+    _connected = True
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, data):
+        self.sent += 1
+
+    async def disconnect(self):
+        pass
+
+
+def get_sender():
+    sender = MTProtoSender(AuthKey(os.urandom(256)), loggers=_Loggers())
+    # Encryption is not what's being tested, and is slow without cryptg
+    sender._state.encrypt_message_data = lambda data: data
+    sender._connection = FakeConnection()
+    sender._user_connected = True
+    return sender
+
+
+async def flush_sends(sender, count):
+    """
+    Runs the send loop until every queued request is pending.
+    """
+    task = asyncio.ensure_future(sender._send_loop())
+    while len(sender._pending_state) < count:
+        await asyncio.sleep(0)
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def assert_index_in_sync(sender):
+    expected = {}
+    for state in sender._pending_state.values():
+        if state.container_id is not None:
+            expected.setdefault(state.container_id, set()).add(state.msg_id)
+
+    assert {k: set(v) for k, v in sender._pending_containers.items()} == expected
+
+
+@pytest.mark.asyncio
+async def test_pending_container_index_under_load():
+    count = 50000
+    sender = get_sender()
+    futures = [sender.send(PingRequest(i)) for i in range(count)]
+
+    await flush_sends(sender, count)
+    assert sender._connection.sent > 0
+    assert len(sender._pending_state) == count
+    assert sender._pending_containers
+    assert_index_in_sync(sender)
+
+    # A bad salt for a whole container must pop all of its members
+    container_id, msg_ids = next(iter(sender._pending_containers.items()))
+    msg_ids = list(msg_ids)
+    await sender._handle_bad_server_salt(TLMessage(1, 0, BadServerSalt(
+        bad_msg_id=container_id, bad_msg_seqno=0, error_code=48, new_server_salt=1)))
+
+    assert container_id not in sender._pending_containers
+    assert all(x not in sender._pending_state for x in msg_ids)
+    assert len(sender._pending_state) == count - len(msg_ids)
+    assert_index_in_sync(sender)
+
+    # Resending must index the states under their new container
+    await flush_sends(sender, count)
+    assert all(x not in sender._pending_state for x in msg_ids)
+    assert_index_in_sync(sender)
+
+    # Responses must drop the states from the index as they arrive
+    for state in list(sender._pending_state.values()):
+        await sender._handle_pong(TLMessage(1, 0, Pong(
+            msg_id=state.msg_id, ping_id=state.request.ping_id)))
+
+    assert not sender._pending_state
+    assert not sender._pending_containers
+    assert all(f.done() for f in futures)
+
+
+@pytest.mark.asyncio
+async def test_pending_states_cleared_on_disconnect():
+    sender = get_sender()
+    futures = [sender.send(PingRequest(i)) for i in range(500)]
+    await flush_sends(sender, len(futures))
+    assert sender._pending_containers
+
+    await sender._disconnect()
+    assert not sender._pending_state
+    assert not sender._pending_containers
+    assert all(f.cancelled() for f in futures)
+
+
+@pytest.mark.asyncio
+async def test_single_resend_drops_stale_container():
+    sender = get_sender()
+    sender.send(PingRequest(1))
+    sender.send(PingRequest(2))
+    await flush_sends(sender, 2)
+
+    container_id = next(iter(sender._pending_containers))
+    states = sender._pop_states(container_id)
+    assert len(states) == 2
+
+    sender._send_queue.append(states[0])
+    await flush_sends(sender, 1)
+    assert states[0].container_id is None
+    assert not sender._pending_containers
+
+
+def make_salts(now):
+    return [
+        FutureSalt(valid_since=now - 7200, valid_until=now - 3600, salt=1),
+        FutureSalt(valid_since=now - 3600, valid_until=now + 3600, salt=2),
+        FutureSalt(valid_since=now + 3600, valid_until=now + 7200, salt=3),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_restored_server_state_picks_valid_salt():
+    sender = get_sender()
+    now = int(time.time())
+
+    # The time offset must be used to tell which salt is valid
+    sender.set_server_state(5400, make_salts(now))
+    assert sender._state.pick_salt()
+    assert sender._state.salt == 3
+    assert sender.get_server_state() == (5400, make_salts(now))
+
+    sender.set_server_state(0, make_salts(now - 7200))
+    assert not sender._state.pick_salt()
+    assert sender._state.salt == 3
+
+
+@pytest.mark.asyncio
+async def test_future_salts_are_kept():
+    sender = get_sender()
+    now = int(time.time())
+    future = sender.send(GetFutureSaltsRequest(3))
+    await flush_sends(sender, 1)
+
+    msg_id = next(iter(sender._pending_state))
+    await sender._handle_future_salts(TLMessage(1, 0, FutureSalts(
+        req_msg_id=msg_id, now=now, salts=make_salts(now))))
+
+    assert future.done()
+    assert sender.get_server_state() == (0, make_salts(now))
+
+    # A bad salt means the known ones can't be trusted anymore
+    await sender._handle_bad_server_salt(TLMessage(1, 0, BadServerSalt(
+        bad_msg_id=0, bad_msg_seqno=0, error_code=48, new_server_salt=4)))
+    assert sender._state.salt == 4
+    assert sender.get_server_state() == (0, [])
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+
+import pytest
+
+from telethon.network import SenderPool
+
+
+class Loggers(dict):
+    def __missing__(self, key):
+        return logging.getLogger(key)
+
+
+class Sender:
+    def __init__(self):
+        self.connected = True
+        self.disconnects = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def disconnect(self):
+        self.connected = False
+        self.disconnects += 1
+
+
+def make_pool(dc_id=2, size=2, idle_timeout=60, delay=0):
+    async def create():
+        await asyncio.sleep(delay)
+        return Sender()
+
+    return SenderPool(dc_id, create, loggers=Loggers(), size=size, idle_timeout=idle_timeout)
+
+
+@pytest.mark.asyncio
+async def test_least_busy_sender_is_borrowed():
+    pool = make_pool(size=2)
+    a = await pool.borrow()
+    b = await pool.borrow()
+    c = await pool.borrow()
+
+    assert a is not b
+    assert c in (a, b)
+    assert (pool.created, pool.connected, pool.in_use, pool.borrows) == (2, 2, 3, 3)
+
+    await pool.release(a)
+    await pool.release(c)
+    assert await pool.borrow() in (a, b)
+    assert pool.created == 2
+
+
+@pytest.mark.asyncio
+async def test_disconnected_sender_is_dropped():
+    pool = make_pool(size=1)
+    a = await pool.borrow()
+    await pool.release(a)
+    a.connected = False
+
+    b = await pool.borrow()
+    assert b is not a
+    assert pool.dropped == 1
+
+    # Borrowed senders are disconnected once released if they were dropped
+    b.connected = False
+    assert await pool.borrow() is not b
+    assert b.disconnects == 0
+    await pool.release(b)
+    assert b.disconnects == 1
+
+
+@pytest.mark.asyncio
+async def test_idle_sender_is_evicted():
+    pool = make_pool(size=2, idle_timeout=0.05)
+    a = await pool.borrow()
+    b = await pool.borrow()
+    await pool.release(a)
+
+    await asyncio.sleep(0.1)
+    assert not a.connected
+    assert b.connected
+    assert (pool.evicted, pool.connected) == (1, 1)
+
+    await pool.release(b)
+    await asyncio.sleep(0.1)
+    assert not b.connected
+    assert (pool.evicted, pool.connected) == (2, 0)
+
+
+@pytest.mark.asyncio
+async def test_pools_dont_wait_on_each_other():
+    slow = make_pool(dc_id=2, delay=10)
+    fast = make_pool(dc_id=4)
+
+    task = asyncio.ensure_future(slow.borrow())
+    await asyncio.sleep(0)
+    sender = await asyncio.wait_for(fast.borrow(), 1)
+    assert sender.connected
+    task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_close_disconnects_all():
+    pool = make_pool(size=2, idle_timeout=0.05)
+    a = await pool.borrow()
+    b = await pool.borrow()
+    await pool.release(a)
+    await pool.close()
+
+    assert not a.connected and not b.connected
+    assert pool.connected == 0
+    await pool.release(b)
@@ -0,0 +1,31 @@
+import pytest
+
+from telethon.crypto import AuthKey
+from telethon.sessions import MemorySession, SQLiteSession
+
+
+@pytest.fixture(params=[MemorySession, SQLiteSession])
+def session(request):
+    return request.param()
+
+
+def test_exported_auth_key(session):
+    assert session.get_exported_auth_key(2) is None
+
+    session.set_exported_auth_key(2, AuthKey(b'2' * 256))
+    session.set_exported_auth_key(4, AuthKey(b'4' * 256))
+    assert session.get_exported_auth_key(2).key == b'2' * 256
+    assert session.get_exported_auth_key(4).key == b'4' * 256
+
+    session.set_exported_auth_key(2, None)
+    assert session.get_exported_auth_key(2) is None
+    assert session.get_exported_auth_key(4) is not None
+
+
+def test_exported_auth_key_persists(tmp_path):
+    filename = str(tmp_path / 'test')
+    session = SQLiteSession(filename)
+    session.set_exported_auth_key(2, AuthKey(b'2' * 256))
+    session.close()
+
+    assert SQLiteSession(filename).get_exported_auth_key(2).key == b'2' * 256
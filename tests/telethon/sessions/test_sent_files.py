@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from telethon.sessions import MemorySession, SQLiteSession
+from telethon.tl import types
+
+
+@pytest.fixture(params=[MemorySession, SQLiteSession])
+def session(request):
+    return request.param()
+
+
+def test_cache_file(session):
+    doc = types.InputDocument(1, 2, b'ref')
+    session.cache_file(b'md5', 10, doc)
+
+    cached = session.get_file(b'md5', 10, types.InputDocument)
+    assert cached.to_dict() == doc.to_dict()
+    assert session.get_file(b'md5', 10, types.InputPhoto) is None
+    assert session.get_file(b'md5', 11, types.InputDocument) is None
+
+
+def test_forget_file(session):
+    session.cache_file(b'a', 10, types.InputDocument(1, 2, b'ref'))
+    session.cache_file(b'b', 10, types.InputPhoto(1, 2, b'ref'))
+    session.forget_file(types.InputDocument(1, 2, b'ref'))
+
+    assert session.get_file(b'a', 10, types.InputDocument) is None
+    assert session.get_file(b'b', 10, types.InputPhoto) is not None
+
+
+def test_file_cache_ttl(session, monkeypatch):
+    session.cache_file(b'md5', 10, types.InputDocument(1, 2, b'ref'))
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + session.file_cache_ttl + 10)
+    assert session.get_file(b'md5', 10, types.InputDocument) is None
+
+
+def test_file_cache_size(session, monkeypatch):
+    session.file_cache_size = 3
+    now = time.time()
+    for i in range(5):
+        # SQLite stores the date with second precision
+        monkeypatch.setattr(time, 'time', lambda: now + i)
+        session.cache_file(bytes([i]), 10, types.InputDocument(i, i, b''))
+
+    assert [session.get_file(bytes([i]), 10, types.InputDocument) is not None
+            for i in range(5)] == [False, False, True, True, True]
@@ -0,0 +1,73 @@
+import sqlite3
+import time
+
+import pytest
+
+from telethon.sessions import MemorySession, SQLiteSession
+from telethon.tl import types
+
+
+@pytest.fixture(params=[MemorySession, SQLiteSession])
+def session(request):
+    return request.param()
+
+
+def make_salts():
+    now = int(time.time())
+    return [types.FutureSalt(valid_since=now, valid_until=now + 3600, salt=-1),
+            types.FutureSalt(valid_since=now + 3600, valid_until=now + 7200, salt=2 ** 62)]
+
+
+def make_cdn_config():
+    return types.CdnConfig(public_keys=[types.CdnPublicKey(dc_id=203, public_key='key')])
+
+
+def test_server_state(session):
+    assert session.get_server_state(2) is None
+
+    salts = make_salts()
+    session.set_server_state(2, -5, salts)
+    session.set_server_state(4, 0, [])
+    assert session.get_server_state(2) == (-5, salts)
+    assert session.get_server_state(4) == (0, [])
+
+
+def test_config_expires(session):
+    assert session.get_config('cdn_config') is None
+
+    session.set_config('cdn_config', make_cdn_config(), int(time.time()) + 60)
+    assert session.get_config('cdn_config') == make_cdn_config()
+    assert session.get_config('config') is None
+
+    session.set_config('cdn_config', make_cdn_config(), int(time.time()) - 1)
+    assert session.get_config('cdn_config') is None
+
+
+def test_server_state_persists(tmp_path):
+    filename = str(tmp_path / 'test')
+    salts = make_salts()
+    session = SQLiteSession(filename)
+    session.set_server_state(2, 3, salts)
+    session.set_config('cdn_config', make_cdn_config(), int(time.time()) + 60)
+    session.close()
+
+    session = SQLiteSession(filename)
+    assert session.get_server_state(2) == (3, salts)
+    assert session.get_config('cdn_config') == make_cdn_config()
+
+
+def test_server_state_upgrade(tmp_path):
+    filename = str(tmp_path / 'test.session')
+    SQLiteSession(filename).close()
+
+    conn = sqlite3.connect(filename)
+    conn.execute('drop table server_state')
+    conn.execute('drop table configs')
+    conn.execute('update version set version = 9')
+    conn.commit()
+    conn.close()
+
+    session = SQLiteSession(filename)
+    assert session.get_server_state(2) is None
+    session.set_server_state(2, 0, make_salts())
+    assert session.get_server_state(2) is not None
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from telethon.sessions import MemorySession, SQLiteSession
+from telethon.tl import types
+
+
+@pytest.fixture(params=[MemorySession, SQLiteSession])
+def session(request):
+    session = request.param()
+    session.process_entities([
+        types.User(id=1, access_hash=2, username='Alice'),
+        types.User(id=3, access_hash=4, username='bob'),
+    ])
+    return session
+
+
+def test_get_cached_username(session):
+    peer = session.get_cached_username('alice', 60)
+    assert peer.to_dict() == types.InputPeerUser(1, 2).to_dict()
+    assert session.get_cached_username('carol', 60) is None
+
+
+def test_cached_username_expires(session, monkeypatch):
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 120)
+    assert session.get_cached_username('alice', 60) is None
+    assert session.get_cached_username('alice', 300) is not None
+
+
+def test_forget_username(session):
+    session.forget_username('alice')
+    session.forget_username(3)
+
+    assert session.get_cached_username('alice', 60) is None
+    assert session.get_cached_username('bob', 60) is None
+    with pytest.raises(ValueError):
+        session.get_input_entity('bob')
+    assert session.get_input_entity(3).user_id == 3
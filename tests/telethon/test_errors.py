@@ -0,0 +1,44 @@
+"""
+tests for telethon.errors
+"""
+import re
+from pathlib import Path
+
+from telethon import errors
+from telethon.tl.types import RpcError
+from telethon_generator.parsers import parse_errors
+
+ERRORS_CSV = Path(__file__).parents[2] / 'telethon_generator/data/errors.csv'
+
+
+def _loop_classify(message):
+    # The classification done before all patterns were combined into one
+    for msg_regex, cls in errors.rpc_errors_re:
+        m = re.match(msg_regex, message)
+        if m:
+            return cls, int(m.group(1))
+
+
+def test_combined_regex_matches_every_error():
+    for error in parse_errors(ERRORS_CSV):
+        if not error.has_captures:
+            continue
+
+        message = error.str_code.replace('_X', '_1234')
+        e = errors.rpc_message_to_error(RpcError(420, message), None)
+        cls, capture = _loop_classify(message)
+        assert type(e) is cls
+        assert getattr(e, error.capture_name) == capture == 1234
+
+
+def test_exact_and_unknown_errors():
+    e = errors.rpc_message_to_error(RpcError(400, 'CHAT_ID_INVALID'), None)
+    assert isinstance(e, errors.ChatIdInvalidError)
+
+    e = errors.rpc_message_to_error(RpcError(420, 'FLOOD_WAIT_17'), None)
+    assert isinstance(e, errors.FloodWaitError)
+    assert e.seconds == 17
+
+    e = errors.rpc_message_to_error(RpcError(400, 'SOMETHING_NEW_4'), None)
+    assert type(e) is errors.BadRequestError
+    assert e.message == 'SOMETHING_NEW_4'
@@ -0,0 +1,100 @@
+import datetime
+import io
+import json
+
+import pytest
+
+from telethon import export
+from telethon.tl import types
+
+DATE = datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+
+
+def make_message(i):
+    return types.Message(
+        id=i,
+        peer_id=types.PeerChannel(10),
+        date=DATE,
+        message='Message "{}" 👍\n'.format(i),
+        out=i % 2 == 0,
+        from_id=types.PeerUser(i),
+        entities=[types.MessageEntityBold(0, 7)],
+        media=types.MessageMediaPhoto(photo=types.Photo(
+            id=i, access_hash=i, file_reference=b'\x00\xff', date=DATE, dc_id=2,
+            sizes=[types.PhotoSize('m', 320, 240, 10000)])),
+        restriction_reason=[],
+    )
+
+
+async def aiterate(items):
+    for item in items:
+        yield item
+
+
+def test_to_json_line_matches_to_json():
+    message = make_message(1)
+    line = export.to_json_line(message)
+
+    assert '\n' not in line
+    assert json.loads(line) == json.loads(message.to_json())
+
+
+def test_to_json_line_fields():
+    line = export.to_json_line(make_message(1), fields=['id', 'from_id', 'missing'])
+    assert json.loads(line) == {
+        '_': 'Message', 'id': 1, 'from_id': {'_': 'PeerUser', 'user_id': 1}, 'missing': None
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('iterate', [list, aiterate])
+async def test_write_json_lines(iterate):
+    messages = [make_message(i) for i in range(3)]
+    fp = io.StringIO()
+    count = await export.write_json_lines(iterate(messages), fp, fields=['id', 'date'])
+
+    assert count == 3
+    assert [json.loads(line) for line in fp.getvalue().splitlines()] == [
+        {'_': 'Message', 'id': i, 'date': DATE.isoformat()} for i in range(3)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_arrow_batches():
+    pytest.importorskip('pyarrow')
+    messages = [make_message(i) for i in range(5)]
+    batches = [b async for b in export.iter_arrow_batches(
+        messages, ['id', 'date', 'message', 'media'], batch_size=2)]
+
+    assert [b.num_rows for b in batches] == [2, 2, 1]
+    assert batches[0].schema == batches[2].schema
+    assert batches[2].column(0).to_pylist() == [4]
+    assert json.loads(batches[0].column(3).to_pylist()[0]) == json.loads(messages[0].media.to_json())
+
+
+def test_columns_are_json_for_every_vector():
+    messages = [make_message(i) for i in range(3)]
+    messages[1].entities = []
+    messages[2].entities = None
+    messages[2].restriction_reason = [types.RestrictionReason('ios', 'porn', 'text')]
+
+    columns = export._to_columns(messages, ['id', 'entities', 'restriction_reason'])
+
+    assert columns['id'] == [0, 1, 2]
+    assert columns['entities'][1:] == ['[]', None]
+    assert json.loads(columns['entities'][0]) == [{'_': 'MessageEntityBold', 'offset': 0, 'length': 7}]
+    assert columns['restriction_reason'][:2] == ['[]', '[]']
+    assert json.loads(columns['restriction_reason'][2])[0]['platform'] == 'ios'
+
+
+@pytest.mark.asyncio
+async def test_iter_arrow_batches_mixed_vectors():
+    pytest.importorskip('pyarrow')
+    messages = [make_message(i) for i in range(4)]
+    messages[3].restriction_reason = [types.RestrictionReason('ios', 'porn', 'text')]
+    batches = [b async for b in export.iter_arrow_batches(
+        messages, ['id', 'restriction_reason'], batch_size=3)]
+
+    assert batches[0].schema == batches[1].schema
+    assert batches[0].column(1).to_pylist() == ['[]'] * 3
+    assert json.loads(batches[1].column(1).to_pylist()[0])[0]['reason'] == 'porn'
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from telethon.requestiter import RequestIter
+
+
+class NumbersIter(RequestIter):
+    async def _init(self, total, chunk_size, fail_at=None):
+        self.total = total
+        self.chunk_size = chunk_size
+        self.fail_at = fail_at
+        self.next = 0
+        self.loads = 0
+
+    async def _load_next_chunk(self):
+        if self.loads == self.fail_at:
+            raise ValueError(self.loads)
+
+        self.loads += 1
+        await asyncio.sleep(0)
+        size = min(self.chunk_size, self.left, self.total - self.next)
+        self.buffer.extend(range(self.next, self.next + size))
+        self.next += size
+        return self.next >= self.total
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('limit', [None, 0, 5, 10, 23, 35, 100])
+async def test_prefetch_same_items(limit):
+    expected = [x async for x in NumbersIter(None, limit, total=35, chunk_size=10)]
+    actual = [x async for x in NumbersIter(None, limit, prefetch=2, total=35, chunk_size=10)]
+    assert actual == expected
+
+
+@pytest.mark.asyncio
+async def test_prefetch_loads_ahead():
+    it = NumbersIter(None, None, prefetch=2, total=100, chunk_size=10).__aiter__()
+    assert await it.__anext__() == 0
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+    # One chunk being consumed, two in the queue and one waiting to be put
+    assert it.loads == 4
+    await it.aclose()
+    assert it._prefetch_task is None
+
+
+@pytest.mark.asyncio
+async def test_prefetch_errors():
+    it = NumbersIter(None, None, prefetch=2, total=100, chunk_size=10, fail_at=2)
+    items = []
+    with pytest.raises(ValueError):
+        async for x in it:
+            items.append(x)
+
+    assert items == list(range(20))
+    with pytest.raises(StopAsyncIteration):
+        await it.__anext__()
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from telethon.sharding import Supervisor
+
+
+class FakeClient:
+    def __init__(self, session, api_id, api_hash, **kwargs):
+        self.session = session
+        self.kwargs = kwargs
+        self.ready = False
+
+    async def connect(self):
+        pass
+
+    async def is_user_authorized(self):
+        return self.session != 'guest'
+
+    async def disconnect(self):
+        pass
+
+
+def setup(client):
+    client.ready = True
+
+
+async def describe(client, suffix=''):
+    return client.session + suffix, client.ready, client.kwargs, os.getpid()
+
+
+def fail(client):
+    raise KeyError(client.session)
+
+
+@pytest.mark.asyncio
+async def test_supervisor():
+    supervisor = Supervisor(1, 'hash', workers=2, client_class=FakeClient,
+                            client_kwargs={'timeout': 5}, setup=setup)
+    async with supervisor:
+        await supervisor.start(['a', 'b', 'c', 'd'])
+
+        loads = await supervisor.load()
+        assert [len(w.sessions) for w in loads] == [2, 2]
+        assert loads[0].pid != loads[1].pid != os.getpid()
+
+        name, ready, kwargs, pid = await supervisor.call('a', describe, '!')
+        assert (name, ready, kwargs) == ('a!', True, {'timeout': 5})
+        worker = next(w for w in loads if 'a' in w.sessions)
+        assert pid == worker.pid
+
+        # Moving a client runs it in the other worker
+        other = next(w for w in loads if w is not worker)
+        await supervisor.move('a', other.index)
+        assert (await supervisor.call('a', describe))[3] == other.pid
+        assert sorted(len(w.sessions) for w in await supervisor.load()) == [1, 3]
+
+        with pytest.raises(KeyError):
+            await supervisor.call('b', fail)
+
+        with pytest.raises(ValueError):
+            await supervisor.add('guest')
+
+        await supervisor.remove('b')
+        with pytest.raises(ValueError):
+            await supervisor.call('b', describe)
+
+        assert sum(w.calls for w in await supervisor.load()) == 3
@@ -0,0 +1,44 @@
+import pickle
+import subprocess
+import sys
+
+from telethon import types, functions
+from telethon.tl.alltlobjects import tlobjects
+
+
+def test_import_is_lazy():
+    # A new process is needed for nothing to be imported yet
+    out = subprocess.run([sys.executable, '-c', '\n'.join((
+        'import sys, telethon',
+        "print('telethon.tl.types._messages__messages' in sys.modules)",
+        'telethon.types.messages.MessagesSlice',
+        "print('telethon.tl.types._messages__messages' in sys.modules)",
+    ))], check=True, stdout=subprocess.PIPE, universal_newlines=True)
+    assert out.stdout.split() == ['False', 'True']
+
+
+def test_lazy_namespaces():
+    assert types.PeerUser.__module__ == 'telethon.tl.types'
+    assert functions.messages.GetHistoryRequest.__module__ == 'telethon.tl.functions.messages'
+    assert 'PeerUser' in dir(types)
+    assert 'messages' in types.__all__
+
+    try:
+        types.ThisDoesNotExist
+    except AttributeError:
+        pass
+    else:
+        assert False, 'accessing an unknown type should fail'
+
+
+def test_tlobjects_lookup():
+    assert tlobjects[types.PeerUser.CONSTRUCTOR_ID] is types.PeerUser
+    assert tlobjects.get(functions.PingRequest.CONSTRUCTOR_ID) is functions.PingRequest
+    assert types.Message.CONSTRUCTOR_ID in tlobjects
+    assert tlobjects.get(0) is None
+    assert 0 not in tlobjects
+
+
+def test_pickle_lazy_class():
+    peer = types.PeerChannel(123)
+    assert pickle.loads(pickle.dumps(peer)).to_dict() == peer.to_dict()
@@ -0,0 +1,43 @@
+import datetime
+
+import pytest
+
+from telethon import types
+from telethon.tl.custom import Message
+
+
+def test_eq_compares_fields():
+    assert types.PeerUser(1) == types.PeerUser(1)
+    assert types.PeerUser(1) != types.PeerUser(2)
+    assert types.PeerUser(1) != types.PeerChat(1)
+    assert types.PeerUser(1) != 1
+    assert types.InputPeerSelf() == types.InputPeerSelf()
+
+
+def test_eq_matches_to_dict():
+    date = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+    a = types.Message(1, types.PeerUser(1), date, 'a', entities=None)
+    b = types.Message(1, types.PeerUser(1), date, 'a', entities=[])
+    c = types.Message(1, types.PeerUser(2), date, 'a')
+    assert a == b and a.to_dict() == b.to_dict()
+    assert a != c
+    assert isinstance(a, Message)
+
+
+def test_peers_are_hashable():
+    peers = {
+        types.PeerUser(1): 'user',
+        types.PeerChat(1): 'chat',
+        types.InputPeerChannel(1, 2): 'channel',
+        types.InputPeerUserFromMessage(types.InputPeerChat(3), 4, 5): 'from message',
+    }
+    assert peers[types.PeerUser(1)] == 'user'
+    assert peers[types.PeerChat(1)] == 'chat'
+    assert peers[types.InputPeerChannel(1, 2)] == 'channel'
+    assert peers[types.InputPeerUserFromMessage(types.InputPeerChat(3), 4, 5)] == 'from message'
+    assert types.InputPeerChannel(1, 3) not in peers
+
+
+def test_other_types_are_not_hashable():
+    with pytest.raises(TypeError):
+        hash(types.User(id=1))
@@ -0,0 +1,69 @@
+import datetime
+
+from telethon import TelegramClient, utils
+from telethon._updates import EntityCache
+from telethon.tl import types
+
+DATE = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class Client(TelegramClient):
+    # noinspection PyMissingConstructor
+    def __init__(self):
+        self._mb_entity_cache = EntityCache()
+
+
+def make_message(**kwargs):
+    return types.Message(id=1, peer_id=types.PeerChannel(10), date=DATE, message='hi',
+                         from_id=types.PeerUser(2), **kwargs)
+
+
+def make_entities():
+    user = types.User(id=2, access_hash=3, first_name='User')
+    chat = types.Channel(id=10, title='Chat', photo=types.ChatPhotoEmpty(), date=DATE, access_hash=11)
+    return user, chat, {utils.get_peer_id(x): x for x in (user, chat)}
+
+
+def test_entities_are_found_when_needed():
+    user, chat, entities = make_entities()
+    message = make_message(fwd_from=types.MessageFwdHeader(DATE, from_id=types.PeerUser(2)))
+    message._finish_init(Client(), entities, None)
+
+    assert '_sender' not in vars(message)
+    assert message.sender is user
+    assert message.chat is chat
+    assert message.input_sender == types.InputPeerUser(2, 3)
+    assert message.forward.sender is user
+
+    # Once done, the entities are no longer needed
+    assert message._entities is None
+
+
+def test_input_chat_has_priority():
+    _, _, entities = make_entities()
+    input_chat = types.InputPeerChannel(10, 99)
+    message = make_message()
+    message._finish_init(Client(), entities, input_chat)
+    assert message.input_chat is input_chat
+
+
+def test_values_set_before_are_kept():
+    _, chat, entities = make_entities()
+    other = types.User(id=2, access_hash=4, first_name='Other')
+    message = make_message()
+    message._finish_init(Client(), entities, None)
+
+    message._sender = other
+    assert message.sender is other
+    assert message.chat is chat
+
+
+def test_without_entities():
+    message = make_message()
+    assert message.sender is None
+    assert message.chat is None
+
+    message = make_message()
+    message._finish_init(Client(), None, None)
+    assert message.sender is None
+    assert message.forward is None
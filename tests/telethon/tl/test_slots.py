@@ -0,0 +1,52 @@
+import copy
+import datetime
+import pickle
+
+import pytest
+
+from telethon import types
+from telethon.tl.custom import Forward
+
+
+def test_generated_classes_have_no_dict():
+    peer = types.PeerUser(123)
+    assert not hasattr(peer, '__dict__')
+    with pytest.raises(AttributeError):
+        peer.not_a_field = 1
+
+
+def test_extra_slots():
+    user = types.User(id=123)
+    user.participant = None
+
+    updates = types.UpdatesTooLong()
+    updates._self_outgoing = True
+    updates._entities = {}
+
+
+def test_pickle_and_copy():
+    user = types.User(id=123, access_hash=456, first_name='a', bot=True)
+    user.participant = types.ChannelParticipant(123, datetime.datetime(
+        2020, 1, 1, tzinfo=datetime.timezone.utc))
+
+    for clone in (pickle.loads(pickle.dumps(user)), copy.copy(user), copy.deepcopy(user)):
+        assert clone.to_dict() == user.to_dict()
+        assert clone.participant.to_dict() == user.participant.to_dict()
+
+
+def test_patched_message_keeps_dict():
+    message = types.Message(
+        id=1, peer_id=types.PeerUser(123), date=None, message='hi')
+    message.some_attribute = 1
+    assert message.message == 'hi'
+
+    clone = pickle.loads(pickle.dumps(message))
+    assert clone.message == 'hi'
+    assert clone.some_attribute == 1
+
+
+def test_forward_copies_fields():
+    header = types.MessageFwdHeader(date=None, from_name='name')
+    fwd = Forward(None, header, {})
+    assert fwd.from_name == 'name'
+    assert fwd.original_fwd is header